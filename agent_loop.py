@@ -15,41 +15,46 @@ Created: 2026-02-01
 
 import asyncio
 import base64
+import importlib.util
+import io
 import json
 import os
-import subprocess
-import sys
 import tempfile
 import time
 from pathlib import Path
 
-# TTS
-try:
-    from gtts import gTTS
-except ImportError:
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'gTTS'])
-    from gtts import gTTS
+from audio_decode import float32_to_wav_bytes, to_whisper_input
+from intents import get_intents
+from tts_engines import get_tts_engine
 
-# Speech Recognition
-try:
-    import speech_recognition as sr
-except ImportError:
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'SpeechRecognition'])
-    import speech_recognition as sr
+# Speech Recognition (imported on first use: page_player imports this
+# module for the inject script, which must not pay for it)
+SR_AVAILABLE = importlib.util.find_spec("speech_recognition") is not None
 
 
 class VideoCallAgent:
     """AI Agent that participates in Jitsi video calls."""
     
-    def __init__(self, language="ca"):
+    def __init__(self, language="ca", tts_engine=None):
         self.language = language
-        self.recognizer = sr.Recognizer()
+        self._recognizer = None
+        self.tts = tts_engine or get_tts_engine()
+    
+    @property
+    def recognizer(self):
+        if self._recognizer is None:
+            if not SR_AVAILABLE:
+                raise ImportError("SpeechRecognition is not installed: pip install SpeechRecognition")
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
     
     def generate_tts(self, text: str) -> str:
-        """Generate TTS audio and return path."""
-        path = tempfile.mktemp(suffix='.mp3')
-        tts = gTTS(text, lang=self.language)
-        tts.save(path)
+        """Generate TTS audio (through the shared TTS cache) and return path."""
+        audio = self.tts.synthesize_sync(text, self.language)
+        path = tempfile.mktemp(suffix=f'.{audio.format}')
+        with open(path, 'wb') as f:
+            f.write(audio.data)
         return path
     
     def upload_audio(self, path: str) -> str:
@@ -72,18 +77,12 @@ class VideoCallAgent:
         return url
     
     def transcribe(self, audio_path: str) -> str:
-        """Transcribe audio file to text."""
-        # Convert webm to wav if needed
-        if audio_path.endswith('.webm'):
-            wav_path = audio_path.replace('.webm', '.wav')
-            subprocess.run([
-                'ffmpeg', '-y', '-i', audio_path, 
-                '-ar', '16000', '-ac', '1', wav_path
-            ], capture_output=True)
-            audio_path = wav_path
-        
+        """Transcribe audio file (or encoded bytes) to text."""
         try:
-            with sr.AudioFile(audio_path) as source:
+            import speech_recognition as sr
+            # Decode in-process to 16 kHz mono, hand SpeechRecognition an in-memory WAV
+            wav = float32_to_wav_bytes(to_whisper_input(audio_path))
+            with sr.AudioFile(io.BytesIO(wav)) as source:
                 audio = self.recognizer.record(source)
             
             # Try Google first
@@ -99,20 +98,10 @@ class VideoCallAgent:
     
     def think(self, heard_text: str) -> str:
         """Generate response to what was heard."""
-        # Simple echo for now - can be replaced with LLM
+        # Rules from intents.json - can be replaced with LLM
         if "[No speech" in heard_text or "[Error" in heard_text:
             return None
-        
-        # Basic responses
-        heard_lower = heard_text.lower()
-        if "hola" in heard_lower:
-            return "Hola! Com estàs?"
-        elif "com et dius" in heard_lower:
-            return "Sóc VictorIA, la teva assistent amb veu!"
-        elif "adéu" in heard_lower or "bye" in heard_lower:
-            return "Adéu! Ha estat un plaer parlar amb tu!"
-        else:
-            return f"He sentit: {heard_text}. Què vols que faci?"
+        return get_intents().respond(heard_text, self.language)
 
 
 # JavaScript to inject into Jitsi for the loop
@@ -121,34 +110,348 @@ JITSI_LOOP_JS = '''
 window.victoriaAgent = {
     isRunning: false,
     captureChunks: [],
+    clips: new Map(),
+    
+    // Shared AudioContext for decoding and playback
+    audioContext() {
+        if (!this._ctx || this._ctx.state === 'closed') this._ctx = new AudioContext();
+        return this._ctx;
+    },
     
     // Inject TTS audio into the call
-    async speak(audioUrl) {
-        const ctx = new AudioContext();
+    async speak(audioUrl, waitForEnd = true) {
         const resp = await fetch(audioUrl);
-        const buf = await resp.arrayBuffer();
+        const playback = await this.playBytes(await resp.arrayBuffer());
+        return waitForEnd ? playback.ended : playback.duration;
+    },
+    
+    // Decode encoded audio (mp3/wav/...) and play it now on the persistent
+    // outgoing track, replacing whatever was playing (no track swap).
+    // Resolves once playback has started; `ended` resolves when it finishes.
+    async playBytes(buf, id = null) {
+        const ctx = this.audioContext();
         const audioBuf = await ctx.decodeAudioData(buf);
+        await this.attachOutput();
+        if (this.playback.size) this.stopPlayback(null, 10);
         
         const src = ctx.createBufferSource();
         src.buffer = audioBuf;
-        const dest = ctx.createMediaStreamDestination();
-        src.connect(dest);
+        const gain = ctx.createGain();
+        src.connect(gain);
+        gain.connect(this.outputDest);
+        const startAt = Math.max(ctx.currentTime, this.queueEnd);
+        src.start(startAt);
+        this.queueEnd = startAt + audioBuf.duration;
         
-        const [track] = dest.stream.getAudioTracks();
-        const jitsiTracks = await JitsiMeetJS.createLocalTracksFromMediaStreams([{
-            stream: dest.stream, mediaType: 'audio', track
-        }]);
-        
-        // Remove old audio tracks
-        const oldTracks = APP.conference._room?.getLocalTracks?.() || [];
-        for (const t of oldTracks) {
+        const ended = new Promise(r => src.addEventListener('ended', () => {
+            gain.disconnect();
+            r(audioBuf.duration);
+        }));
+        if (id !== null) this.trackPlayback(id, src, gain, startAt, audioBuf.duration);
+        return { duration: audioBuf.duration, ended };
+    },
+    
+    // Clip transfer: Python sends bounded base64 chunks with their offsets,
+    // so chunks may arrive in any order and nothing is inlined into JS source
+    beginClip(id, totalBytes) {
+        this.clips.set(id, new Uint8Array(totalBytes));
+        return id;
+    },
+    
+    async pushChunk(id, offset, b64) {
+        // Native base64 decode, no per-character atob/charCodeAt loop
+        const resp = await fetch('data:application/octet-stream;base64,' + b64);
+        const chunk = new Uint8Array(await resp.arrayBuffer());
+        this.clips.get(id).set(chunk, offset);
+        return chunk.length;
+    },
+    
+    async playClip(id, waitForEnd = false) {
+        const bytes = this.clips.get(id);
+        this.clips.delete(id);
+        if (!bytes) throw new Error('Unknown clip ' + id);
+        const playback = await this.playBytes(bytes.buffer, id);
+        return waitForEnd ? playback.ended : playback.duration;
+    },
+    
+    dropClip(id) {
+        this.clips.delete(id);
+    },
+    
+    // One outgoing track for the whole call, created at join: every
+    // utterance is a buffer source feeding it, scheduled back-to-back on
+    // one AudioContext timeline (gapless queue)
+    outputDest: null,
+    outputTrack: null,
+    trackSwaps: 0,
+    queueEnd: 0,
+    _queueTail: Promise.resolve(),
+    _attaching: null,
+    
+    attachOutput() {
+        // Cheap when already attached; concurrent callers share one attach
+        const localTracks = APP.conference._room?.getLocalTracks?.() || [];
+        if (this.outputTrack && !this.outputTrack.disposed && localTracks.includes(this.outputTrack)) {
+            return Promise.resolve();
+        }
+        if (!this._attaching) {
+            this._attaching = this._attachOutput().finally(() => { this._attaching = null; });
+        }
+        return this._attaching;
+    },
+    
+    async _attachOutput() {
+        const ctx = this.audioContext();
+        if (!this.outputTrack || this.outputTrack.disposed) {
+            this.outputDest = ctx.createMediaStreamDestination();
+            const [track] = this.outputDest.stream.getAudioTracks();
+            [this.outputTrack] = await JitsiMeetJS.createLocalTracksFromMediaStreams([{
+                stream: this.outputDest.stream, mediaType: 'audio', track
+            }]);
+        }
+        const localTracks = APP.conference._room?.getLocalTracks?.() || [];
+        if (localTracks.includes(this.outputTrack)) return;
+        for (const t of localTracks) {
             if (t.getType() === 'audio') await t.dispose();
         }
-        
-        await APP.conference._room.addTrack(jitsiTracks[0]);
-        src.start();
-        
-        return new Promise(r => { src.onended = r; });
+        await APP.conference._room.addTrack(this.outputTrack);
+        this.trackSwaps++;
+    },
+    
+    // Browser-side footprint, to check it stays flat over a long call
+    resources() {
+        const localTracks = APP.conference._room?.getLocalTracks?.() || [];
+        return {
+            contextState: this._ctx?.state || null,
+            trackSwaps: this.trackSwaps,
+            localAudioTracks: localTracks.filter(t => t.getType() === 'audio').length,
+            playing: this.playback.size,
+            pendingClips: this.clips.size
+        };
+    },
+    
+    enqueueClip(id) {
+        const bytes = this.clips.get(id);
+        this.clips.delete(id);
+        if (!bytes) return Promise.reject(new Error('Unknown clip ' + id));
+    
+        // Decode right away, but schedule strictly in arrival order
+        const ctx = this.audioContext();
+        const timings = { decodeMs: 0, attachMs: 0 };
+        const t0 = performance.now();
+        const decoded = ctx.decodeAudioData(bytes.buffer).then(buf => {
+            timings.decodeMs = performance.now() - t0;
+            return buf;
+        });
+        const generation = this.stopGeneration;
+        const scheduled = this._queueTail.then(async () => {
+            const audioBuf = await decoded;
+            if (generation !== this.stopGeneration) {
+                // stopPlayback() ran while this clip was still decoding
+                this.emitPlayback(id, 'end', { reason: 'stopped', position: 0, duration: audioBuf.duration });
+                return { startsIn: null, duration: audioBuf.duration, cancelled: true };
+            }
+            const t1 = performance.now();
+            await this.attachOutput();
+            timings.attachMs = performance.now() - t1;
+            const src = ctx.createBufferSource();
+            src.buffer = audioBuf;
+            const gain = ctx.createGain();
+            src.connect(gain);
+            gain.connect(this.outputDest);
+            const startAt = Math.max(ctx.currentTime + 0.02, this.queueEnd);
+            src.start(startAt);
+            this.queueEnd = startAt + audioBuf.duration;
+            this.trackPlayback(id, src, gain, startAt, audioBuf.duration);
+            return {
+                startsIn: startAt - ctx.currentTime,
+                duration: audioBuf.duration,
+                queuedUntil: this.queueEnd - ctx.currentTime,
+                ...timings
+            };
+        });
+        this._queueTail = scheduled.catch(() => {});
+        return scheduled;
+    },
+    
+    // Playback handles: start / progress / end events go to Python through
+    // a Runtime.addBinding callback; Python can stop or fade any clip
+    playback: new Map(),
+    playbackBinding: null,
+    stopGeneration: 0,
+    _progressTimer: null,
+    
+    watchPlayback(binding) {
+        this.playbackBinding = binding;
+        return this.playback.size;
+    },
+    
+    emitPlayback(id, event, detail = {}) {
+        const fn = this.playbackBinding && window[this.playbackBinding];
+        if (typeof fn !== 'function') return;
+        fn(JSON.stringify({ id, event, t: performance.timeOrigin + performance.now(), ...detail }));
+    },
+    
+    trackPlayback(id, src, gain, startAt, duration) {
+        const ctx = this.audioContext();
+        const entry = { src, gain, startAt, duration, started: false, stopped: false };
+        this.playback.set(id, entry);
+        setTimeout(() => {
+            if (entry.stopped || !this.playback.has(id)) return;
+            entry.started = true;
+            this.emitPlayback(id, 'start', { duration });
+        }, Math.max(0, (startAt - ctx.currentTime) * 1000));
+        src.addEventListener('ended', () => {
+            gain.disconnect();
+            this.playback.delete(id);
+            this.emitPlayback(id, 'end', {
+                reason: entry.stopped ? 'stopped' : 'finished',
+                position: Math.max(0, Math.min(duration, ctx.currentTime - startAt)),
+                duration
+            });
+            if (!this.playback.size) {
+                clearInterval(this._progressTimer);
+                this._progressTimer = null;
+            }
+        });
+        if (!this._progressTimer) {
+            this._progressTimer = setInterval(() => {
+                for (const [clipId, e] of this.playback) {
+                    if (e.started) this.emitPlayback(clipId, 'progress', {
+                        position: ctx.currentTime - e.startAt, duration: e.duration
+                    });
+                }
+            }, 250);
+        }
+    },
+    
+    // Fade out and stop one clip, or everything playing and queued (id null)
+    stopPlayback(id = null, fadeMs = 30) {
+        const ctx = this.audioContext();
+        const now = ctx.currentTime;
+        const silentAt = now + fadeMs / 1000;
+        let stopped = 0;
+        for (const [clipId, e] of this.playback) {
+            if (id !== null && clipId !== id) continue;
+            e.stopped = true;
+            e.gain.gain.setValueAtTime(e.gain.gain.value, now);
+            e.gain.gain.linearRampToValueAtTime(0, silentAt);
+            e.src.stop(Math.max(silentAt, e.startAt));
+            stopped++;
+        }
+        if (id === null) {
+            this.stopGeneration++;
+            this.queueEnd = silentAt;
+        }
+        return { stopped, silentAt: performance.timeOrigin + performance.now() + fadeMs };
+    },
+    
+    fadePlayback(id, level, ms = 200) {
+        const e = this.playback.get(id);
+        if (!e) return false;
+        const now = this.audioContext().currentTime;
+        e.gain.gain.setValueAtTime(e.gain.gain.value, now);
+        e.gain.gain.linearRampToValueAtTime(level, now + ms / 1000);
+        return true;
+    },
+    
+    // Continuous capture: remote audio -> PCM16 frames pushed to Python
+    // through a Runtime.addBinding callback. Always on, no capture windows.
+    pcmStream: null,
+    
+    async startPcmStream(opts = {}) {
+        if (this.pcmStream) return { running: true };
+        const binding = opts.binding || '__victoriaPcm';
+        const ctx = new AudioContext({ sampleRate: opts.sampleRate || 16000 });
+        const frameSamples = Math.round(ctx.sampleRate * (opts.frameMs || 20) / 1000);
+    
+        const workletSrc = `
+            registerProcessor('victoria-pcm', class extends AudioWorkletProcessor {
+                process(inputs) {
+                    const ch = inputs[0][0];
+                    if (ch) this.port.postMessage(ch.slice(0));
+                    return true;
+                }
+            });`;
+        const url = URL.createObjectURL(new Blob([workletSrc], { type: 'application/javascript' }));
+        await ctx.audioWorklet.addModule(url);
+        const node = new AudioWorkletNode(ctx, 'victoria-pcm');
+        const mix = ctx.createGain();
+        mix.connect(node);
+        // Keep the graph pulling without making any sound locally
+        const mute = ctx.createGain();
+        mute.gain.value = 0;
+        node.connect(mute);
+        mute.connect(ctx.destination);
+    
+        const stream = {
+            ctx, node, binding, frameSamples, seq: 0, fill: 0,
+            pending: new Float32Array(frameSamples),
+            sources: new Map()
+        };
+        const room = APP.conference._room;
+        stream.onTrackAdded = track => {
+            if (track.getType() !== 'audio' || track.isLocal() || stream.sources.has(track)) return;
+            if (opts.participant) {
+                const who = room.getParticipantById(track.getParticipantId());
+                if (who?.getDisplayName() !== opts.participant) return;
+            }
+            const src = ctx.createMediaStreamSource(new MediaStream([track.track]));
+            src.connect(mix);
+            stream.sources.set(track, src);
+        };
+        stream.onTrackRemoved = track => {
+            stream.sources.get(track)?.disconnect();
+            stream.sources.delete(track);
+        };
+        room.getParticipants().forEach(p => p.getTracks().forEach(stream.onTrackAdded));
+        room.on(JitsiMeetJS.events.conference.TRACK_ADDED, stream.onTrackAdded);
+        room.on(JitsiMeetJS.events.conference.TRACK_REMOVED, stream.onTrackRemoved);
+    
+        node.port.onmessage = e => {
+            const block = e.data;
+            let i = 0;
+            while (i < block.length) {
+                const n = Math.min(block.length - i, frameSamples - stream.fill);
+                stream.pending.set(block.subarray(i, i + n), stream.fill);
+                stream.fill += n;
+                i += n;
+                if (stream.fill === frameSamples) {
+                    this.emitPcmFrame(stream);
+                    stream.fill = 0;
+                }
+            }
+        };
+    
+        this.pcmStream = stream;
+        return { sampleRate: ctx.sampleRate, frameSamples, tracks: stream.sources.size };
+    },
+    
+    emitPcmFrame(stream) {
+        const pcm = new Int16Array(stream.frameSamples);
+        for (let i = 0; i < pcm.length; i++) {
+            const s = Math.max(-1, Math.min(1, stream.pending[i]));
+            pcm[i] = s < 0 ? s * 0x8000 : s * 0x7fff;
+        }
+        const durationMs = 1000 * stream.frameSamples / stream.ctx.sampleRate;
+        window[stream.binding](JSON.stringify({
+            seq: stream.seq++,
+            t: performance.timeOrigin + performance.now() - durationMs,
+            sr: stream.ctx.sampleRate,
+            pcm: btoa(String.fromCharCode.apply(null, new Uint8Array(pcm.buffer)))
+        }));
+    },
+    
+    async stopPcmStream() {
+        const stream = this.pcmStream;
+        if (!stream) return false;
+        this.pcmStream = null;
+        const room = APP.conference._room;
+        room.off(JitsiMeetJS.events.conference.TRACK_ADDED, stream.onTrackAdded);
+        room.off(JitsiMeetJS.events.conference.TRACK_REMOVED, stream.onTrackRemoved);
+        stream.node.port.onmessage = null;
+        await stream.ctx.close();
+        return true;
     },
     
     // Capture remote audio
@@ -179,11 +482,59 @@ window.victoriaAgent = {
         });
     },
     
-    // Send chat message
-    chat(msg) {
-        APP.conference._room.sendTextMessage(msg);
+    // Incoming chat: room messages (public and private) pushed to Python
+    // through a Runtime.addBinding callback, as text turns (no ASR)
+    chatBinding: null,
+    _chatListeners: null,
+    
+    watchChat(binding) {
+        this.chatBinding = binding;
+        if (this._chatListeners) return true;
+        const room = APP.conference._room;
+        const events = JitsiMeetJS.events.conference;
+        const emit = (from, text, ts, isPrivate) => {
+            const fn = this.chatBinding && window[this.chatBinding];
+            if (typeof fn !== 'function' || from === room.myUserId()) return;
+            fn(JSON.stringify({
+                from, text, private: isPrivate,
+                name: room.getParticipantById(from)?.getDisplayName() || null,
+                // A timestamp means history replayed on join, not a new message
+                delayed: !!ts,
+                t: performance.timeOrigin + performance.now()
+            }));
+        };
+        this._chatListeners = [
+            [events.MESSAGE_RECEIVED, (id, text, ts) => emit(id, text, ts, false)],
+            [events.PRIVATE_MESSAGE_RECEIVED, (id, text, ts) => emit(id, text, ts, true)]
+        ];
+        this._chatListeners.forEach(([event, fn]) => room.on(event, fn));
+        return true;
+    },
+    
+    unwatchChat() {
+        if (!this._chatListeners) return false;
+        const room = APP.conference._room;
+        this._chatListeners.forEach(([event, fn]) => room.off(event, fn));
+        this._chatListeners = null;
+        this.chatBinding = null;
+        return true;
+    },
+    
+    // Send chat message (privately if `to` is a participant id)
+    chat(msg, to = null) {
+        const room = APP.conference._room;
+        if (to) room.sendPrivateTextMessage(to, msg);
+        else room.sendTextMessage(msg);
+        return true;
     }
 };
+// Set up the outgoing track as soon as we are in the conference
+if (APP.conference._room?.isJoined?.()) {
+    window.victoriaAgent.attachOutput().catch(e => console.warn('VictorIA output:', e));
+} else {
+    APP.conference._room?.on(JitsiMeetJS.events.conference.CONFERENCE_JOINED,
+        () => window.victoriaAgent.attachOutput().catch(e => console.warn('VictorIA output:', e)));
+}
 console.log('🌟 VictorIA Agent loaded!');
 '''
 
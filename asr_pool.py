@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Whisper Inference Worker Pool
+=============================
+
+Whisper inference is ~3s of CPU per utterance. Running it inline in an
+async method freezes the whole event loop (CDP traffic, playback,
+capture) for that long. ASRService runs it in a pool of worker
+processes instead:
+
+- Each worker loads the model once (in its initializer) and runs one
+  throwaway inference, so the first real utterance doesn't pay for
+  CTranslate2's first-call allocations
+- `cpu_threads` is split across workers so they don't oversubscribe
+- Async submit/await API with a bounded job queue (backpressure)
+- Per-job timing: queue wait, decode, inference, total (also traced)
+
+Usage:
+    asr = get_asr_service()
+    await asr.start()
+    result = await asr.transcribe(utterance, language='ca')    # None: detect
+    result.text, result.timings
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from tracing import get_tracer
+
+DEFAULT_OPTIONS = dict(
+    vad_filter=True,
+    vad_parameters=dict(min_silence_duration_ms=500),
+)
+
+
+class ASRQueueFull(Exception):
+    """The job queue is at capacity and the caller asked not to wait."""
+
+
+@dataclass
+class ASRResult:
+    text: str
+    language: str
+    language_probability: float
+    audio_seconds: float
+    segments: List[dict] = field(default_factory=list)
+    timings: dict = field(default_factory=dict)     # queued, decode, inference, total (seconds)
+    worker: Optional[int] = None                     # worker pid
+    model: Optional[str] = None                      # model size that produced it
+    # Top detected languages with probabilities (only when language=None)
+    language_probs: Dict[str, float] = field(default_factory=dict)
+
+
+# -- worker process side ----------------------------------------------
+
+_model = None
+
+
+def _init_worker(model_size, device, compute_type, cpu_threads, warm_run=True):
+    global _model
+    from faster_whisper import WhisperModel
+    _model = WhisperModel(model_size, device=device, compute_type=compute_type,
+                          cpu_threads=cpu_threads)
+    if warm_run:
+        import numpy as np
+        # One second of faint noise; segments are lazy, so drain them
+        noise = np.random.default_rng(0).normal(0, 1e-3, 16000).astype(np.float32)
+        segments, _ = _model.transcribe(noise, language='ca', beam_size=1)
+        list(segments)
+
+
+def _run_job(audio, language, options, submitted_at):
+    from audio_decode import to_whisper_input
+
+    started = time.time()
+    samples = to_whisper_input(audio)
+    decoded = time.time()
+    segments, info = _model.transcribe(samples, language=language, **options)
+    segments = [
+        dict(start=s.start, end=s.end, text=s.text.strip(),
+             avg_logprob=s.avg_logprob, no_speech_prob=s.no_speech_prob,
+             words=[dict(start=w.start, end=w.end, word=w.word, probability=w.probability)
+                    for w in (s.words or [])])
+        for s in segments
+    ]
+    finished = time.time()
+    return dict(
+        text=" ".join(s['text'] for s in segments),
+        language=info.language,
+        language_probability=info.language_probability,
+        language_probs=dict((getattr(info, 'all_language_probs', None) or [])[:5]) if language is None else {},
+        audio_seconds=len(samples) / 16000,
+        segments=segments,
+        queued=started - submitted_at,
+        decode=decoded - started,
+        inference=finished - decoded,
+        worker=os.getpid(),
+    )
+
+
+def _ping():
+    return os.getpid()
+
+
+# -- event loop side --------------------------------------------------
+
+class ASRService:
+    """Async front-end to a pool of Whisper worker processes."""
+
+    def __init__(self, model_size: str = "base", workers: int = None,
+                 cpu_threads: int = None, device: str = "cpu",
+                 compute_type: str = "int8", max_queue: int = 8, warm_run: bool = True):
+        cores = os.cpu_count() or 1
+        self.model_size = model_size
+        self.workers = workers or max(1, cores // 4)
+        # Split the cores between workers; CTranslate2 defaults to all of them
+        self.cpu_threads = cpu_threads or max(1, cores // self.workers)
+        self.device = device
+        self.compute_type = compute_type
+        self.max_queue = max_queue
+        self.warm_run = warm_run
+
+        self._pool = None
+        self._slots = None
+        self._warming = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self._inference_total = 0.0
+        self._queued_total = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet picked up by a worker."""
+        return max(0, self.in_flight - self.workers)
+
+    async def start(self, warm: bool = True):
+        """
+        Spawn workers and (optionally) wait until every model is loaded
+        and warm. Safe to call concurrently: later callers wait for the
+        first one's warm-up.
+        """
+        if self._pool is None:
+            self._slots = asyncio.Semaphore(self.workers + self.max_queue)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_size, self.device, self.compute_type, self.cpu_threads,
+                          self.warm_run),
+            )
+        if warm:
+            if self._warming is None:
+                self._warming = asyncio.ensure_future(self._warm())
+            await asyncio.shield(self._warming)
+
+    async def _warm(self):
+        # Workers start lazily; one job each forces every initializer to run
+        loop = asyncio.get_running_loop()
+        with get_tracer().span('asr_warm', model=self.model_size, workers=self.workers):
+            await asyncio.gather(*(loop.run_in_executor(self._pool, _ping)
+                                   for _ in range(self.workers)))
+
+    async def transcribe(self, audio, language: Optional[str] = 'ca', wait: bool = True,
+                         **options) -> ASRResult:
+        """
+        Transcribe audio (anything audio_decode.to_whisper_input accepts).
+
+        With wait=False, raises ASRQueueFull instead of waiting for a slot.
+        """
+        if self._pool is None:
+            await self.start(warm=False)
+        if not wait and self._slots.locked():
+            raise ASRQueueFull(f"{self.in_flight} jobs in flight")
+
+        submitted = time.time()
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                job = await loop.run_in_executor(
+                    self._pool, _run_job, audio, language,
+                    {**DEFAULT_OPTIONS, **options}, submitted)
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+        self.completed += 1
+        self._inference_total += job['inference']
+        self._queued_total += job['queued']
+        tracer = get_tracer()
+        tracer.record('asr_queue', job['queued'], ago=job['inference'] + job['decode'])
+        tracer.record('decode', job['decode'], ago=job['inference'])
+        tracer.record('asr', job['inference'], model=self.model_size,
+                      audio_seconds=job['audio_seconds'])
+        return ASRResult(
+            text=job['text'],
+            language=job['language'],
+            language_probability=job['language_probability'],
+            audio_seconds=job['audio_seconds'],
+            segments=job['segments'],
+            timings=dict(queued=job['queued'], decode=job['decode'],
+                         inference=job['inference'], total=time.time() - submitted),
+            worker=job['worker'],
+            model=self.model_size,
+            language_probs=job['language_probs'],
+        )
+
+    def stats(self) -> dict:
+        done = self.completed or 1
+        return {
+            'workers': self.workers,
+            'cpu_threads': self.cpu_threads,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_inference': self._inference_total / done,
+            'avg_queued': self._queued_total / done,
+        }
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._warming = None
+
+
+_service = None
+
+
+def get_asr_service(**kwargs):
+    """
+    Process-wide ASR service (kwargs only apply on first call).
+
+    VICTORIA_ASR_TIERS (default "base") lists the model sizes kept
+    resident; more than one (e.g. "tiny,base,small") opts into an
+    asr_tiers.TieredASR.
+    """
+    global _service
+    if _service is None:
+        tiers = [t for t in os.environ.get('VICTORIA_ASR_TIERS', 'base').split(',') if t]
+        if len(tiers) > 1:
+            from asr_tiers import TieredASR
+            _service = TieredASR(tiers, **kwargs)
+        else:
+            _service = ASRService(tiers[0] if tiers else 'base', **kwargs)
+    return _service
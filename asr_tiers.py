@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Adaptive Whisper Model Tiers
+============================
+
+One model size can't be right for every turn: base is ~95% accurate on
+our calls but its latency grows with the queue, tiny keeps up under load
+but mangles Catalan, small is best but slowest. TieredASR keeps several
+sizes resident (one ASRService worker pool each) and picks per utterance:
+
+- Predicted latency per tier = queue wait (jobs ahead of us) + overhead
+  + real-time factor * utterance length. Overhead and RTF start from
+  rough CPU int8 figures and are learned from every result
+- Route: the most accurate tier predicted to finish within the turn's
+  latency budget; if none fits, fall back to the fastest prediction
+- Escalate: a low-confidence transcript (average log-prob, see
+  language.confidence) is redone on the next tier up while the rest of
+  the budget still allows it
+- Every decision is traced as `asr_route` (tier, reason, predicted vs
+  actual latency, queue, log-prob) and counted per tier in stats(), so
+  the latency/accuracy trade-off shows on the dashboard
+
+Drop-in for ASRService (start/transcribe/stats/close); `budget=` per call
+overrides the default, `tier=` forces a model (no escalation), which is
+how a StreamingTranscriber keeps every pass of an utterance on one tier.
+
+Opt-in: get_asr_service() only builds one when VICTORIA_ASR_TIERS lists
+more than one size.
+
+Usage:
+    asr = TieredASR(('tiny', 'base', 'small'), budget=1.5)
+    await asr.start()
+    result = await asr.transcribe(utterance, language='ca')
+    result.model, asr.stats()['tiers']['base']
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from asr_pool import ASRService
+from audio_buffer import AudioBuffer
+from audio_decode import WHISPER_SAMPLE_RATE
+from language import MIN_AVG_LOGPROB, confidence
+from tracing import get_tracer
+
+TIERS = ('tiny', 'base', 'small')
+
+# Seconds of ASR per turn before the response is late
+DEFAULT_BUDGET = 1.5
+
+# Starting estimates (CPU, int8): fixed overhead and inference seconds per audio second
+DEFAULT_OVERHEAD = {'tiny': 0.05, 'base': 0.1, 'small': 0.2}
+DEFAULT_RTF = {'tiny': 0.1, 'base': 0.25, 'small': 0.7}
+
+# Assumed length when the audio's duration isn't known up front (paths, mp3)
+TYPICAL_SECONDS = 3.0
+
+# Decisions kept for stats()
+MAX_DECISIONS = 256
+
+
+def audio_seconds(audio) -> Optional[float]:
+    """Length of `audio` if it can be had without decoding, else None."""
+    if isinstance(audio, np.ndarray):
+        return len(audio) / WHISPER_SAMPLE_RATE
+    if isinstance(audio, AudioBuffer):
+        return audio.duration if audio.format == 'pcm16' else None
+    duration = getattr(audio, 'duration', None)     # vad.Utterance
+    return duration if isinstance(duration, (int, float)) else None
+
+
+@dataclass
+class RouteDecision:
+    tier: str
+    reason: str                 # budget | fallback | forced | escalate
+    budget: float
+    predicted: float
+    audio_seconds: float
+    queued: int                 # jobs ahead on this tier
+    latency: Optional[float] = None
+    avg_logprob: Optional[float] = None
+
+
+class TieredASR:
+    """Several resident Whisper sizes; each utterance goes to the best one the budget allows."""
+
+    def __init__(self, tiers: Iterable[str] = TIERS, budget: float = DEFAULT_BUDGET,
+                 workers: Optional[int] = None, cpu_threads: Optional[int] = None,
+                 device: str = "cpu", compute_type: str = "int8", max_queue: int = 8,
+                 warm_run: bool = True, escalate: bool = True,
+                 min_avg_logprob: float = MIN_AVG_LOGPROB, smoothing: float = 0.2,
+                 services: Optional[Dict[str, object]] = None):
+        self.tiers = tuple(tiers)                   # fastest first
+        self.budget = budget
+        self.escalate = escalate
+        self.min_avg_logprob = min_avg_logprob
+        self.smoothing = smoothing
+        if services is None:
+            cores = os.cpu_count() or 1
+            workers = workers or max(1, cores // 4 // len(self.tiers))
+            # Every tier's workers stay resident, so they share the cores
+            cpu_threads = cpu_threads or max(1, cores // (workers * len(self.tiers)))
+            services = {tier: ASRService(tier, workers, cpu_threads, device, compute_type,
+                                         max_queue, warm_run)
+                        for tier in self.tiers}
+        self.services = services
+        self.model_size = '+'.join(self.tiers)
+
+        self.overhead = {t: DEFAULT_OVERHEAD.get(t, 0.1) for t in self.tiers}
+        self.rtf = {t: DEFAULT_RTF.get(t, 0.5) for t in self.tiers}
+        self.in_flight = {t: 0 for t in self.tiers}
+        self.decisions = deque(maxlen=MAX_DECISIONS)
+        self.counts = {t: {'routed': 0, 'fallbacks': 0, 'escalated_to': 0, 'over_budget': 0,
+                           'latency': 0.0, 'logprob': 0.0, 'scored': 0}
+                       for t in self.tiers}
+
+    @property
+    def workers(self) -> int:
+        return sum(service.workers for service in self.services.values())
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(getattr(service, 'queue_depth', 0) for service in self.services.values())
+
+    async def start(self, warm: bool = True):
+        """Start every tier's workers (models load in parallel, one process each)."""
+        await asyncio.gather(*(service.start(warm) for service in self.services.values()))
+
+    # -- routing ----------------------------------------------------------
+
+    def predict(self, tier: str, seconds: float) -> float:
+        """Expected seconds until `tier` returns a transcript of `seconds` of audio."""
+        job = self.overhead[tier] + self.rtf[tier] * seconds
+        workers = self.services[tier].workers
+        ahead = max(0, self.in_flight[tier] - workers + 1)
+        return job + ahead * job / workers
+
+    def route(self, seconds: float, budget: float) -> RouteDecision:
+        predictions = {tier: self.predict(tier, seconds) for tier in self.tiers}
+        for tier in reversed(self.tiers):
+            if predictions[tier] <= budget:
+                return self._decision(tier, 'budget', budget, predictions[tier], seconds)
+        tier = min(self.tiers, key=predictions.get)
+        return self._decision(tier, 'fallback', budget, predictions[tier], seconds)
+
+    def _decision(self, tier, reason, budget, predicted, seconds) -> RouteDecision:
+        workers = self.services[tier].workers
+        return RouteDecision(tier, reason, budget, predicted, seconds,
+                             queued=max(0, self.in_flight[tier] - workers + 1))
+
+    def _low_confidence(self, result) -> bool:
+        scores = confidence(result)
+        return scores is not None and scores[0] < self.min_avg_logprob
+
+    # -- transcription ----------------------------------------------------
+
+    async def transcribe(self, audio, language: Optional[str] = 'ca', wait: bool = True,
+                         budget: Optional[float] = None, tier: Optional[str] = None, **options):
+        """
+        Transcribe on the tier routing picks, escalating while the
+        transcript is low-confidence and the budget allows; a forced
+        `tier` is used as is.
+
+        The result's `model` says which tier produced it.
+        """
+        started = time.time()
+        budget = self.budget if budget is None else budget
+        seconds = audio_seconds(audio) or TYPICAL_SECONDS
+        if tier is not None:
+            decision = self._decision(tier, 'forced', budget, self.predict(tier, seconds), seconds)
+        else:
+            decision = self.route(seconds, budget)
+        result = await self._run(decision, audio, language, wait, options)
+
+        while self.escalate and tier is None and self._low_confidence(result) and decision.tier != self.tiers[-1]:
+            up = self.tiers[self.tiers.index(decision.tier) + 1]
+            remaining = budget - (time.time() - started)
+            predicted = self.predict(up, result.audio_seconds)
+            if predicted > remaining:
+                break
+            decision = self._decision(up, 'escalate', remaining, predicted, result.audio_seconds)
+            result = await self._run(decision, audio, language, wait, options)
+
+        result.timings['total'] = time.time() - started
+        return result
+
+    async def _run(self, decision: RouteDecision, audio, language, wait, options):
+        tier = decision.tier
+        started = time.time()
+        self.in_flight[tier] += 1
+        try:
+            result = await self.services[tier].transcribe(audio, language=language, wait=wait, **options)
+        finally:
+            self.in_flight[tier] -= 1
+        decision.latency = time.time() - started
+        result.model = tier
+        self._learn(tier, result)
+
+        scores = confidence(result)
+        decision.avg_logprob = scores[0] if scores else None
+        counts = self.counts[tier]
+        counts['routed'] += 1
+        counts['fallbacks'] += decision.reason == 'fallback'
+        counts['escalated_to'] += decision.reason == 'escalate'
+        counts['over_budget'] += decision.latency > decision.budget
+        counts['latency'] += decision.latency
+        if scores:
+            counts['logprob'] += scores[0]
+            counts['scored'] += 1
+        self.decisions.append(decision)
+        get_tracer().record('asr_route', decision.latency, **asdict(decision))
+        return result
+
+    def _learn(self, tier: str, result):
+        """Fold the measured overhead and real-time factor into the estimates."""
+        timings, a = result.timings, self.smoothing
+        self.overhead[tier] += a * (timings.get('decode', 0.0) - self.overhead[tier])
+        if result.audio_seconds >= 0.5 and 'inference' in timings:
+            rtf = timings['inference'] / result.audio_seconds
+            self.rtf[tier] += a * (rtf - self.rtf[tier])
+
+    def stats(self) -> dict:
+        tiers = {}
+        for tier in self.tiers:
+            counts = self.counts[tier]
+            routed = counts['routed'] or 1
+            tiers[tier] = {
+                'routed': counts['routed'],
+                'fallbacks': counts['fallbacks'],
+                'escalated_to': counts['escalated_to'],
+                'over_budget': counts['over_budget'],
+                'avg_latency': counts['latency'] / routed,
+                'avg_logprob': counts['logprob'] / counts['scored'] if counts['scored'] else None,
+                'rtf': self.rtf[tier],
+                'in_flight': self.in_flight[tier],
+            }
+        return {
+            'workers': self.workers,
+            'budget': self.budget,
+            'completed': sum(c['routed'] for c in self.counts.values()),
+            'tiers': tiers,
+        }
+
+    async def close(self):
+        await asyncio.gather(*(service.close() for service in self.services.values()))
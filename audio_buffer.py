@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Audio Buffer
+============
+
+One piece of audio, held once, in whatever shape each stage wants it:
+
+- The encoded bytes (mp3/wav/webm/raw PCM16) are kept as they arrived
+  and exposed as a read-only memoryview, never copied
+- Conversions are lazy and memoized on the buffer: float32 at 16 kHz for
+  Whisper, PCM16 at 48 kHz for the browser, base64 (whole or in CDP
+  chunks), WAV for SpeechRecognition. Ask twice, convert once
+- Results are read-only (memoryviews, non-writeable arrays) so every
+  stage can share them safely
+- AudioStats counts buffers, conversions, memo hits, bytes copied and
+  live/peak bytes, globally and per turn (tracing.current_turn())
+
+The TTS cache keeps buffers in its memory tier, so a phrase spoken
+every turn is decoded for loopback and base64-encoded for CDP only once.
+
+Usage:
+    audio = AudioBuffer(mp3_bytes)              # format sniffed
+    samples = audio.float32()                  # np.float32, 16 kHz mono
+    chunks = audio.base64_chunks(64 * 1024)    # for pushChunk
+    get_audio_stats().turn(turn_id)            # {'copied_bytes', 'peak_bytes', ...}
+
+Author: VictorIA 🌟
+"""
+
+import base64
+import io
+import threading
+import wave
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from audio_decode import WHISPER_SAMPLE_RATE, decode_audio, pcm16_to_float32, resample, wav_layout
+from tracing import current_turn
+
+MIME_TYPES = {
+    'mp3': 'audio/mpeg',
+    'wav': 'audio/wav',
+    'webm': 'audio/webm',
+    'ogg': 'audio/ogg',
+}
+
+# Per-turn counters kept for this many turns if nobody pops them
+MAX_TURNS = 256
+
+
+def sniff_format(data) -> Optional[str]:
+    """Container format from the first bytes, or None if unrecognised."""
+    head = bytes(data[:12])
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'wav'
+    if head[:3] == b'ID3' or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    if head[:4] == b'\x1a\x45\xdf\xa3':
+        return 'webm'
+    if head[:4] == b'OggS':
+        return 'ogg'
+    return None
+
+
+class AudioStats:
+    """Buffers, conversions and bytes, in total and per turn."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._turns: Dict[object, dict] = OrderedDict()
+        self.totals = self._empty()
+        self.live_bytes = 0
+        self.peak_bytes = 0
+
+    @staticmethod
+    def _empty() -> dict:
+        return {'buffers': 0, 'conversions': 0, 'hits': 0,
+                'copied_bytes': 0, 'live_bytes': 0, 'peak_bytes': 0}
+
+    def _counters(self, turn):
+        counters = self._turns.get(turn)
+        if counters is None:
+            counters = self._turns[turn] = self._empty()
+            while len(self._turns) > MAX_TURNS:
+                self._turns.popitem(last=False)
+        return counters
+
+    def _add(self, turn, field: Optional[str], nbytes: int = 0, copied: bool = False):
+        with self._lock:
+            self.live_bytes += nbytes
+            self.peak_bytes = max(self.peak_bytes, self.live_bytes)
+            scopes = [self.totals] if turn is None else [self.totals, self._counters(turn)]
+            for counters in scopes:
+                if field:
+                    counters[field] += 1
+                if copied:
+                    counters['copied_bytes'] += nbytes
+                counters['live_bytes'] += nbytes
+                counters['peak_bytes'] = max(counters['peak_bytes'], counters['live_bytes'])
+
+    def buffer(self, nbytes: int, turn=None):
+        self._add(turn, 'buffers', nbytes)
+
+    def conversion(self, nbytes: int, turn=None):
+        self._add(turn, 'conversions', nbytes, copied=True)
+
+    def hold(self, nbytes: int, turn=None):
+        """Memory a buffer keeps alive without having copied it."""
+        self._add(turn, None, nbytes)
+
+    def hit(self, turn=None):
+        self._add(turn, 'hits')
+
+    def release(self, owned):
+        """Called when a buffer is garbage collected: (turn, nbytes) pairs."""
+        with self._lock:
+            for turn, nbytes in owned:
+                self.live_bytes -= nbytes
+                self.totals['live_bytes'] -= nbytes
+                counters = self._turns.get(turn)
+                if counters is not None:
+                    counters['live_bytes'] -= nbytes
+
+    def turn(self, turn_id) -> dict:
+        with self._lock:
+            return dict(self._turns.get(turn_id) or self._empty())
+
+    def pop(self, turn_id) -> dict:
+        """A turn's counters, forgetting them."""
+        with self._lock:
+            return self._turns.pop(turn_id, None) or self._empty()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.totals, 'live_bytes': self.live_bytes, 'peak_bytes': self.peak_bytes}
+
+
+_stats = AudioStats()
+
+
+def get_audio_stats() -> AudioStats:
+    return _stats
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class AudioBuffer:
+    """Encoded (or raw PCM16) audio plus memoized conversions."""
+
+    def __init__(self, data, format: Optional[str] = None, sample_rate: Optional[int] = None,
+                 channels: int = 1):
+        self.data = data
+        self.view = memoryview(data).cast('B').toreadonly()
+        self.format = format or sniff_format(self.view) or 'pcm16'
+        self.sample_rate = sample_rate
+        self.channels = channels
+        if self.format == 'wav' and sample_rate is None:
+            self.sample_rate, self.channels = wav_layout(self.view)[:2]
+        if self.format == 'pcm16' and sample_rate is None:
+            raise ValueError("Raw PCM16 audio needs a sample_rate")
+
+        self._memo: Dict[tuple, object] = {}
+        self._lock = threading.RLock()     # conversions build on each other
+        # What this buffer holds, by the turn that allocated it
+        self._owned = [(current_turn(), len(self.view))]
+        _stats.buffer(len(self.view), self._owned[0][0])
+        weakref.finalize(self, _stats.release, self._owned)
+
+    @classmethod
+    def of(cls, audio, format: Optional[str] = None, sample_rate: Optional[int] = None,
+           channels: int = 1) -> 'AudioBuffer':
+        """`audio` itself if it already is a buffer, else a buffer over it."""
+        if isinstance(audio, cls):
+            return audio
+        return cls(audio, format, sample_rate, channels)
+
+    @classmethod
+    def from_base64(cls, text: str, format: Optional[str] = None, **kwargs) -> 'AudioBuffer':
+        """From a base64 string or a data: URL (browser captures)."""
+        if text.startswith('data:'):
+            header, text = text.split(',', 1)
+            if format is None:
+                mime = header[5:].split(';')[0]
+                format = next((f for f, m in MIME_TYPES.items() if m == mime), None)
+        return cls(base64.b64decode(text), format, **kwargs)
+
+    @classmethod
+    def from_float32(cls, audio: np.ndarray, sample_rate: int = WHISPER_SAMPLE_RATE) -> 'AudioBuffer':
+        """Wrap decoded samples as PCM16; the float32 view is memoized as given."""
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+        buffer = cls(pcm, 'pcm16', sample_rate)
+        buffer._memo[('float32', sample_rate)] = _readonly(audio.view())
+        buffer._own(audio.nbytes, copied=False)
+        return buffer
+
+    def __reduce__(self):
+        # Across processes (ASR workers) only the encoded bytes travel
+        data = self.data if isinstance(self.data, bytes) else self.view.tobytes()
+        return type(self), (data, self.format, self.sample_rate, self.channels)
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def __repr__(self) -> str:
+        return (f"AudioBuffer({self.format}, {len(self)} bytes, "
+                f"{self.sample_rate or '?'} Hz, {len(self._memo)} memoized)")
+
+    @property
+    def mime_type(self) -> str:
+        return MIME_TYPES.get(self.format, 'application/octet-stream')
+
+    @property
+    def nbytes(self) -> int:
+        """Encoded bytes plus every memoized conversion."""
+        return sum(nbytes for _, nbytes in self._owned)
+
+    @property
+    def duration(self) -> float:
+        if self.format == 'pcm16':
+            return len(self) / 2 / self.channels / self.sample_rate
+        return len(self.float32()) / WHISPER_SAMPLE_RATE
+
+    # -- memoization ------------------------------------------------------
+
+    def _own(self, nbytes: int, copied: bool = True):
+        turn = current_turn()
+        self._owned.append((turn, nbytes))
+        if copied:
+            _stats.conversion(nbytes, turn)
+        else:
+            _stats.hold(nbytes, turn)
+
+    def _memoized(self, key: tuple, convert, size):
+        value = self._memo.get(key)
+        if value is not None:
+            _stats.hit(current_turn())
+            return value
+        with self._lock:
+            value = self._memo.get(key)
+            if value is None:
+                value = convert()
+                self._own(size(value))
+                self._memo[key] = value
+                return value
+        _stats.hit(current_turn())
+        return value
+
+    # -- conversions ------------------------------------------------------
+
+    def float32(self, sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+        """Mono float32 in [-1, 1) at `sample_rate` (read-only)."""
+        def convert():
+            if self.format == 'pcm16':
+                audio = pcm16_to_float32(self.view, self.channels)
+                return _readonly(resample(audio, self.sample_rate, sample_rate))
+            return _readonly(decode_audio(self.view, sample_rate))
+        return self._memoized(('float32', sample_rate), convert, lambda a: a.nbytes)
+
+    def pcm16(self, sample_rate: int = 48000) -> memoryview:
+        """Mono little-endian PCM16 at `sample_rate` (e.g. for a browser AudioBuffer)."""
+        if self.format == 'pcm16' and self.sample_rate == sample_rate and self.channels == 1:
+            return self.view
+
+        def convert():
+            pcm = (np.clip(self.float32(sample_rate), -1.0, 1.0) * 32767).astype('<i2')
+            return memoryview(pcm).cast('B').toreadonly()
+        return self._memoized(('pcm16', sample_rate), convert, len)
+
+    def wav(self, sample_rate: int = WHISPER_SAMPLE_RATE) -> memoryview:
+        """16-bit mono WAV (for APIs that want a file, e.g. SpeechRecognition)."""
+        if self.format == 'wav' and self.sample_rate == sample_rate and self.channels == 1:
+            return self.view
+
+        def convert():
+            buf = io.BytesIO()
+            with wave.open(buf, 'wb') as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(sample_rate)
+                w.writeframes(self.pcm16(sample_rate))
+            return buf.getbuffer().toreadonly()
+        return self._memoized(('wav', sample_rate), convert, len)
+
+    def base64(self) -> str:
+        """The encoded bytes as one base64 string."""
+        return self._memoized(('base64',), lambda: base64.b64encode(self.view).decode('ascii'), len)
+
+    def base64_chunks(self, size: int) -> Tuple[Tuple[int, str], ...]:
+        """(offset, base64) per `size` bytes of the encoded audio, for chunked CDP transfer."""
+        def convert():
+            return tuple((offset, base64.b64encode(self.view[offset:offset + size]).decode('ascii'))
+                         for offset in range(0, len(self), size))
+        return self._memoized(('base64_chunks', size), convert,
+                              lambda chunks: sum(len(b64) for _, b64 in chunks))
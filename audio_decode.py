@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+In-Memory Audio Decode
+======================
+
+Turns mp3 / webm / wav / raw PCM bytes straight into the 16 kHz mono
+float32 NumPy array Whisper wants, in-process:
+
+- No temp files, no second WAV file on disk
+- No `ffmpeg` subprocess spawn per utterance
+- Raw PCM16 (capture.py / vad.py) skips decoding entirely
+
+Compressed formats are decoded with PyAV (already installed with
+faster-whisper); WAV and PCM need only NumPy.
+
+Usage:
+    audio = decode_audio(mp3_bytes)          # np.float32, 16 kHz mono
+    segments, info = model.transcribe(audio)
+
+Author: VictorIA 🌟
+"""
+
+import io
+import os
+import struct
+import wave
+
+import numpy as np
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+def pcm16_to_float32(pcm, channels: int = 1) -> np.ndarray:
+    """Little-endian int16 PCM -> float32 in [-1, 1), downmixed to mono."""
+    audio = np.frombuffer(pcm, dtype='<i2').astype(np.float32)
+    audio /= 32768.0
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return audio
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """
+    Resample mono float32 audio.
+
+    Integer downsampling ratios (48k/32k -> 16k) use a short moving-average
+    low-pass then decimation; anything else falls back to linear
+    interpolation. Plenty for speech recognition.
+    """
+    if src_rate == dst_rate or len(audio) == 0:
+        return audio
+    if src_rate % dst_rate == 0:
+        factor = src_rate // dst_rate
+        usable = len(audio) - len(audio) % factor
+        return audio[:usable].reshape(-1, factor).mean(axis=1).astype(np.float32)
+    duration = len(audio) / src_rate
+    n_out = int(round(duration * dst_rate))
+    src_t = np.arange(len(audio)) / src_rate
+    dst_t = np.arange(n_out) / dst_rate
+    return np.interp(dst_t, src_t, audio).astype(np.float32)
+
+
+def wav_layout(data):
+    """
+    (sample_rate, channels, sample_width, data_offset, data_length) of a
+    RIFF/WAVE file, read from the chunk headers without copying the samples.
+    """
+    view = memoryview(data).cast('B')
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk = bytes(view[offset:offset + 4])
+        size = int.from_bytes(view[offset + 4:offset + 8], 'little')
+        body = offset + 8
+        if chunk == b'fmt ':
+            _, channels, rate, _, _, bits = struct.unpack('<HHIIHH', view[body:body + 16])
+            fmt = (rate, channels, bits // 8)
+        elif chunk == b'data':
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # Streamed WAVs may carry a placeholder size
+            return (*fmt, body, min(size, len(view) - body))
+        offset = body + size + (size & 1)
+    raise ValueError("WAV without a data chunk")
+
+
+def _decode_wav(data, sample_rate: int) -> np.ndarray:
+    rate, channels, width, offset, length = wav_layout(data)
+    if width != 2:
+        return _decode_av(data, sample_rate)
+    length -= length % (2 * channels)
+    audio = pcm16_to_float32(memoryview(data).cast('B')[offset:offset + length], channels)
+    return resample(audio, rate, sample_rate)
+
+
+def _decode_av(data, sample_rate: int) -> np.ndarray:
+    import av
+
+    resampler = av.audio.resampler.AudioResampler(format='s16', layout='mono', rate=sample_rate)
+    chunks = []
+    with av.open(io.BytesIO(data), mode='r', metadata_errors='ignore') as container:
+        stream = container.streams.audio[0]
+        for frame in container.decode(stream):
+            for out in resampler.resample(frame):
+                chunks.append(out.to_ndarray().reshape(-1))
+        for out in resampler.resample(None):
+            chunks.append(out.to_ndarray().reshape(-1))
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+
+def decode_audio(data, sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """Decode encoded audio bytes (mp3/webm/ogg/wav/...) to float32 mono."""
+    if bytes(data[:4]) == b'RIFF' and bytes(data[8:12]) == b'WAVE':
+        return _decode_wav(data, sample_rate)
+    return _decode_av(data, sample_rate)
+
+
+def to_whisper_input(source, sample_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    """
+    Normalise anything the agent holds into Whisper's input array.
+
+    Accepts a float32 array (already 16 kHz), encoded bytes, a path,
+    a data: URL / base64 string from a browser capture, an AudioBuffer
+    (its memoized conversion is reused) or any object with `.pcm` and
+    `.sample_rate` (AudioFrame, vad.Utterance).
+    """
+    if isinstance(source, np.ndarray):
+        return source.astype(np.float32, copy=False)
+    if callable(getattr(source, 'float32', None)):
+        return source.float32(sample_rate)
+    if hasattr(source, 'pcm') and hasattr(source, 'sample_rate'):
+        return resample(pcm16_to_float32(source.pcm), source.sample_rate, sample_rate)
+    if isinstance(source, str):
+        if source.startswith('data:'):
+            import base64
+            return decode_audio(base64.b64decode(source.split(',', 1)[1]), sample_rate)
+        if os.path.exists(source):
+            with open(source, 'rb') as f:
+                return decode_audio(f.read(), sample_rate)
+        raise ValueError(f"Not a file or data URL: {source[:40]}")
+    return decode_audio(source, sample_rate)
+
+
+def float32_to_wav_bytes(audio: np.ndarray, sample_rate: int = WHISPER_SAMPLE_RATE) -> bytes:
+    """In-memory 16-bit WAV, for APIs that insist on a file (SpeechRecognition)."""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
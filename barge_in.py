@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Barge-In
+========
+
+Cuts the agent off the moment a human starts talking over it. The VAD's
+SpeechStart event (vad.py) fades out whatever the page player is
+playing and drops everything still queued.
+
+Measured per interruption, all on page clocks:
+- detection: speech onset -> VAD fired
+- latency:   speech onset -> agent output silent (target < 200 ms)
+
+Usage:
+    barge_in = BargeInController(await get_player(ws_url))
+    async for event in endpoint(capture):
+        if isinstance(event, SpeechStart):
+            await barge_in.on_speech_start(event)
+
+Author: VictorIA 🌟
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from vad import SpeechStart
+
+# Speech onset -> agent silent
+TARGET_MS = 200
+
+
+@dataclass
+class Interruption:
+    onset: float            # page epoch seconds of the human's first voiced frame
+    detected_at: float      # when the VAD fired
+    silent_at: float        # page epoch seconds when our output hit zero
+    stopped: int            # clips stopped (playing + queued)
+    rtt: float              # stop command round trip
+    requested_at: float = field(default_factory=time.time)
+
+    @property
+    def detection_ms(self) -> float:
+        return (self.detected_at - self.onset) * 1000
+
+    @property
+    def latency_ms(self) -> float:
+        return (self.silent_at - self.onset) * 1000
+
+
+class BargeInController:
+    """Stops agent playback on speech onset and records how fast it went quiet."""
+
+    def __init__(self, player, fade_ms: int = 30, target_ms: float = TARGET_MS):
+        self.player = player
+        self.fade_ms = fade_ms
+        self.target_ms = target_ms
+        self.interruptions: List[Interruption] = []
+        self.ignored = 0        # onsets while the agent wasn't talking
+
+    async def on_speech_start(self, event: SpeechStart) -> Optional[Interruption]:
+        """Stop the agent if it is playing (or about to); None otherwise."""
+        if not self.player.active:
+            self.ignored += 1
+            return None
+        result = await self.player.stop_all(self.fade_ms)
+        interruption = Interruption(
+            onset=event.timestamp,
+            detected_at=event.detected_at,
+            silent_at=result["silentAt"],
+            stopped=result["stopped"],
+            rtt=result["rtt"],
+        )
+        self.interruptions.append(interruption)
+        return interruption
+
+    def stats(self) -> dict:
+        latencies = sorted(i.latency_ms for i in self.interruptions)
+        if not latencies:
+            return {'interruptions': 0, 'ignored': self.ignored}
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            'interruptions': len(latencies),
+            'ignored': self.ignored,
+            'p50_ms': pct(0.50),
+            'p95_ms': pct(0.95),
+            'max_ms': latencies[-1],
+            'avg_detection_ms': sum(i.detection_ms for i in self.interruptions) / len(latencies),
+            'within_target': sum(l <= self.target_ms for l in latencies) / len(latencies),
+        }
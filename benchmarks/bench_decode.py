@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Audio Decode Benchmark
+======================
+
+Time to get a short clip into Whisper's 16 kHz float32 input:
+
+- ffmpeg:    the old path (temp file -> `ffmpeg -ar 16000 -ac 1` ->
+             second WAV file -> load), as in transcribe_fast before
+- in-memory: audio_decode.to_whisper_input(bytes)
+
+Clips are synthesized with PyAV: MP3 like gTTS output (24 kHz mono)
+and 48 kHz WAV like the browser's sample rate. The ffmpeg column is
+skipped when ffmpeg isn't on PATH.
+
+Usage:
+    python benchmarks/bench_decode.py --repeats 20
+
+Author: VictorIA 🌟
+"""
+
+import argparse
+import io
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from audio_decode import decode_audio, to_whisper_input
+from fakes import speechlike
+
+CLIP_SECONDS = [1, 2, 3, 5]
+
+
+def make_mp3(seconds: float, rate: int = 24000) -> bytes:
+    import av
+
+    pcm = (speechlike(seconds, rate) * 32767).astype(np.int16).reshape(1, -1)
+    buf = io.BytesIO()
+    with av.open(buf, 'w', format='mp3') as container:
+        stream = container.add_stream('mp3', rate=rate)
+        stream.layout = 'mono'
+        stream.bit_rate = 32000
+        frame = av.AudioFrame.from_ndarray(pcm, format='s16', layout='mono')
+        frame.sample_rate = rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
+
+
+def make_wav(seconds: float, rate: int = 48000) -> bytes:
+    pcm = (speechlike(seconds, rate) * 32767).astype('<i2').tobytes()
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+
+def ffmpeg_path(data: bytes, suffix: str) -> np.ndarray:
+    src = tempfile.mktemp(suffix=suffix)
+    dst = src.rsplit('.', 1)[0] + '.16k.wav'
+    with open(src, 'wb') as f:
+        f.write(data)
+    subprocess.run(['ffmpeg', '-y', '-i', src, '-ar', '16000', '-ac', '1', dst], capture_output=True)
+    with open(dst, 'rb') as f:
+        audio = decode_audio(f.read())
+    os.remove(src)
+    os.remove(dst)
+    return audio
+
+
+def median_ms(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ffmpeg vs in-memory decode')
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    have_ffmpeg = shutil.which('ffmpeg') is not None
+    print("🎧 Decode to 16 kHz float32: ffmpeg subprocess vs in-memory")
+    print("=" * 60)
+    if not have_ffmpeg:
+        print("(ffmpeg not found: showing in-memory timings only)")
+    print(f"{'clip':>10} {'bytes':>8} | {'ffmpeg ms':>9} | {'memory ms':>9} | {'speedup':>7}")
+
+    for fmt, make, suffix in (('mp3', make_mp3, '.mp3'), ('wav48k', make_wav, '.wav')):
+        for seconds in CLIP_SECONDS:
+            data = make(seconds)
+            t_mem = median_ms(lambda: to_whisper_input(data), args.repeats)
+            if have_ffmpeg:
+                t_ff = median_ms(lambda: ffmpeg_path(data, suffix), args.repeats)
+                print(f"{fmt:>6} {seconds:>2}s {len(data):>8} | {t_ff:>9.2f} | {t_mem:>9.2f} | {t_ff / t_mem:>6.1f}x")
+            else:
+                print(f"{fmt:>6} {seconds:>2}s {len(data):>8} | {'-':>9} | {t_mem:>9.2f} | {'-':>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Intent Matching Benchmark
+=========================
+
+think() with the real rules plus tens of thousands of synthetic ones:
+
+- chain:     every rule's patterns checked one after another against the
+             normalized transcript (what the if/elif chains did, with
+             word boundaries added so results are comparable)
+- automaton: intents.IntentMatcher, one Aho-Corasick pass
+
+Synthetic rules are made-up words from Catalan-ish syllables, 1-3
+patterns of 1-3 words each, random priorities; transcripts mix the demo
+phrases with words from those rules. Both methods must pick the same
+rule for every transcript.
+
+Usage:
+    python benchmarks/bench_intents.py --rules 1000 10000 50000
+
+Author: VictorIA 🌟
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fakes import PHRASES
+from intents import DEFAULT_INTENTS, IntentMatcher, normalize
+
+SYLLABLES = ['ca', 'ta', 'ma', 'la', 'ro', 'so', 'ne', 'què', 'dó', 'rç', 'gi', 'llu',
+             'ny', 'xa', 'pè', 'tu', 'vi', 'bo', 'fer', 'al']
+
+
+def word(rng) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def synthetic_rules(count: int, rng) -> list:
+    rules = []
+    for i in range(count):
+        patterns = [' '.join(word(rng) for _ in range(rng.randint(1, 3)))
+                    for _ in range(rng.randint(1, 3))]
+        rules.append({'name': f'rule{i}', 'priority': rng.randint(0, 40),
+                      'patterns': patterns, 'response': f'Resposta {i}: {{match}}'})
+    return rules
+
+
+def transcripts(rules: list, count: int, rng) -> list:
+    texts = []
+    for _ in range(count):
+        words = rng.choice(PHRASES).split()
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randint(0, len(words)), rng.choice(rng.choice(rules)['patterns']))
+        words += [word(rng) for _ in range(rng.randint(0, 6))]
+        texts.append(' '.join(words))
+    return texts
+
+
+def chain_key(pattern: str) -> str:
+    key = normalize(pattern, pattern=True)
+    return key[:-2] if key.endswith('* ') else key
+
+
+def chain_match(compiled, text):
+    """Linear scan over rules, as the if/elif chains did."""
+    norm = normalize(text)
+    best = None
+    for priority, order, name, keys in compiled:
+        for key in keys:
+            position = norm.find(key)
+            if position >= 0:
+                rank = (-priority, position, order)
+                if best is None or rank < best[0]:
+                    best = (rank, name)
+    return best[1] if best else None
+
+
+def median_us(fn, texts):
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='if/elif chain vs Aho-Corasick intent matching')
+    parser.add_argument('--rules', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    parser.add_argument('--transcripts', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    base = json.loads(Path(DEFAULT_INTENTS).read_text(encoding='utf-8'))
+    print("🧠 Intent matching: rule chain vs one automaton")
+    print("=" * 72)
+    print(f"{'rules':>7} | {'compile s':>9} | {'states':>8} | {'chain µs':>9} | "
+          f"{'automaton µs':>12} | {'speedup':>7}")
+
+    for count in args.rules:
+        rng = random.Random(args.seed)
+        data = {'default': base['default'], 'rules': base['rules'] + synthetic_rules(count, rng)}
+        texts = transcripts(data['rules'], args.transcripts, rng)
+
+        start = time.perf_counter()
+        matcher = IntentMatcher.from_dict(data)
+        compile_s = time.perf_counter() - start
+
+        compiled = [(rule.priority, rule.order, rule.name, [chain_key(p) for p in rule.patterns])
+                    for rule in matcher.rules]
+
+        def automaton(text):
+            match = matcher.match(text)
+            return match.rule.name if match else None
+
+        mismatches = sum(automaton(t) != chain_match(compiled, t) for t in texts)
+        t_chain = median_us(lambda t: chain_match(compiled, t), texts)
+        t_auto = median_us(automaton, texts)
+        print(f"{count:>7} | {compile_s:>9.2f} | {matcher.states:>8} | {t_chain:>9.1f} | "
+              f"{t_auto:>12.1f} | {t_chain / t_auto:>6.1f}x")
+        if mismatches:
+            print(f"   ❌ {mismatches} transcripts matched differently")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Offline End-to-End Loop Benchmark
+=================================
+
+Runs the real agent code (RealtimeVideoCallAgent, page player, CDP
+client, TTS cache, capture, VAD, tracing) against local fakes, so the
+hot path can be measured on any machine and checked before deploying:
+
+- fake_cdp.FakeDevTools instead of Chrome + Jitsi
+- fakes.StubTTSEngine instead of gTTS / the TTS container
+- fakes.StubASR instead of the Whisper pool
+- fakes.conversation_pcm() as the remote participant
+
+Two phases:
+- turns:  `--iterations` loopback turns (speak, hear, think, respond)
+- listen: capture -> VAD endpointing on the fixture conversation
+
+Per-stage p50/p95 come from the tracer. Results are compared against
+a stored baseline; any stage slower than `--tolerance` fails the run.
+A baseline saved with a different `--iterations` isn't compared at all
+(exit 2): fewer turns means more cold TTS renders, not a regression.
+
+Usage:
+    python benchmarks/bench_loop.py --iterations 30
+    python benchmarks/bench_loop.py --save-baseline
+    python benchmarks/bench_loop.py --cdp-latency 0.005 --tts-latency 0.2
+
+Author: VictorIA 🌟
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from contextlib import aclosing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_cdp import FakeDevTools
+from fakes import PHRASES, StubASR, StubTTSEngine, conversation_pcm
+from realtime_loop import RealtimeVideoCallAgent
+from tracing import get_tracer
+from tts_cache import TTSCache
+from tts_engines import CachedTTSEngine
+
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+# Differences below this are noise, whatever the ratio
+ABS_SLACK = 0.005
+
+UTTERANCES = (1.2, 0.8, 2.0)
+
+
+def pct(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def run(args) -> dict:
+    server = await FakeDevTools.start(latency=args.cdp_latency, playback_rate=args.playback_rate)
+    listener = server.page('listener')
+    listener.pcm_source = conversation_pcm(UTTERANCES)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        engine = CachedTTSEngine(StubTTSEngine(latency=args.tts_latency),
+                                 TTSCache(cache_dir=cache_dir))
+        agent = RealtimeVideoCallAgent(ws_url=server.page_url('speaker'), tts_engine=engine,
+                                       asr=StubASR(rtf=args.asr_rtf))
+
+        # Phase 1: loopback turns through the pipeline
+        inputs = [PHRASES[i % len(PHRASES)] for i in range(args.iterations)]
+        turn_latency, first_audio, audio = [], [], []
+        started = time.perf_counter()
+        async for result in agent.run_turns(inputs):
+            turn_latency.append(result['latency'])
+            first_audio.append(result['first_audio']['respond'])
+            audio.append(result['audio'])
+        turns_wall = time.perf_counter() - started
+
+        # Phase 2: capture + endpointing on the fixture conversation
+        endpointed = []
+        async with aclosing(agent.listen(server.page_url('listener'), barge_in=False)) as heard:
+            async for utterance in heard:
+                endpointed.append(utterance.duration)
+                if len(endpointed) == len(UTTERANCES):
+                    break
+
+    await server.close()
+
+    stages = {name: {'p50': h['p50'], 'p95': h['p95'], 'count': h['count']}
+              for name, h in get_tracer().summary().items() if h['count']}
+    stages['first_audio_respond'] = {'p50': pct(first_audio, 0.5), 'p95': pct(first_audio, 0.95),
+                                     'count': len(first_audio)}
+    return {
+        'iterations': args.iterations,
+        'turns_per_second': args.iterations / turns_wall,
+        'turn_p50': pct(turn_latency, 0.5),
+        'utterances': len(endpointed),
+        'cdp_calls': sum(p.calls for p in server.pages.values()),
+        # Cold turns convert, warm ones should only hit the memoized forms
+        'audio': {key: {'mean': sum(a[key] for a in audio) / len(audio), 'max': max(a[key] for a in audio)}
+                  for key in ('conversions', 'hits', 'copied_bytes', 'peak_bytes')},
+        'stages': stages,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Stages whose p50 or p95 regressed beyond tolerance."""
+    regressions = []
+    for name, base in baseline.get('stages', {}).items():
+        now = result['stages'].get(name)
+        if now is None:
+            continue
+        for q in ('p50', 'p95'):
+            limit = base[q] * (1 + tolerance) + ABS_SLACK
+            if now[q] > limit:
+                regressions.append((name, q, base[q], now[q]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline agent loop benchmark')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--cdp-latency', type=float, default=0.001, help='seconds per CDP reply')
+    parser.add_argument('--tts-latency', type=float, default=0.05, help='seconds per TTS render')
+    parser.add_argument('--asr-rtf', type=float, default=0.1, help='ASR seconds per audio second')
+    parser.add_argument('--playback-rate', type=float, default=50.0,
+                        help='fake page plays queued audio this much faster than real time')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    print("🧪 Offline loop benchmark (fake CDP, stub TTS/ASR, fixture audio)")
+    print("=" * 60)
+    result = asyncio.run(run(args))
+
+    print(f"   {result['iterations']} turns, {result['turns_per_second']:.2f} turns/s, "
+          f"{result['utterances']} utterances endpointed, {result['cdp_calls']} CDP calls")
+    audio = result['audio']
+    print(f"   audio per turn (mean/max): "
+          f"{audio['conversions']['mean']:.1f}/{audio['conversions']['max']} conversions, "
+          f"{audio['hits']['mean']:.1f}/{audio['hits']['max']} memo hits, "
+          f"{audio['copied_bytes']['mean'] / 1024:.0f}/{audio['copied_bytes']['max'] / 1024:.0f} KiB copied, "
+          f"{audio['peak_bytes']['mean'] / 1024:.0f}/{audio['peak_bytes']['max'] / 1024:.0f} KiB peak")
+    print(f"\n{'stage':<20} {'p50 ms':>8} {'p95 ms':>8} {'n':>5}")
+    for name, s in sorted(result['stages'].items()):
+        print(f"{name:<20} {s['p50'] * 1000:>8.1f} {s['p95'] * 1000:>8.1f} {s['count']:>5}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(result, indent=2, sort_keys=True) + '\n')
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print("\n(no baseline yet: run with --save-baseline)")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get('iterations') != result['iterations']:
+        # Fewer turns means a larger share of cold TTS renders, so the
+        # percentiles are not comparable
+        print(f"\n❌ Baseline incompatible: it ran {baseline.get('iterations')} iterations, "
+              f"this run {result['iterations']} (pass --iterations {baseline.get('iterations')} "
+              f"or --save-baseline)")
+        sys.exit(2)
+    regressions = compare(result, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) vs baseline (>{args.tolerance:.0%}):")
+        for name, q, base, now in regressions:
+            print(f"   {name} {q}: {base * 1000:.1f} ms -> {now * 1000:.1f} ms")
+        sys.exit(1)
+    print("\n✅ No regressions vs baseline")
+
+
+if __name__ == '__main__':
+    main()
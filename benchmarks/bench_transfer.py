@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Audio Transfer Benchmark
+========================
+
+Transfer time against clip duration for the two ways of getting TTS
+audio into the page:
+
+- inline:  base64 pasted into a Runtime.evaluate script, decoded with
+           an atob/charCodeAt loop (the old speak_streaming path)
+- chunked: page_player.PagePlayer.upload (bounded callFunctionOn chunks)
+
+Without --ws-url only the Python side is measured (encode + serialize,
+largest CDP message). With --ws-url the full round trip into a live
+page is timed; nothing is played.
+
+Usage:
+    python benchmarks/bench_transfer.py
+    python benchmarks/bench_transfer.py --ws-url ws://127.0.0.1:18800/devtools/page/<id>
+
+Author: VictorIA 🌟
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from page_player import CHUNK_SIZE
+
+# gTTS produces 32 kbit/s MP3
+BYTES_PER_SECOND = 32000 // 8
+
+DURATIONS = [1, 2, 5, 10, 20, 40, 60]
+
+INLINE_JS = """
+    (async () => {{
+        const b64 = '{b64}';
+        const binary = atob(b64);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+        return bytes.length;
+    }})()
+"""
+
+
+def inline_message(audio: bytes) -> str:
+    b64 = base64.b64encode(audio).decode('utf-8')
+    return json.dumps({"id": 2, "method": "Runtime.evaluate", "params": {
+        "expression": INLINE_JS.format(b64=b64),
+        "returnByValue": True,
+        "awaitPromise": True
+    }})
+
+
+def chunked_messages(audio: bytes) -> list:
+    view = memoryview(audio)
+    messages = []
+    for offset in range(0, len(audio), CHUNK_SIZE):
+        b64 = base64.b64encode(view[offset:offset + CHUNK_SIZE]).decode("ascii")
+        messages.append(json.dumps({"id": 3, "method": "Runtime.callFunctionOn", "params": {
+            "objectId": "agent",
+            "functionDeclaration": "function(...args) { return this.pushChunk(...args); }",
+            "arguments": [{"value": 1}, {"value": offset}, {"value": b64}],
+            "returnByValue": True,
+            "awaitPromise": True
+        }}))
+    return messages
+
+
+def timed(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+async def timed_async(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_offline(repeats):
+    print(f"{'clip':>6} {'bytes':>8} | {'inline ms':>9} {'max msg':>9} | {'chunked ms':>10} {'max msg':>9} {'msgs':>5}")
+    for seconds in DURATIONS:
+        audio = os.urandom(seconds * BYTES_PER_SECOND)
+        t_inline, msg = timed(lambda: inline_message(audio), repeats)
+        t_chunked, msgs = timed(lambda: chunked_messages(audio), repeats)
+        print(f"{seconds:>5}s {len(audio):>8} | {t_inline * 1000:>9.2f} {len(msg):>9} | "
+              f"{t_chunked * 1000:>10.2f} {max(len(m) for m in msgs):>9} {len(msgs):>5}")
+
+
+async def bench_live(ws_url, repeats):
+    from page_player import get_player
+
+    player = await get_player(ws_url)
+    conn = player.conn
+
+    print(f"{'clip':>6} {'bytes':>8} | {'inline ms':>9} | {'chunked ms':>10} | {'speedup':>7}")
+    for seconds in DURATIONS:
+        audio = os.urandom(seconds * BYTES_PER_SECOND)
+        b64 = base64.b64encode(audio).decode('utf-8')
+
+        async def inline():
+            await conn.evaluate(INLINE_JS.format(b64=b64), await_promise=True)
+
+        async def chunked():
+            clip_id = await player.upload(audio)
+            await player.call("dropClip", clip_id)
+
+        t_inline = await timed_async(inline, repeats)
+        t_chunked = await timed_async(chunked, repeats)
+        print(f"{seconds:>5}s {len(audio):>8} | {t_inline * 1000:>9.1f} | "
+              f"{t_chunked * 1000:>10.1f} | {t_inline / t_chunked:>6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--ws-url', help='DevTools page URL for a live round trip')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print("📦 Audio transfer: inline base64 vs chunked player")
+    print("=" * 60)
+    if args.ws_url:
+        asyncio.run(bench_live(args.ws_url, args.repeats))
+    else:
+        bench_offline(args.repeats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Fake DevTools Endpoint
+======================
+
+A local WebSocket server that answers the CDP traffic the agent sends to
+a Jitsi page, so the loop can run without Chrome, Jitsi or a network:
+
+- Runtime.enable / Runtime.evaluate / Runtime.addBinding
+- Runtime.callFunctionOn into a simulated `window.victoriaAgent`
+  (clip upload, gapless queue, playback events, stop/fade, PCM stream,
+  chat in and out)
+- A browser target (/json/version, Target.setDiscoverTargets) with
+  reload / crash / close of pages for the target registry
+
+Every reply is delayed by `latency` seconds, and "decoding" a clip in
+the page takes `decode_ms_per_s` per second of audio. Queued clips
+"play" `playback_rate` times faster than real time (1.0 = real time).
+Pages are created on first connect:
+ws://127.0.0.1:<port>/devtools/page/<any id>.
+
+Usage:
+    server = await FakeDevTools.start(latency=0.002)
+    agent = RealtimeVideoCallAgent(ws_url=server.page_url('speaker'))
+    server.page('listener').pcm_source = fixtures.conversation_pcm()
+    await server.page('speaker').receive_chat("Hola!")
+
+    python benchmarks/fake_cdp.py --port 9222    # standalone
+
+Author: VictorIA 🌟
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import re
+import time
+import wave
+from typing import Dict, Optional
+
+import websockets
+
+# gTTS-like MP3 bitrate, for clips that aren't WAV
+MP3_BYTES_PER_SECOND = 32000 // 8
+
+_METHOD = re.compile(r"this\.(\w+)\(")
+
+
+def clip_duration(data: bytes) -> float:
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        with wave.open(io.BytesIO(data)) as w:
+            return w.getnframes() / w.getframerate()
+    return len(data) / MP3_BYTES_PER_SECOND
+
+
+class FakePage:
+    """Simulated page runtime: the subset of window.victoriaAgent Python uses."""
+
+    def __init__(self, page_id: str, decode_ms_per_s: float = 4.0, attach_ms: float = 1.0,
+                 playback_rate: float = 1.0):
+        self.page_id = page_id
+        self.decode_ms_per_s = decode_ms_per_s
+        self.playback_rate = playback_rate
+        self.attach_ms = attach_ms
+        self.installed = False
+        self.bindings = set()
+        self.clips: Dict[int, bytearray] = {}
+        self.queue_end = 0.0
+        self.playback: Dict[int, dict] = {}
+        self.playback_binding: Optional[str] = None
+        self.stop_generation = 0
+        self.pcm_source: bytes = b""     # PCM16 mono 16 kHz streamed by startPcmStream
+        self._pcm_task = None
+        self.chat_binding: Optional[str] = None
+        self.chat_sent: list = []        # (text, to) sent by the agent
+        self._clients = set()
+        self.calls = 0
+        self.played_seconds = 0.0
+
+    @property
+    def info(self) -> dict:
+        return {"targetId": self.page_id, "type": "page", "title": "Jitsi Meet",
+                "url": f"https://meet.jit.si/{self.page_id}", "attached": bool(self._clients)}
+
+    # -- event plumbing ---------------------------------------------------
+
+    async def _emit(self, method: str, params: dict):
+        message = json.dumps({"method": method, "params": params})
+        for ws in list(self._clients):
+            try:
+                await ws.send(message)
+            except websockets.ConnectionClosed:
+                self._clients.discard(ws)
+
+    async def _binding(self, name: str, payload: dict):
+        if name in self.bindings:
+            await self._emit("Runtime.bindingCalled",
+                             {"name": name, "payload": json.dumps(payload), "executionContextId": 1})
+
+    async def _playback_event(self, clip_id, event, **detail):
+        if self.playback_binding:
+            await self._binding(self.playback_binding,
+                                {"id": clip_id, "event": event, "t": time.time() * 1000, **detail})
+
+    # -- simulated agent methods -------------------------------------------
+
+    def beginClip(self, clip_id, total):
+        self.clips[clip_id] = bytearray(total)
+        return clip_id
+
+    def pushChunk(self, clip_id, offset, b64):
+        chunk = base64.b64decode(b64)
+        self.clips[clip_id][offset:offset + len(chunk)] = chunk
+        return len(chunk)
+
+    def dropClip(self, clip_id):
+        self.clips.pop(clip_id, None)
+
+    async def _schedule(self, clip_id, duration):
+        loop = asyncio.get_running_loop()
+        generation = self.stop_generation
+        decode = self.decode_ms_per_s * duration / 1000
+        await asyncio.sleep(decode + self.attach_ms / 1000)
+        if generation != self.stop_generation:
+            await self._playback_event(clip_id, "end", reason="stopped", position=0, duration=duration)
+            return {"startsIn": None, "duration": duration, "cancelled": True}
+        now = loop.time()
+        start_at = max(now + 0.02, self.queue_end)
+        self.queue_end = start_at + duration / self.playback_rate
+        entry = {"start_at": start_at, "duration": duration}
+        entry["task"] = asyncio.ensure_future(self._play(clip_id, entry))
+        self.playback[clip_id] = entry
+        return {
+            "startsIn": start_at - now,
+            "duration": duration,
+            "queuedUntil": self.queue_end - now,
+            "decodeMs": decode * 1000,
+            "attachMs": self.attach_ms,
+        }
+
+    async def _play(self, clip_id, entry):
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(max(0.0, entry["start_at"] - loop.time()))
+        await self._playback_event(clip_id, "start", duration=entry["duration"])
+        await asyncio.sleep(entry["duration"] / self.playback_rate)
+        self.playback.pop(clip_id, None)
+        self.played_seconds += entry["duration"]
+        await self._playback_event(clip_id, "end", reason="finished",
+                                   position=entry["duration"], duration=entry["duration"])
+
+    async def enqueueClip(self, clip_id):
+        data = self.clips.pop(clip_id)
+        return await self._schedule(clip_id, clip_duration(bytes(data)))
+
+    async def playClip(self, clip_id, wait_for_end=False):
+        info = await self.enqueueClip(clip_id)
+        if wait_for_end and not info.get("cancelled"):
+            await self.playback[clip_id]["task"]
+        return info["duration"]
+
+    def watchPlayback(self, binding):
+        self.playback_binding = binding
+        return len(self.playback)
+
+    async def stopPlayback(self, clip_id=None, fade_ms=30):
+        stopped = 0
+        for cid, entry in list(self.playback.items()):
+            if clip_id is not None and cid != clip_id:
+                continue
+            entry["task"].cancel()
+            self.playback.pop(cid, None)
+            await self._playback_event(cid, "end", reason="stopped", position=0,
+                                       duration=entry["duration"])
+            stopped += 1
+        if clip_id is None:
+            self.stop_generation += 1
+            self.queue_end = asyncio.get_running_loop().time() + fade_ms / 1000
+        return {"stopped": stopped, "silentAt": time.time() * 1000 + fade_ms}
+
+    def fadePlayback(self, clip_id, level, ms=200):
+        return clip_id in self.playback
+
+    def resources(self):
+        return {"contextState": "running", "trackSwaps": 1, "localAudioTracks": 1,
+                "playing": len(self.playback), "pendingClips": len(self.clips)}
+
+    async def startPcmStream(self, opts=None):
+        opts = opts or {}
+        if self._pcm_task is not None:
+            return {"running": True}
+        rate = opts.get("sampleRate") or 16000
+        frame_samples = rate * (opts.get("frameMs") or 20) // 1000
+        self._pcm_task = asyncio.ensure_future(
+            self._stream_pcm(opts.get("binding") or "__victoriaPcm", rate, frame_samples))
+        return {"sampleRate": rate, "frameSamples": frame_samples, "tracks": 1}
+
+    async def _stream_pcm(self, binding, rate, frame_samples):
+        frame_bytes = frame_samples * 2
+        frame_s = frame_samples / rate
+        source = self.pcm_source
+        started = time.time()
+        seq = 0
+        while True:
+            # Real-time pacing; the source loops, silence when there is none
+            offset = (seq * frame_bytes) % len(source) if source else 0
+            pcm = source[offset:offset + frame_bytes] if source else b""
+            pcm = pcm.ljust(frame_bytes, b"\0")
+            due = started + (seq + 1) * frame_s
+            await asyncio.sleep(max(0.0, due - time.time()))
+            await self._binding(binding, {
+                "seq": seq, "t": (due - frame_s) * 1000, "sr": rate,
+                "pcm": base64.b64encode(pcm).decode("ascii"),
+            })
+            seq += 1
+
+    def stopPcmStream(self):
+        if self._pcm_task is None:
+            return False
+        self._pcm_task.cancel()
+        self._pcm_task = None
+        return True
+
+    def watchChat(self, binding):
+        self.chat_binding = binding
+        return True
+
+    def unwatchChat(self):
+        watching, self.chat_binding = self.chat_binding is not None, None
+        return watching
+
+    def chat(self, msg, to=None):
+        self.chat_sent.append((msg, to))
+        return True
+
+    async def receive_chat(self, text: str, sender: str = "participant1",
+                           name: Optional[str] = "Participant", private: bool = False):
+        """A remote participant writes in the meeting chat."""
+        if self.chat_binding and self.installed:
+            await self._binding(self.chat_binding, {
+                "from": sender, "name": name, "text": text, "private": private,
+                "delayed": False, "t": time.time() * 1000,
+            })
+
+    # -- CDP dispatch ---------------------------------------------------------
+
+    async def handle(self, method: str, params: dict) -> dict:
+        self.calls += 1
+        if method in ("Runtime.enable", "Page.enable", "Target.setDiscoverTargets"):
+            return {}
+        if method == "Runtime.addBinding":
+            self.bindings.add(params["name"])
+            return {}
+        if method == "Runtime.evaluate":
+            expr = params.get("expression", "")
+            if "window.victoriaAgent =" in expr:
+                self.installed = True
+                return {"result": {"type": "undefined"}}
+            if expr.strip() == "window.victoriaAgent":
+                return {"result": {"type": "object", "objectId": f"agent-{self.page_id}"}}
+            if "victoriaAgent" in expr and "typeof" in expr:
+                return {"result": {"type": "boolean", "value": self.installed}}
+            if "typeof APP" in expr:
+                return {"result": {"type": "boolean", "value": True}}
+            return {"result": {"type": "undefined"}}
+        if method == "Runtime.callFunctionOn":
+            name = _METHOD.search(params["functionDeclaration"])
+            fn = getattr(self, name.group(1), None) if name else None
+            if fn is None or not self.installed:
+                return {"exceptionDetails": {"text": "TypeError: not a function"}}
+            args = [a.get("value") for a in params.get("arguments", [])]
+            try:
+                value = fn(*args)
+                if asyncio.iscoroutine(value):
+                    value = await value
+            except Exception as e:
+                return {"exceptionDetails": {"text": f"{type(e).__name__}: {e}"}}
+            return {"result": {"type": "object", "value": value}}
+        raise KeyError(method)
+
+
+class FakeDevTools:
+    """WebSocket server hosting any number of FakePages."""
+
+    def __init__(self, latency: float = 0.0, decode_ms_per_s: float = 4.0,
+                 playback_rate: float = 1.0):
+        self.latency = latency
+        self.decode_ms_per_s = decode_ms_per_s
+        self.playback_rate = playback_rate
+        self.pages: Dict[str, FakePage] = {}
+        self._browsers = set()
+        self.server = None
+        self.port = None
+
+    @classmethod
+    async def start(cls, port: int = 0, host: str = "127.0.0.1", **kwargs) -> 'FakeDevTools':
+        self = cls(**kwargs)
+        self.server = await websockets.serve(self._serve, host, port, max_size=64 * 1024 * 1024,
+                                             process_request=self._http)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    def page(self, page_id: str) -> FakePage:
+        page = self.pages.get(page_id)
+        if page is None:
+            page = self.pages[page_id] = FakePage(page_id, self.decode_ms_per_s,
+                                                      playback_rate=self.playback_rate)
+            self._browser_event("Target.targetCreated", {"targetInfo": page.info})
+        return page
+
+    def page_url(self, page_id: str) -> str:
+        self.page(page_id)
+        return f"ws://127.0.0.1:{self.port}/devtools/page/{page_id}"
+
+    # -- browser target -------------------------------------------------------
+
+    def _http(self, connection, request):
+        if request.path == "/json/version":
+            return connection.respond(200, json.dumps({
+                "Browser": "FakeChrome/1.0",
+                "webSocketDebuggerUrl": f"ws://127.0.0.1:{self.port}/devtools/browser/fake",
+            }))
+        if request.path == "/json/list":
+            return connection.respond(200, json.dumps([p.info for p in self.pages.values()]))
+        return None
+
+    def _browser_event(self, method: str, params: dict):
+        message = json.dumps({"method": method, "params": params})
+        for ws in list(self._browsers):
+            asyncio.ensure_future(ws.send(message))
+
+    async def _serve_browser(self, ws):
+        self._browsers.add(ws)
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg["method"] == "Target.setDiscoverTargets":
+                    await ws.send(json.dumps({"id": msg["id"], "result": {}}))
+                    for page in self.pages.values():
+                        await ws.send(json.dumps({"method": "Target.targetCreated",
+                                                  "params": {"targetInfo": page.info}}))
+                else:
+                    await ws.send(json.dumps({"id": msg["id"], "error": {
+                        "code": -32601, "message": f"'{msg['method']}' wasn't found"}}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._browsers.discard(ws)
+
+    async def reload(self, page_id: str):
+        """Navigate the page again: the injected runtime is gone."""
+        page = self.pages[page_id]
+        page.installed = False
+        page.playback.clear()
+        page.chat_binding = None
+        await page._emit("Runtime.executionContextsCleared", {})
+        self._browser_event("Target.targetInfoChanged", {"targetInfo": page.info})
+
+    async def crash(self, page_id: str):
+        """Renderer crash: the page stays listed but loses its runtime."""
+        page = self.pages[page_id]
+        page.installed = False
+        self._browser_event("Target.targetCrashed",
+                            {"targetId": page_id, "status": "crashed", "errorCode": 139})
+
+    async def recover(self, page_id: str):
+        """The crashed tab is reloaded."""
+        self._browser_event("Target.targetInfoChanged", {"targetInfo": self.pages[page_id].info})
+
+    async def destroy(self, page_id: str):
+        page = self.pages.pop(page_id)
+        page.stopPcmStream()
+        self._browser_event("Target.targetDestroyed", {"targetId": page_id})
+        for ws in list(page._clients):
+            await ws.close()
+
+    # -- page targets ---------------------------------------------------------
+
+    async def _serve(self, ws):
+        path = ws.request.path if hasattr(ws, "request") else ws.path
+        if path.startswith("/devtools/browser"):
+            return await self._serve_browser(ws)
+        page = self.page(path.rstrip("/").rsplit("/", 1)[-1])
+        page._clients.add(ws)
+        tasks = set()
+        try:
+            async for raw in ws:
+                task = asyncio.ensure_future(self._reply(ws, page, json.loads(raw)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            page._clients.discard(ws)
+            for task in tasks:
+                task.cancel()
+
+    async def _reply(self, ws, page: FakePage, msg: dict):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        try:
+            result = await page.handle(msg["method"], msg.get("params", {}))
+            reply = {"id": msg["id"], "result": result}
+        except KeyError:
+            reply = {"id": msg["id"], "error": {"code": -32601, "message": f"'{msg['method']}' wasn't found"}}
+        try:
+            await ws.send(json.dumps(reply))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def close(self):
+        for page in self.pages.values():
+            page.stopPcmStream()
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Fake DevTools endpoint')
+    parser.add_argument('--port', type=int, default=9222)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per CDP reply')
+    args = parser.parse_args()
+
+    server = await FakeDevTools.start(args.port, latency=args.latency)
+    print(f"🧪 Fake DevTools on ws://127.0.0.1:{server.port}/devtools/page/<id>")
+    await asyncio.Future()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
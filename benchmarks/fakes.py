@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark Stubs and Audio Fixtures
+==================================
+
+Deterministic stand-ins for everything the loop normally reaches over
+the network or loads a model for:
+
+- StubTTSEngine: WAV "speech" at a fixed per-character duration, after
+  a configurable render latency (no gTTS, no container)
+- StubASR:       ASRService look-alike; really decodes the audio, then
+  waits a real-time-factor of its length and returns a scripted text
+- Fixtures:      speech-like clips and a conversation PCM stream
+  (utterances separated by silence) for the capture/VAD path
+
+Fixtures are synthesized (harmonics under a syllable-rate envelope), so
+results are reproducible run to run and machine to machine.
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import io
+import itertools
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asr_pool import ASRResult
+from audio_decode import to_whisper_input
+from tracing import get_tracer
+from tts_engines import TTSEngine
+
+PHRASES = [
+    "Hola Victor! Com estàs avui?",
+    "Com et dius?",
+    "Quin temps fa a Palma?",
+    "Em pots ajudar amb una cosa, si us plau?",
+    "Adéu! Fins aviat!",
+]
+
+# Roughly speaking speed: 60 ms of audio per character
+SECONDS_PER_CHAR = 0.06
+
+
+def speechlike(seconds: float, rate: int) -> np.ndarray:
+    """Amplitude-modulated harmonics, roughly the spectrum of a voice."""
+    t = np.arange(int(seconds * rate)) / rate
+    voice = sum(np.sin(2 * np.pi * f * t) / i for i, f in enumerate((140, 280, 420, 700), 1))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    return (0.2 * voice * envelope).astype(np.float32)
+
+
+def to_pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+
+
+def wav_bytes(audio: np.ndarray, rate: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(to_pcm16(audio))
+    return buf.getvalue()
+
+
+def conversation_pcm(utterances=(1.2, 0.8, 2.0), gap: float = 0.9, rate: int = 16000,
+                     noise_db: float = -60.0) -> bytes:
+    """PCM16 stream: speech bursts of the given lengths, silence in between."""
+    rng = np.random.default_rng(0)
+    noise = 10 ** (noise_db / 20)
+    parts = []
+    for seconds in utterances:
+        parts.append(rng.normal(0, noise, int(gap * rate)).astype(np.float32))
+        parts.append(speechlike(seconds, rate))
+    parts.append(rng.normal(0, noise, int(gap * rate)).astype(np.float32))
+    return to_pcm16(np.concatenate(parts))
+
+
+class StubTTSEngine(TTSEngine):
+    """Offline TTS: speech-like WAV, `latency` + `per_char` seconds to render."""
+
+    name = 'stub'
+    format = 'wav'
+    sample_rate = 22050
+
+    def __init__(self, latency: float = 0.05, per_char: float = 0.0):
+        self.latency = latency
+        self.per_char = per_char
+        self.renders = 0
+
+    def render(self, text, language, voice=None):
+        time.sleep(self.latency + self.per_char * len(text))
+        self.renders += 1
+        return wav_bytes(speechlike(len(text) * SECONDS_PER_CHAR, self.sample_rate), self.sample_rate)
+
+
+class StubASR:
+    """
+    Drop-in for asr_pool.ASRService: decodes for real (in a thread), then
+    takes `base + rtf * audio_seconds` and returns the next scripted text.
+    """
+
+    def __init__(self, script=PHRASES, base: float = 0.05, rtf: float = 0.1):
+        self._script = itertools.cycle(script)
+        self.base = base
+        self.rtf = rtf
+        self.workers = 1
+        self.model_size = 'stub'
+        self.completed = 0
+        self.queue_depth = 0
+
+    async def start(self, warm: bool = True):
+        pass
+
+    async def transcribe(self, audio, language='ca', wait=True, **options) -> ASRResult:
+        started = time.time()
+        samples = await asyncio.to_thread(to_whisper_input, audio)
+        decoded = time.time()
+        seconds = len(samples) / 16000
+        await asyncio.sleep(self.base + self.rtf * seconds)
+        finished = time.time()
+        self.completed += 1
+
+        tracer = get_tracer()
+        tracer.record('decode', decoded - started, ago=finished - decoded)
+        tracer.record('asr', finished - decoded, model=self.model_size, audio_seconds=seconds)
+        return ASRResult(
+            text=next(self._script), language=language or 'ca', language_probability=1.0,
+            audio_seconds=seconds,
+            segments=[],
+            timings=dict(queued=0.0, decode=decoded - started, inference=finished - decoded,
+                         total=finished - started),
+        )
+
+    def stats(self) -> dict:
+        return {'workers': self.workers, 'completed': self.completed}
+
+    async def close(self):
+        pass
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Stub Local TTS Server
+=====================
+
+Stands in for the catalan-tts container (POST /api/tts -> WAV) so the
+LocalHTTPTTSEngine can be exercised without Docker or a model.
+
+Returns a quiet 220 Hz tone whose length grows with the text, after an
+optional artificial latency. HTTP/1.1 keep-alive, one thread per
+connection.
+
+Usage:
+    python benchmarks/stub_tts_server.py --port 8765 --latency 0.2
+
+    from tts_engines import LocalHTTPTTSEngine
+    engine = LocalHTTPTTSEngine(base_url="http://127.0.0.1:8765")
+
+Author: VictorIA 🌟
+"""
+
+import argparse
+import io
+import json
+import math
+import struct
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_RATE = 22050
+
+# Roughly speaking speed: 60 ms of audio per character
+SECONDS_PER_CHAR = 0.06
+
+
+def tone_wav(seconds: float, sample_rate: int = SAMPLE_RATE, freq: float = 220.0) -> bytes:
+    n = max(1, int(seconds * sample_rate))
+    frames = b"".join(
+        struct.pack('<h', int(3000 * math.sin(2 * math.pi * freq * i / sample_rate)))
+        for i in range(n)
+    )
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+class StubTTSHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    requests_served = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            text = json.loads(body)['text']
+        except (ValueError, KeyError):
+            self.send_error(400, 'expected JSON with "text"')
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+        audio = tone_wav(len(text) * SECONDS_PER_CHAR)
+        type(self).requests_served += 1
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/wav')
+        self.send_header('Content-Length', str(len(audio)))
+        self.end_headers()
+        self.wfile.write(audio)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_in_thread(port: int = 0, latency: float = 0.0) -> ThreadingHTTPServer:
+    """Start the stub on a daemon thread; server.server_address has the port."""
+    handler = type('Handler', (StubTTSHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub catalan-tts server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per request')
+    args = parser.parse_args()
+
+    handler = type('Handler', (StubTTSHandler,), {'latency': args.latency})
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    print(f"🔈 Stub TTS on http://127.0.0.1:{args.port}/api/tts (latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
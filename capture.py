@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Continuous PCM Capture
+======================
+
+Always-on capture of the other participants' audio. The page mixes all
+remote JitsiTracks into an AudioWorklet at 16 kHz and pushes 20 ms PCM16
+frames to Python through a `Runtime.addBinding` callback, so there are no
+fixed capture windows and nothing said between windows is lost.
+
+Python sees an async iterator of AudioFrame objects with sequence numbers
+and page timestamps.
+
+Usage:
+    capture = PCMCapture(listener_ws_url)
+    await capture.start()
+    async for frame in capture:
+        ...
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import base64
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from page_player import get_player
+from tracing import get_tracer
+
+BINDING_NAME = '__victoriaPcm'
+
+# ~10 s of 20 ms frames before the oldest are dropped
+DEFAULT_QUEUE_FRAMES = 500
+
+
+@dataclass
+class AudioFrame:
+    """One chunk of mono PCM16 audio from the page."""
+    seq: int
+    timestamp: float            # page wall clock at first sample, seconds since epoch
+    sample_rate: int
+    pcm: bytes                  # int16 little-endian mono
+    received_at: float = field(default_factory=time.time)
+
+    @property
+    def samples(self) -> int:
+        return len(self.pcm) // 2
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+    @property
+    def end(self) -> float:
+        return self.timestamp + self.duration
+
+
+class PCMCapture:
+    """Async iterator over continuously captured remote audio frames."""
+
+    def __init__(self, ws_url: str, sample_rate: int = 16000, frame_ms: int = 20,
+                 participant: Optional[str] = None, max_queue_frames: int = DEFAULT_QUEUE_FRAMES):
+        self.ws_url = ws_url
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.participant = participant
+        self.queue = asyncio.Queue(maxsize=max_queue_frames)
+
+        self.frames = 0
+        self.dropped = 0        # overflowed our queue (consumer too slow)
+        self.lost = 0           # gaps in page sequence numbers
+        self._last_seq = None
+        self._player = None
+        self._unsubscribe = None
+        self._tracer = get_tracer()
+        self.running = False
+
+    async def start(self) -> dict:
+        self._player = await get_player(self.ws_url)
+        conn = self._player.conn
+        # Bindings survive reloads; re-adding is harmless
+        await conn.send("Runtime.addBinding", {"name": BINDING_NAME})
+        self._unsubscribe = conn.on("Runtime.bindingCalled", self._on_binding)
+        info = await self._player.call("startPcmStream", {
+            "binding": BINDING_NAME,
+            "sampleRate": self.sample_rate,
+            "frameMs": self.frame_ms,
+            "participant": self.participant
+        })
+        self.running = True
+        return info
+
+    def _on_binding(self, method: str, params: dict):
+        if params.get("name") != BINDING_NAME:
+            return
+        msg = json.loads(params["payload"])
+        frame = AudioFrame(
+            seq=msg["seq"],
+            timestamp=msg["t"] / 1000.0,
+            sample_rate=msg["sr"],
+            pcm=base64.b64decode(msg["pcm"])
+        )
+
+        if self._last_seq is not None and frame.seq > self._last_seq + 1:
+            self.lost += frame.seq - self._last_seq - 1
+        self._last_seq = frame.seq
+        self.frames += 1
+        # Page-to-Python lag of the newest sample
+        self._tracer.observe('capture', frame.received_at - frame.end)
+
+        if self.queue.full():
+            # Keep the newest audio; stale frames are worth less than fresh ones
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+    async def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self._unsubscribe:
+            self._unsubscribe()
+        try:
+            await self._player.call("stopPcmStream")
+        finally:
+            if self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> AudioFrame:
+        frame = await self.queue.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'dropped': self.dropped,
+            'lost': self.lost,
+            'queued': self.queue.qsize(),
+        }
+
+
+async def demo(ws_url: str, seconds: float = 10.0):
+    """Print capture throughput and signal level for a few seconds."""
+    import array
+
+    capture = PCMCapture(ws_url)
+    info = await capture.start()
+    print(f"👂 Capturing: {info}")
+
+    deadline = time.time() + seconds
+    async for frame in capture:
+        peak = max(abs(s) for s in array.array('h', frame.pcm)) if frame.pcm else 0
+        lag = frame.received_at - frame.end
+        print(f"   #{frame.seq:5d}  peak {peak:5d}  lag {lag * 1000:5.0f} ms")
+        if time.time() > deadline:
+            await capture.stop()
+    print(f"📊 {capture.stats()}")
+
+
+if __name__ == '__main__':
+    import sys
+    asyncio.run(demo(sys.argv[1] if len(sys.argv) > 1 else
+                     "ws://127.0.0.1:18801/devtools/page/5F295CA6D98897ACD0461FFE74C5B863"))
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Persistent Chrome DevTools Protocol Connections
+================================================
+
+One long-lived WebSocket per Chrome target, shared by every speak,
+chat and capture call:
+
+- A background reader matches responses to futures by id, so several
+  commands can be in flight at once on the same socket
+- Events are routed to subscribers instead of being thrown away
+- Domains (Runtime, Target, ...) are enabled once per connection
+
+Usage:
+    conn = await get_connection(ws_url)
+    value = await conn.evaluate("1 + 1")
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import itertools
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import websockets
+
+# Capture results and audio payloads can be large base64 strings
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+class CDPError(Exception):
+    """A CDP command failed, or the page threw while evaluating."""
+
+
+class CDPConnection:
+    """A multiplexed CDP WebSocket to a single Chrome target."""
+
+    def __init__(self, ws_url: str, default_timeout: Optional[float] = 30.0,
+                 domains: Tuple[str, ...] = ("Runtime",)):
+        self.ws_url = ws_url
+        self.default_timeout = default_timeout
+        # Enabled on every (re)connect; the browser target has no Runtime
+        self.domains = domains
+        self.ws = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self._enabled = set()
+        self._reader = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.ws is not None and self._reader is not None and not self._reader.done()
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.ws_url, max_size=MAX_MESSAGE_SIZE)
+        self._enabled.clear()
+        self._reader = asyncio.create_task(self._read_loop())
+        for domain in self.domains:
+            await self.enable(domain)
+        return self
+
+    async def wait_closed(self):
+        """Return once the socket has dropped (or was closed)."""
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+    async def _read_loop(self):
+        error = None
+        try:
+            async for raw in self.ws:
+                msg = json.loads(raw)
+                msg_id = msg.get("id")
+                if msg_id is not None:
+                    fut = self._pending.pop(msg_id, None)
+                    if fut is None or fut.done():
+                        continue
+                    if "error" in msg:
+                        err = msg["error"]
+                        fut.set_exception(CDPError(f"{err.get('code')}: {err.get('message')}"))
+                    else:
+                        fut.set_result(msg.get("result", {}))
+                elif "method" in msg:
+                    self._dispatch(msg["method"], msg.get("params", {}))
+        except websockets.ConnectionClosed as e:
+            error = e
+        finally:
+            exc = CDPError(f"Connection to {self.ws_url} closed: {error}")
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(exc)
+            self._pending.clear()
+
+    def _dispatch(self, method: str, params: dict):
+        for callback in list(self._subscribers.get(method, ())) + list(self._subscribers.get("*", ())):
+            try:
+                result = callback(method, params)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                print(f"⚠️ CDP event handler for {method} failed: {e}")
+
+    def on(self, method: str, callback: Callable[[str, dict], Any]) -> Callable[[], None]:
+        """
+        Subscribe to a CDP event ("*" for all events).
+
+        The callback receives (method, params) and may be a coroutine
+        function. Returns a function that removes the subscription.
+        """
+        self._subscribers.setdefault(method, []).append(callback)
+
+        def unsubscribe():
+            handlers = self._subscribers.get(method, [])
+            if callback in handlers:
+                handlers.remove(callback)
+        return unsubscribe
+
+    async def send(self, method: str, params: Optional[dict] = None,
+                   timeout: Optional[float] = None) -> dict:
+        """Send a command and wait for its matching response."""
+        if not self.is_open:
+            raise CDPError(f"Not connected to {self.ws_url}")
+
+        msg_id = next(self._ids)
+        cmd = {"id": msg_id, "method": method}
+        if params:
+            cmd["params"] = params
+
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = fut
+        try:
+            await self.ws.send(json.dumps(cmd))
+            return await asyncio.wait_for(fut, timeout or self.default_timeout)
+        finally:
+            self._pending.pop(msg_id, None)
+
+    async def enable(self, domain: str):
+        """Enable a CDP domain once for the lifetime of the socket."""
+        if domain not in self._enabled:
+            await self.send(f"{domain}.enable")
+            self._enabled.add(domain)
+
+    async def evaluate(self, expression: str, await_promise: bool = False,
+                       timeout: Optional[float] = None) -> Any:
+        """Evaluate JavaScript in the page and return the value."""
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise
+        }, timeout=timeout)
+        return self._unwrap(result).get("value")
+
+    async def evaluate_handle(self, expression: str) -> str:
+        """Evaluate JavaScript and return a remote object id for the result."""
+        result = await self.send("Runtime.evaluate", {"expression": expression})
+        return self._unwrap(result)["objectId"]
+
+    async def call_function_on(self, object_id: str, declaration: str, *args,
+                               await_promise: bool = True,
+                               timeout: Optional[float] = None) -> Any:
+        """
+        Call `declaration` with `this` bound to a remote object.
+
+        Arguments travel as JSON values, so large payloads are never
+        pasted into JavaScript source that V8 has to parse.
+        """
+        result = await self.send("Runtime.callFunctionOn", {
+            "objectId": object_id,
+            "functionDeclaration": declaration,
+            "arguments": [{"value": a} for a in args],
+            "returnByValue": True,
+            "awaitPromise": await_promise
+        }, timeout=timeout)
+        return self._unwrap(result).get("value")
+
+    @staticmethod
+    def _unwrap(result: dict) -> dict:
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            text = details.get("exception", {}).get("description") or details.get("text")
+            raise CDPError(f"Page exception: {text}")
+        return result.get("result", {})
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class CDPConnectionManager:
+    """Hands out one live CDPConnection per target URL, reconnecting as needed."""
+
+    def __init__(self):
+        self._connections: Dict[str, CDPConnection] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get(self, ws_url: str) -> CDPConnection:
+        conn = self._connections.get(ws_url)
+        if conn is not None and conn.is_open:
+            return conn
+
+        lock = self._locks.setdefault(ws_url, asyncio.Lock())
+        async with lock:
+            conn = self._connections.get(ws_url)
+            if conn is None or not conn.is_open:
+                conn = await CDPConnection(ws_url).connect()
+                self._connections[ws_url] = conn
+            return conn
+
+    async def drop(self, ws_url: str):
+        """Forget (and close) a target's connection; the next get() reconnects."""
+        conn = self._connections.pop(ws_url, None)
+        if conn is not None:
+            await conn.close()
+
+    async def close_all(self):
+        conns = list(self._connections.values())
+        self._connections.clear()
+        await asyncio.gather(*(c.close() for c in conns), return_exceptions=True)
+
+
+_manager = None
+
+
+def get_manager() -> CDPConnectionManager:
+    """Process-wide connection manager shared by all agents."""
+    global _manager
+    if _manager is None:
+        _manager = CDPConnectionManager()
+    return _manager
+
+
+async def get_connection(ws_url: str) -> CDPConnection:
+    return await get_manager().get(ws_url)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Meeting Chat Channel
+====================
+
+Jitsi chat in both directions over the page's persistent CDP connection:
+
+- Incoming: the page runtime subscribes to MESSAGE_RECEIVED /
+  PRIVATE_MESSAGE_RECEIVED and pushes each message to Python through a
+  `Runtime.addBinding` callback. Python sees an async iterator of
+  ChatMessage, ready to go straight into think() (no capture, no
+  decode, no Whisper)
+- Outgoing: send() only queues. One sender task per page drains the
+  queue at most once per `min_interval`, coalescing everything pending
+  for the same recipient into one message (up to `max_chars`)
+
+Our own messages and history replayed on join are not delivered.
+
+Usage:
+    chat = await get_chat(speaker_ws_url)
+    async for message in chat:
+        chat.send(think(message.text), to=message.sender if message.private else None)
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from cdp import CDPError
+from page_player import get_player
+from tracing import get_tracer
+
+BINDING_NAME = '__victoriaChat'
+
+# Outgoing: at most one message per interval, coalesced up to this size
+MIN_INTERVAL = 1.0
+MAX_CHARS = 2000
+
+# Incoming messages kept before the oldest are dropped
+DEFAULT_QUEUE_MESSAGES = 100
+
+
+@dataclass
+class ChatMessage:
+    """One incoming chat message."""
+    sender: str                 # participant id (reply target for private messages)
+    name: Optional[str]         # display name, if known
+    text: str
+    private: bool
+    timestamp: float            # page wall clock when received, seconds since epoch
+    received_at: float = field(default_factory=time.time)
+
+
+class ChatChannel:
+    """Incoming chat as an async iterator; outgoing chat through a coalescing queue."""
+
+    def __init__(self, ws_url: str, min_interval: float = MIN_INTERVAL, max_chars: int = MAX_CHARS,
+                 max_queue_messages: int = DEFAULT_QUEUE_MESSAGES):
+        self.ws_url = ws_url
+        self.min_interval = min_interval
+        self.max_chars = max_chars
+        self.queue = asyncio.Queue(maxsize=max_queue_messages)
+
+        self._outbox: List[tuple] = []      # (recipient, text)
+        self._wake = asyncio.Event()
+        self._sender: Optional[asyncio.Task] = None
+        self._rewatch: Optional[asyncio.Task] = None
+        self._last_sent = 0.0
+        self._sending = False
+        self._start_lock = asyncio.Lock()
+        self._player = None
+        self._unsubscribe = []
+        self.running = False
+
+        self.received = 0
+        self.dropped = 0        # overflowed our queue (consumer too slow)
+        self.queued = 0         # send() calls
+        self.sent = 0           # messages actually sent
+        self.coalesced = 0      # queued messages folded into another one
+        self.failed = 0
+
+    async def start(self) -> 'ChatChannel':
+        async with self._start_lock:
+            if self.running:
+                return self
+            self._player = await get_player(self.ws_url)
+            conn = self._player.conn
+            # Bindings survive reloads; re-adding is harmless
+            await conn.send("Runtime.addBinding", {"name": BINDING_NAME})
+            self._unsubscribe = [conn.on("Runtime.bindingCalled", self._on_binding),
+                                 conn.on("Runtime.executionContextsCleared", self._on_reload)]
+            await self._player.call("watchChat", BINDING_NAME)
+            self.running = True
+            return self
+
+    def _on_binding(self, method: str, params: dict):
+        if params.get("name") != BINDING_NAME:
+            return
+        msg = json.loads(params["payload"])
+        if msg.get("delayed") or not msg.get("text", "").strip():
+            return
+        message = ChatMessage(
+            sender=msg["from"],
+            name=msg.get("name"),
+            text=msg["text"],
+            private=bool(msg.get("private")),
+            timestamp=msg["t"] / 1000.0
+        )
+        self.received += 1
+        get_tracer().observe('chat_in', message.received_at - message.timestamp)
+
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def _on_reload(self, method: str, params: dict):
+        # The runtime (and its room listeners) went with the page
+        if self.running and (self._rewatch is None or self._rewatch.done()):
+            self._rewatch = asyncio.ensure_future(self._watch_again())
+
+    async def _watch_again(self):
+        try:
+            await self._player.call("watchChat", BINDING_NAME)
+        except CDPError as e:
+            print(f"⚠️ Chat re-subscribe after reload failed: {e}")
+
+    # -- outgoing -------------------------------------------------------
+
+    def send(self, text: str, to: Optional[str] = None):
+        """Queue a message (to a participant id for a private one); returns at once."""
+        if not text or not text.strip():
+            return
+        self._outbox.append((to, text.strip()))
+        self.queued += 1
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.ensure_future(self._send_loop())
+        self._wake.set()
+
+    def _next_batch(self):
+        """Everything pending for the first recipient in line, joined up to max_chars."""
+        to, text = self._outbox.pop(0)
+        rest = []
+        for item in self._outbox:
+            if item[0] == to and len(text) + 1 + len(item[1]) <= self.max_chars:
+                text += "\n" + item[1]
+                self.coalesced += 1
+            else:
+                rest.append(item)
+        self._outbox = rest
+        return to, text
+
+    async def _send_loop(self):
+        while True:
+            if not self._outbox:
+                self._wake.clear()
+                await self._wake.wait()
+            # Rate limit; whatever arrives meanwhile joins this message
+            await asyncio.sleep(max(0.0, self._last_sent + self.min_interval - time.time()))
+            to, text = self._next_batch()
+            self._last_sent = time.time()
+            self._sending = True
+            try:
+                await self._player.call("chat", text, to)
+                self.sent += 1
+            except CDPError as e:
+                self.failed += 1
+                print(f"⚠️ Chat send failed: {e}")
+            finally:
+                self._sending = False
+
+    async def flush(self, timeout: float = 10.0):
+        """Wait until everything queued has been sent."""
+        deadline = time.time() + timeout
+        while (self._outbox or self._sending) and time.time() < deadline:
+            await asyncio.sleep(0.05)
+
+    async def stop(self, flush_timeout: float = 5.0):
+        if not self.running:
+            return
+        await self.flush(flush_timeout)
+        self.running = False
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        for task in (self._sender, self._rewatch):
+            if task is not None:
+                task.cancel()
+        try:
+            await self._player.call("unwatchChat")
+        finally:
+            if self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ChatMessage:
+        message = await self.queue.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+    def stats(self) -> dict:
+        return {
+            'received': self.received,
+            'dropped': self.dropped,
+            'queued': self.queued,
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'pending': len(self._outbox),
+            'failed': self.failed,
+        }
+
+
+_channels: Dict[str, ChatChannel] = {}
+
+
+async def get_chat(ws_url: str) -> ChatChannel:
+    """One started chat channel per page."""
+    channel = _channels.get(ws_url)
+    if channel is None or not channel.running:
+        channel = _channels[ws_url] = ChatChannel(ws_url)
+    return await channel.start()
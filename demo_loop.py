@@ -10,18 +10,19 @@ Author: VictorIA 🌟
 """
 
 import asyncio
-import websockets
 import json
-import base64
 import requests
-import tempfile
-import subprocess
 import os
-from gtts import gTTS
+
+from cdp import get_connection
+from page_player import get_player
+from tts_engines import get_tts_engine
 
 # WebSocket URLs for the two Jitsi tabs
-SPEAKER_WS = "ws://127.0.0.1:18800/devtools/page/79C483DBE3EC25A5086A925796308497"
-LISTENER_WS = "ws://127.0.0.1:18800/devtools/page/5F295CA6D98897ACD0461FFE74C5B863"
+SPEAKER_WS = os.environ.get(
+    "VICTORIA_SPEAKER_WS", "ws://127.0.0.1:18800/devtools/page/79C483DBE3EC25A5086A925796308497")
+LISTENER_WS = os.environ.get(
+    "VICTORIA_LISTENER_WS", "ws://127.0.0.1:18800/devtools/page/5F295CA6D98897ACD0461FFE74C5B863")
 
 
 class JitsiController:
@@ -29,25 +30,16 @@ class JitsiController:
     
     def __init__(self, ws_url):
         self.ws_url = ws_url
-        self.ws = None
-        self.msg_id = 0
+        self.conn = None
     
     async def connect(self):
-        self.ws = await websockets.connect(self.ws_url)
-        await self._send("Runtime.enable")
+        self.conn = await get_connection(self.ws_url)
     
     async def _send(self, method, params=None):
-        self.msg_id += 1
-        cmd = {"id": self.msg_id, "method": method}
-        if params:
-            cmd["params"] = params
-        await self.ws.send(json.dumps(cmd))
-        
-        # Wait for matching response
-        while True:
-            resp = json.loads(await self.ws.recv())
-            if resp.get("id") == self.msg_id:
-                return resp.get("result", {}).get("result", {}).get("value")
+        # Commands are multiplexed on the shared connection, so several
+        # can be in flight and page events are not dropped while waiting
+        result = await self.conn.send(method, params)
+        return result.get("result", {}).get("value")
     
     async def evaluate(self, expression, await_promise=False):
         return await self._send("Runtime.evaluate", {
@@ -57,31 +49,13 @@ class JitsiController:
         })
     
     async def send_chat(self, message):
-        await self.evaluate(f"APP.conference._room.sendTextMessage(`{message}`)")
+        await self.evaluate(f"APP.conference._room.sendTextMessage({json.dumps(message)})")
     
     async def play_audio(self, url):
-        """Play audio from URL into the Jitsi call."""
-        return await self.evaluate(f"""
-            (async () => {{
-                const ctx = new AudioContext();
-                const resp = await fetch('{url}');
-                const buf = await resp.arrayBuffer();
-                const audioBuf = await ctx.decodeAudioData(buf);
-                const src = ctx.createBufferSource();
-                src.buffer = audioBuf;
-                const dest = ctx.createMediaStreamDestination();
-                src.connect(dest);
-                const [track] = dest.stream.getAudioTracks();
-                const jt = await JitsiMeetJS.createLocalTracksFromMediaStreams([{{
-                    stream: dest.stream, mediaType: 'audio', track
-                }}]);
-                for (const t of (APP.conference._room?.getLocalTracks?.() || [])) 
-                    if (t.getType() === 'audio') await t.dispose();
-                await APP.conference._room.addTrack(jt[0]);
-                src.start();
-                return new Promise(r => {{ src.onended = () => r('done'); }});
-            }})()
-        """, await_promise=True)
+        """Play audio from URL into the Jitsi call; resolves when it ends."""
+        player = await get_player(self.ws_url)
+        await player.call("speak", url, True, timeout=600)
+        return 'done'
     
     async def capture_audio(self, duration_ms=5000):
         """Capture audio from RTCPeerConnection receivers."""
@@ -118,23 +92,19 @@ class JitsiController:
         return result
     
     async def close(self):
-        if self.ws:
-            await self.ws.close()
+        if self.conn:
+            await self.conn.close()
 
 
-def generate_tts(text, lang='ca'):
+def generate_tts(text, lang='ca', engine=None):
     """Generate TTS and upload to CDN."""
-    path = tempfile.mktemp(suffix='.mp3')
-    tts = gTTS(text, lang=lang)
-    tts.save(path)
+    audio = get_tts_engine(engine).synthesize_sync(text, lang)
     
-    with open(path, 'rb') as f:
-        resp = requests.post(
-            'https://catbox.moe/user/api.php',
-            files={'fileToUpload': f},
-            data={'reqtype': 'fileupload'}
-        )
-    os.remove(path)
+    resp = requests.post(
+        'https://catbox.moe/user/api.php',
+        files={'fileToUpload': (f'tts.{audio.format}', audio.data, audio.mime_type)},
+        data={'reqtype': 'fileupload'}
+    )
     return resp.text.strip()
 
 
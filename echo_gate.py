@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Playback-Aware Capture Gate
+===========================
+
+With always-on capture the agent hears itself: its own TTS comes back
+through the call, gets endpointed, and Whisper spends a pass on it. The
+speaker page tells us exactly when each clip starts and ends (playback
+handles, page_player.py), so the gate drops captured frames that fall in
+those windows before VAD or Whisper ever see them:
+
+- Window: clip start - `lead_ms` to clip end + `tail_ms` (the call's
+  jitter buffer delays the echo); a clip still playing is open-ended
+- Echo level: a decaying peak of every voiced frame in a window, so an
+  echo that grows louder over a clip is followed as it grows
+- Settling: when playback starts after silence, the first `settle_ms`
+  of voiced audio only calibrate the echo level (all of it is dropped)
+- Overlap: once settled, a frame `overlap_db` louder than the echo is a
+  human talking over the agent. It goes through (so VAD fires
+  SpeechStart and barge-in stops the agent), and the gate stays open
+  for `hold_ms` after it
+- Dropped vs processed audio seconds are counted (stats())
+
+Usage:
+    gate = EchoGate(await get_player(speaker_ws_url))
+    async for event in endpoint(gate.filter(PCMCapture(listener_ws_url))):
+        ...
+    gate.stats()    # {'dropped_seconds', 'processed_seconds', 'overlap_seconds', ...}
+
+Author: VictorIA 🌟
+"""
+
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from vad import frame_dbfs
+
+# Timer jitter before the page reports a clip started
+LEAD_MS = 50
+# Echo still arriving after the clip ended (network + jitter buffer)
+TAIL_MS = 400
+
+# Louder than the echo by this much: someone is talking over the agent
+OVERLAP_DB = 6.0
+
+# Voiced playback audio that calibrates the echo level before overlap counts
+SETTLE_MS = 200
+
+# Playback windows kept for frames that arrive late
+MAX_WINDOWS = 64
+
+
+class EchoGate:
+    """Drops captured frames that are only the agent's own voice coming back."""
+
+    def __init__(self, player, lead_ms: int = LEAD_MS, tail_ms: int = TAIL_MS,
+                 overlap_db: float = OVERLAP_DB, min_db: float = -50.0,
+                 decay_db: float = 3.0, hold_ms: int = 300, settle_ms: int = SETTLE_MS):
+        self.lead = lead_ms / 1000
+        self.tail = tail_ms / 1000
+        self.overlap_db = overlap_db
+        self.min_db = min_db
+        self.decay_db = decay_db        # per second of in-window audio
+        self.hold = hold_ms / 1000
+        self.settle = settle_ms / 1000
+
+        self.windows = deque(maxlen=MAX_WINDOWS)    # [start, end or None], page epoch seconds
+        self._open = {}                             # clip id -> its window
+        self.echo_db: Optional[float] = None
+        self._hold_until = 0.0
+        self._settling = self.settle     # voiced seconds left before overlap counts
+        self._unsubscribe = player.on_playback(self._on_playback)
+
+        self.dropped_seconds = 0.0
+        self.processed_seconds = 0.0
+        self.overlap_seconds = 0.0      # processed while the agent was talking
+        self.dropped_frames = 0
+
+    def _on_playback(self, handle, event: str):
+        if event == 'start':
+            if not self._open:
+                # Playback resumes after silence: the echo path may have changed
+                self._settling = self.settle
+            window = [handle.started_at, None]
+            self._open[handle.clip_id] = window
+            self.windows.append(window)
+        elif event == 'end':
+            window = self._open.pop(handle.clip_id, None)
+            if window is not None:
+                window[1] = handle.ended_at
+
+    def in_playback(self, frame) -> bool:
+        """Does the frame overlap a playback window (with lead and tail)?"""
+        for start, end in self.windows:
+            if frame.end >= start - self.lead and (end is None or frame.timestamp <= end + self.tail):
+                return True
+        return False
+
+    def admit(self, frame) -> bool:
+        """Should this frame go on to VAD? Counts it either way."""
+        if not self.in_playback(frame):
+            self.processed_seconds += frame.duration
+            return True
+
+        level = frame_dbfs(frame.pcm)
+        voiced = level > self.min_db
+        if self.echo_db is not None:
+            self.echo_db -= self.decay_db * frame.duration
+        overlap = (voiced and self._settling <= 0 and self.echo_db is not None and
+                   level > self.echo_db + self.overlap_db)
+        if voiced:
+            self.echo_db = level if self.echo_db is None else max(self.echo_db, level)
+            self._settling = max(0.0, self._settling - frame.duration)
+        if overlap or frame.timestamp < self._hold_until:
+            if overlap:
+                self._hold_until = frame.end + self.hold
+            self.processed_seconds += frame.duration
+            self.overlap_seconds += frame.duration
+            return True
+
+        self.dropped_seconds += frame.duration
+        self.dropped_frames += 1
+        return False
+
+    async def filter(self, frames: AsyncIterator) -> AsyncIterator:
+        """The frames of `frames` that aren't echo."""
+        async for frame in frames:
+            if self.admit(frame):
+                yield frame
+
+    def close(self):
+        self._unsubscribe()
+
+    def stats(self) -> dict:
+        total = self.dropped_seconds + self.processed_seconds
+        return {
+            'dropped_seconds': self.dropped_seconds,
+            'processed_seconds': self.processed_seconds,
+            'overlap_seconds': self.overlap_seconds,
+            'dropped_frames': self.dropped_frames,
+            'dropped_ratio': self.dropped_seconds / total if total else 0.0,
+            'echo_db': self.echo_db,
+        }
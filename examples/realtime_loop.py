@@ -13,26 +13,47 @@ Architecture:
 4. Text-to-Speech: Generate audio response
 5. Audio Injection: Play response back into the meeting
 
+Steps 3-5 overlap: the response handler may be an async generator
+(tokens from a local LLM, say). Sentences are cut off the stream as
+they complete and synthesized/queued while generation continues, and
+abandoning a turn cancels the handler.
+
 Author: VictorIA 🌟
 Created: 2026-02-01
 """
 
 import asyncio
 import base64
+import inspect
 import json
 import subprocess
 import sys
 import tempfile
 import os
+import time
+from contextlib import aclosing
 from pathlib import Path
-from typing import Optional, Callable
+from typing import AsyncIterator, Awaitable, Callable, Optional, Union
+
+# Page player, TTS engines and the sentence splitter live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from page_player import get_player
+from text_chunks import SentenceSplitter
+from tts_engines import get_tts_engine
+
+# A handler returns the whole response (str, or awaitable str) or
+# yields it piece by piece (async generator)
+ResponseHandler = Callable[[str], Union[str, Awaitable[str], AsyncIterator[str]]]
+
+# Sentences synthesized ahead of the one being queued
+TTS_AHEAD = 2
 
-# Ensure dependencies
-try:
-    from gtts import gTTS
-except ImportError:
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'gTTS'])
-    from gtts import gTTS
+
+async def stub_token_stream(text: str, delay: float = 0.05) -> AsyncIterator[str]:
+    """Stand-in for an LLM: streams an echo word by word."""
+    for word in f"I heard you say: {text}. Is there anything else?".split(" "):
+        await asyncio.sleep(delay)
+        yield word + " "
 
 
 class VideoCallAgent:
@@ -44,8 +65,10 @@ class VideoCallAgent:
         self,
         browser_profile: str = "clawd",
         target_tab_id: str = None,
-        response_handler: Optional[Callable[[str], str]] = None,
-        language: str = "en"
+        response_handler: Optional[ResponseHandler] = None,
+        language: str = "en",
+        ws_url: str = None,
+        tts_engine=None
     ):
         self.browser_profile = browser_profile
         self.target_tab_id = target_tab_id
@@ -53,6 +76,12 @@ class VideoCallAgent:
         self.language = language
         self.is_running = False
         self.capture_duration_ms = 5000
+        # Page to speak into; without one, respond() only renders
+        self.ws_url = ws_url
+        self.tts = tts_engine or get_tts_engine()
+        self._turn: Optional[asyncio.Task] = None
+        # Loaded on first transcription, then kept
+        self._whisper = None
         
     def _default_response(self, text: str) -> str:
         """Default response handler - echoes back what was heard."""
@@ -60,6 +89,8 @@ class VideoCallAgent:
     
     def generate_tts(self, text: str, output_path: str = None) -> str:
         """Generate TTS audio file."""
+        from gtts import gTTS   # only this legacy path needs it
+        
         if output_path is None:
             output_path = tempfile.mktemp(suffix='.mp3')
         
@@ -105,8 +136,9 @@ class VideoCallAgent:
         # Try using Whisper if available
         try:
             import whisper
-            model = whisper.load_model("base")
-            result = model.transcribe(audio_path)
+            if self._whisper is None:
+                self._whisper = whisper.load_model("base")
+            result = self._whisper.transcribe(audio_path)
             return result["text"]
         except ImportError:
             pass
@@ -131,6 +163,122 @@ class VideoCallAgent:
         except Exception as e:
             return f"[Transcription failed: {e}]"
     
+    async def think(self, text: str) -> AsyncIterator[str]:
+        """
+        The response to `text`, as it is generated.
+        
+        Plain handlers yield their whole answer once; async generator
+        handlers are passed through piece by piece. None and empty
+        pieces are skipped, anything else is spoken as str(). Closing
+        this generator (turn abandoned) closes the handler's too.
+        """
+        result = self.response_handler(text)
+        if inspect.isasyncgen(result):
+            async with aclosing(result) as pieces:
+                async for piece in pieces:
+                    if piece is not None and piece != "":
+                        yield str(piece)
+            return
+        if inspect.isawaitable(result):
+            result = await result
+        if result is not None and result != "":
+            yield str(result)
+    
+    async def respond(self, heard: str) -> dict:
+        """
+        Think and speak at the same time.
+        
+        Each sentence is synthesized as soon as the handler has finished
+        it (up to TTS_AHEAD at once) and queued in the page in order, so
+        the first sentence plays while the rest is still being generated.
+        
+        Returns {response, chunks, first_audio, elapsed} (seconds).
+        """
+        start = time.time()
+        player = await get_player(self.ws_url) if self.ws_url else None
+        splitter = SentenceSplitter()
+        limit = asyncio.Semaphore(TTS_AHEAD)
+        rendered: asyncio.Queue = asyncio.Queue()
+        text = []
+        
+        async def render(chunk):
+            async with limit:
+                return await self.tts.synthesize(chunk, self.language)
+        
+        async def generate():
+            try:
+                async with aclosing(self.think(heard)) as pieces:
+                    async for piece in pieces:
+                        text.append(piece)
+                        for chunk in splitter.feed(piece):
+                            rendered.put_nowait(asyncio.create_task(render(chunk)))
+                for chunk in splitter.flush():
+                    rendered.put_nowait(asyncio.create_task(render(chunk)))
+            finally:
+                rendered.put_nowait(None)
+        
+        producer = asyncio.create_task(generate())
+        result = {"response": None, "chunks": 0, "first_audio": None}
+        interrupts = player.interrupts if player else 0
+        interrupted = False
+        try:
+            while (task := await rendered.get()) is not None:
+                audio = await task
+                result["chunks"] += 1
+                if player is None:
+                    continue
+                if player.interrupts != interrupts:
+                    interrupted = True      # barged in on: stop generating, don't queue the rest
+                    break
+                info = await player.enqueue_bytes(audio.buffer)
+                if result["first_audio"] is None and info.get("startsIn") is not None:
+                    result["first_audio"] = time.time() - start + info["startsIn"]
+            if not interrupted:
+                await producer      # re-raises a handler error
+        finally:
+            # Nothing may run in between: no new sentences, no new renders
+            producer.cancel()
+            while not rendered.empty():
+                task = rendered.get_nowait()
+                if task is not None:
+                    task.cancel()
+            # Let aclosing() close the handler before we return
+            await asyncio.gather(producer, return_exceptions=True)
+        
+        result["response"] = "".join(text).strip()
+        result["elapsed"] = time.time() - start
+        return result
+    
+    def start_turn(self, heard: str) -> asyncio.Task:
+        """
+        Respond to `heard` in the background, abandoning any turn in
+        progress (and silencing what it already queued in the page).
+        """
+        previous = self._turn
+        if previous is not None and not previous.done():
+            previous.cancel()
+        self._turn = asyncio.create_task(self._take_over(previous, heard))
+        return self._turn
+    
+    async def _take_over(self, previous: Optional[asyncio.Task], heard: str) -> dict:
+        await self._silence(previous)
+        return await self.respond(heard)
+    
+    async def abandon_turn(self, fade_ms: int = 30):
+        """Stop generating and speaking the current response (e.g. barge-in)."""
+        turn, self._turn = self._turn, None
+        await self._silence(turn, fade_ms)
+    
+    async def _silence(self, turn: Optional[asyncio.Task], fade_ms: int = 30):
+        """Cancel `turn` and stop every clip playing or queued in the page."""
+        if turn is not None and not turn.done():
+            turn.cancel()
+            await asyncio.gather(turn, return_exceptions=True)
+        if self.ws_url:
+            player = await get_player(self.ws_url)
+            if player.active:
+                await player.stop_all(fade_ms)
+    
     async def one_loop_iteration(self) -> dict:
         """
         Perform one iteration of the listen-think-respond loop.
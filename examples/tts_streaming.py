@@ -11,20 +11,17 @@ Tested and working as of 2026-02-01!
 Author: EvilVictoria 🌟
 """
 
-import subprocess
 import sys
 import tempfile
 import os
 
-# Install gTTS if needed
-try:
-    from gtts import gTTS
-except ImportError:
-    subprocess.check_call([sys.executable, '-m', 'pip', 'install', 'gTTS'])
-    from gtts import gTTS
+# Pluggable TTS engines (gTTS, local Catalan TTS) live in the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from tts_engines import get_tts_engine
 
 
-def generate_tts(text: str, lang: str = 'en', output_path: str = None) -> str:
+def generate_tts(text: str, lang: str = 'en', output_path: str = None,
+                 engine: str = None) -> str:
     """
     Generate TTS audio file.
     
@@ -32,15 +29,18 @@ def generate_tts(text: str, lang: str = 'en', output_path: str = None) -> str:
         text: Text to speak
         lang: Language code (e.g., 'en', 'ca', 'es', 'fr')
         output_path: Optional output path (defaults to temp file)
+        engine: TTS engine name ('gtts', 'catalan'); defaults to
+            $VICTORIA_TTS_ENGINE or gtts
     
     Returns:
-        Path to the generated MP3 file
+        Path to the generated audio file (MP3 or WAV, per engine)
     """
+    audio = get_tts_engine(engine).synthesize_sync(text, lang)
     if output_path is None:
-        output_path = tempfile.mktemp(suffix='.mp3')
+        output_path = tempfile.mktemp(suffix=f'.{audio.format}')
     
-    tts = gTTS(text, lang=lang)
-    tts.save(output_path)
+    with open(output_path, 'wb') as f:
+        f.write(audio.data)
     print(f"Generated TTS: {output_path}")
     return output_path
 
@@ -69,18 +69,19 @@ def upload_to_catbox(file_path: str) -> str:
     return url
 
 
-def generate_and_upload(text: str, lang: str = 'en') -> str:
+def generate_and_upload(text: str, lang: str = 'en', engine: str = None) -> str:
     """
     Generate TTS and upload to public CDN in one step.
     
     Args:
         text: Text to speak
         lang: Language code
+        engine: TTS engine name (see generate_tts)
     
     Returns:
         Public URL ready to stream in Jitsi
     """
-    audio_path = generate_tts(text, lang)
+    audio_path = generate_tts(text, lang, engine=engine)
     url = upload_to_catbox(audio_path)
     os.remove(audio_path)  # Clean up
     return url
@@ -88,40 +89,51 @@ def generate_and_upload(text: str, lang: str = 'en') -> str:
 
 # JavaScript code to inject into Jitsi for playing the audio
 JITSI_PLAY_SCRIPT = '''
-async function playTTS(audioUrl) {
-    // Stop any existing audio tracks
-    const oldTracks = APP.conference._room?.getLocalTracks?.() || [];
-    for (const t of oldTracks) {
-        if (t.getType() === 'audio') t.dispose();
+// One outgoing track for the whole call; each utterance is just a buffer
+// source feeding it (no dispose/addTrack per utterance, one AudioContext)
+async function victoriaOutput() {
+    const out = window.__victoriaOut || (window.__victoriaOut = {});
+    if (!out.ctx || out.ctx.state === 'closed') {
+        out.ctx = new AudioContext();
+        out.dest = null;
+    }
+    if (!out.dest || !out.track || out.track.disposed) {
+        out.dest = out.ctx.createMediaStreamDestination();
+        const [track] = out.dest.stream.getAudioTracks();
+        [out.track] = await JitsiMeetJS.createLocalTracksFromMediaStreams([{
+            stream: out.dest.stream,
+            mediaType: 'audio',
+            track
+        }]);
     }
+    const localTracks = APP.conference._room?.getLocalTracks?.() || [];
+    if (!localTracks.includes(out.track)) {
+        for (const t of localTracks) {
+            if (t.getType() === 'audio') await t.dispose();
+        }
+        await APP.conference._room.addTrack(out.track);
+    }
+    return out;
+}
+
+async function playTTS(audioUrl) {
+    // The agent runtime already owns a persistent track: use it
+    if (window.victoriaAgent?.speak) return window.victoriaAgent.speak(audioUrl);
     
-    // Create audio context and fetch audio
-    const ctx = new AudioContext();
+    const out = await victoriaOutput();
     const resp = await fetch(audioUrl);
-    const buf = await resp.arrayBuffer();
-    const audioBuf = await ctx.decodeAudioData(buf);
+    const audioBuf = await out.ctx.decodeAudioData(await resp.arrayBuffer());
     
-    // Create source and destination
-    const src = ctx.createBufferSource();
+    // Queue after anything still playing
+    const src = out.ctx.createBufferSource();
     src.buffer = audioBuf;
-    const dest = ctx.createMediaStreamDestination();
-    src.connect(dest);
-    
-    // Create Jitsi track and add to conference
-    const stream = dest.stream;
-    const [track] = stream.getAudioTracks();
-    const jitsiTracks = await JitsiMeetJS.createLocalTracksFromMediaStreams([{
-        stream,
-        mediaType: 'audio',
-        track
-    }]);
-    await APP.conference._room.addTrack(jitsiTracks[0]);
-    
-    // Play the audio
-    src.start(0);
+    src.connect(out.dest);
+    const startAt = Math.max(out.ctx.currentTime, out.queueEnd || 0);
+    src.start(startAt);
+    out.queueEnd = startAt + audioBuf.duration;
     
     return new Promise(resolve => {
-        src.onended = () => resolve();
+        src.onended = () => { src.disconnect(); resolve(); };
     });
 }
 '''
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Intent Matcher
+==============
+
+What think() answers, as data instead of if/elif chains:
+
+- Rules live in a JSON file (intents.json, or VICTORIA_INTENTS): each
+  has keyword/phrase patterns, a priority and a response template per
+  language ("{heard}" = the transcript, "{match}" = the pattern hit)
+- Every pattern of every rule is compiled into one Aho-Corasick
+  automaton, so matching is a single pass over the transcript however
+  many rules there are
+- Text is normalized first: lowercase, accents folded (estàs = estas,
+  adiós = adios, ç = c, l·l = ll), punctuation to spaces
+- Patterns match whole words ("com" doesn't fire inside "compra");
+  a trailing `*` matches a prefix ("graci*" = gràcies, gracias...)
+- Highest priority wins; on a tie, the earliest match, then file order
+
+Usage:
+    intents = get_intents()
+    intents.respond("Hola! Com estàs?")          # "Estic bé, gràcies! I tu?"
+    intents.match("adéu").rule.name             # "goodbye"
+
+Author: VictorIA 🌟
+"""
+
+import json
+import os
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+DEFAULT_INTENTS = Path(os.environ.get(
+    'VICTORIA_INTENTS', Path(__file__).resolve().parent / 'intents.json'))
+
+DEFAULT_LANGUAGE = 'ca'
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_NON_PATTERN = re.compile(r'[^a-z0-9*]+')
+
+
+def normalize(text: str, pattern: bool = False) -> str:
+    """Lowercase, fold accents, punctuation to single spaces; padded with spaces."""
+    text = unicodedata.normalize('NFKD', text.lower().replace('·', ''))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' ' + (_NON_PATTERN if pattern else _NON_WORD).sub(' ', text).strip() + ' '
+
+
+@dataclass
+class Rule:
+    name: str
+    patterns: List[str]
+    response: Union[str, Dict[str, str], None]
+    priority: int = 0
+    order: int = 0
+
+    def template(self, language: str = DEFAULT_LANGUAGE) -> Optional[str]:
+        if not isinstance(self.response, dict):
+            return self.response
+        return self.response.get(language) or self.response.get(DEFAULT_LANGUAGE) \
+            or next(iter(self.response.values()), None)
+
+
+@dataclass
+class Match:
+    rule: Rule
+    pattern: str        # as written in the rules file
+    position: int       # character offset in the normalized text
+
+    def response(self, heard: str, language: str = DEFAULT_LANGUAGE) -> Optional[str]:
+        template = self.rule.template(language)
+        return template.format(heard=heard, match=self.pattern) if template else template
+
+
+class IntentMatcher:
+    """All rules' patterns in one Aho-Corasick automaton."""
+
+    def __init__(self, rules: List[Rule], default=None):
+        self.rules = rules
+        self.default = default
+        # Trie as parallel arrays: transitions, failure link, outputs
+        self._next: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[tuple]] = [[]]
+        for rule in rules:
+            for pattern in rule.patterns:
+                self._add(pattern, rule)
+        self._link()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'IntentMatcher':
+        rules = [Rule(name=r['name'], patterns=r['patterns'], response=r.get('response'),
+                      priority=r.get('priority', 0), order=i)
+                 for i, r in enumerate(data['rules'])]
+        return cls(rules, data.get('default'))
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path] = DEFAULT_INTENTS) -> 'IntentMatcher':
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    # -- compile ---------------------------------------------------------
+
+    def _add(self, pattern: str, rule: Rule):
+        key = normalize(pattern, pattern=True)
+        if key.endswith('* '):
+            key = key[:-2]      # prefix: no word boundary on the right
+        key = key.replace('*', '')
+        if not key.strip():
+            return
+        state = 0
+        for char in key:
+            nxt = self._next[state].get(char)
+            if nxt is None:
+                nxt = len(self._next)
+                self._next[state][char] = nxt
+                self._next.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(key), rule, pattern))
+
+    def _link(self):
+        """Breadth-first failure links; outputs inherited along them."""
+        queue = deque(self._next[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._next[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._next[fail]:
+                    fail = self._fail[fail]
+                target = self._next[fail].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    # -- match -----------------------------------------------------------
+
+    def matches(self, text: str) -> List[Match]:
+        """Every rule hit in `text`, in order of position."""
+        found = []
+        state = 0
+        nexts, fails, outs = self._next, self._fail, self._out
+        for i, char in enumerate(normalize(text)):
+            while state and char not in nexts[state]:
+                state = fails[state]
+            state = nexts[state].get(char, 0)
+            for length, rule, pattern in outs[state]:
+                found.append(Match(rule, pattern, i - length + 1))
+        return found
+
+    def match(self, text: str) -> Optional[Match]:
+        """The winning rule: highest priority, then earliest, then file order."""
+        found = self.matches(text)
+        if not found:
+            return None
+        return min(found, key=lambda m: (-m.rule.priority, m.position, m.rule.order))
+
+    def respond(self, heard: str, language: str = DEFAULT_LANGUAGE) -> Optional[str]:
+        """Response for a transcript (the default template if no rule matches)."""
+        match = self.match(heard)
+        if match is not None:
+            return match.response(heard, language)
+        default = self.default
+        if isinstance(default, dict):
+            default = default.get(language) or default.get(DEFAULT_LANGUAGE)
+        return default.format(heard=heard, match='') if default else None
+
+    def fixed_response(self, heard: str, language: str = DEFAULT_LANGUAGE) -> Optional[str]:
+        """Response for `heard` if it doesn't depend on the transcript, else None."""
+        match = self.match(heard)
+        template = match.rule.template(language) if match is not None else None
+        return template if template and '{' not in template else None
+
+    def fixed_responses(self, language: str = DEFAULT_LANGUAGE) -> List[str]:
+        """Responses that don't depend on the transcript (worth pre-rendering)."""
+        responses = []
+        for rule in self.rules:
+            template = rule.template(language)
+            if template and '{' not in template and template not in responses:
+                responses.append(template)
+        return responses
+
+    @property
+    def states(self) -> int:
+        return len(self._next)
+
+
+_intents = None
+
+
+def get_intents() -> IntentMatcher:
+    """Shared matcher compiled from the rules file."""
+    global _intents
+    if _intents is None:
+        _intents = IntentMatcher.from_file()
+    return _intents
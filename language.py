@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Per-Speaker Language Pinning
+============================
+
+Whisper can detect the language (ca / es / en on our calls), but that is
+an extra encoder pass on every utterance; pinning one language for the
+whole call mis-transcribes anyone who speaks another. So, per speaker:
+
+- Detect: the first utterances are transcribed with language=None and
+  vote with Whisper's probabilities, restricted to the call's candidate
+  languages (Whisper likes to hear Catalan as Galician or Italian)
+- Pin: after `detect_utterances` votes, or one confident detection,
+  later utterances are transcribed in that language (no detection pass)
+- Re-detect: when a pinned transcript looks wrong (low average
+  log-prob, or text where Whisper thinks there was no speech), the
+  speaker is unpinned and the utterance transcribed again with detection
+
+A "speaker" is whatever key the caller passes, and the capture can only
+tell people apart when it is filtered to one participant: the page's
+mixed capture (participant=None) is a single key, so everyone on it
+shares one pin and a switch to another speaker's language is caught by
+re-detection. Run one capture per participant to pin each person
+separately.
+
+The speaker's language also picks the response language (intents.json
+has ca / es / en templates) and TTS voice. `saved` counts the detection
+passes pinning avoided.
+
+Usage:
+    languages = LanguageTracker(candidates=('ca', 'es', 'en'))
+    result = await asr.transcribe(audio, language=languages.language_for(speaker))
+    ...
+    languages.stats()   # {'detections', 'saved', 'redetections', 'speakers'}
+
+Author: VictorIA 🌟
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+CANDIDATES = ('ca', 'es', 'en')
+
+# Pinned transcripts below this average token log-prob are suspect
+MIN_AVG_LOGPROB = -1.0
+# ...as is text in segments Whisper itself thinks are probably not speech
+MAX_NO_SPEECH = 0.6
+
+
+@dataclass
+class SpeakerLanguage:
+    language: Optional[str] = None
+    pinned: bool = False
+    votes: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    detections: int = 0
+    pinned_utterances: int = 0
+    redetections: int = 0
+
+
+def confidence(result) -> Optional[tuple]:
+    """(avg log-prob, no-speech prob) weighted by segment length, or None without segments."""
+    segments = [s for s in result.segments if s.get('text')]
+    if not segments:
+        return None
+    weights = [max(s['end'] - s['start'], 0.01) for s in segments]
+    total = sum(weights)
+    logprob = sum(w * s['avg_logprob'] for w, s in zip(weights, segments)) / total
+    no_speech = sum(w * s['no_speech_prob'] for w, s in zip(weights, segments)) / total
+    return logprob, no_speech
+
+
+class LanguageTracker:
+    """Detected, pinned and re-detected language per speaker."""
+
+    def __init__(self, candidates: Iterable[str] = CANDIDATES, default: str = 'ca',
+                 detect_utterances: int = 2, pin_probability: float = 0.9,
+                 min_avg_logprob: float = MIN_AVG_LOGPROB, max_no_speech: float = MAX_NO_SPEECH):
+        self.candidates = tuple(candidates)
+        self.default = default
+        self.detect_utterances = detect_utterances
+        self.pin_probability = pin_probability
+        self.min_avg_logprob = min_avg_logprob
+        self.max_no_speech = max_no_speech
+        self.speakers: Dict[object, SpeakerLanguage] = {}
+
+    def speaker(self, key) -> SpeakerLanguage:
+        state = self.speakers.get(key)
+        if state is None:
+            state = self.speakers[key] = SpeakerLanguage()
+        return state
+
+    def language_for(self, key) -> Optional[str]:
+        """Language to transcribe `key` in, or None to detect it."""
+        state = self.speaker(key)
+        return state.language if state.pinned else None
+
+    def language(self, key) -> str:
+        """Best guess so far (for responding), pinned or not."""
+        return self.speaker(key).language or self.default
+
+    def degraded(self, result) -> bool:
+        scores = confidence(result)
+        if scores is None:
+            return False
+        logprob, no_speech = scores
+        return logprob < self.min_avg_logprob or no_speech > self.max_no_speech
+
+    def confirm(self, key, result) -> bool:
+        """
+        Check a transcript made in the pinned language. False (and the
+        speaker unpinned) if confidence dropped: transcribe it again with
+        detection.
+        """
+        state = self.speaker(key)
+        if self.degraded(result):
+            state.pinned = False
+            state.votes.clear()
+            state.redetections += 1
+            return False
+        state.pinned_utterances += 1
+        return True
+
+    def detected(self, key, result) -> str:
+        """Count a detection pass's vote; pins the speaker once sure enough."""
+        state = self.speaker(key)
+        probs = {lang: p for lang, p in result.language_probs.items() if lang in self.candidates}
+        if not probs and result.language in self.candidates:
+            probs = {result.language: result.language_probability}
+        if probs:
+            language, probability = max(probs.items(), key=lambda item: item[1])
+            state.votes[language] += probability
+        else:
+            probability = 0.0
+        state.detections += 1
+        if state.votes:
+            state.language = max(state.votes.items(), key=lambda item: item[1])[0]
+        if state.votes and (probability >= self.pin_probability or
+                            state.detections >= self.detect_utterances):
+            state.pinned = True
+        return self.language(key)
+
+    @property
+    def saved(self) -> int:
+        """Detection passes avoided by pinning."""
+        return sum(s.pinned_utterances for s in self.speakers.values())
+
+    def stats(self) -> dict:
+        return {
+            'speakers': {str(key): {'language': s.language, 'pinned': s.pinned}
+                         for key, s in self.speakers.items()},
+            'detections': sum(s.detections for s in self.speakers.values()),
+            'saved': self.saved,
+            'redetections': sum(s.redetections for s in self.speakers.values()),
+        }
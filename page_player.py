@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Page-Side Audio Player
+======================
+
+Installs the VictorIA agent runtime (agent_loop.JITSI_LOOP_JS) once per
+page and delivers audio to it as bounded base64 chunks passed as
+arguments to a tiny `Runtime.callFunctionOn` call.
+
+Compared to inlining the whole MP3 into a `Runtime.evaluate` expression:
+- V8 never parses a multi-hundred-KB script
+- The page decodes base64 natively instead of an atob/charCodeAt loop
+- No single CDP message grows with utterance length
+
+Every clip played or queued gets a PlaybackHandle: the page reports
+start / progress / end through a binding, and Python can stop or fade
+the clip (barge-in). When the page reloads, the runtime is re-injected
+in the background as soon as Jitsi is up again.
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+from audio_buffer import AudioBuffer
+from cdp import CDPConnection, CDPError, get_connection
+from tracing import get_tracer
+
+# Raw bytes per chunk (~64 KiB once base64 encoded)
+CHUNK_SIZE = 48 * 1024
+
+# Chunks allowed in flight at once per clip
+MAX_INFLIGHT_CHUNKS = 4
+
+# Page -> Python playback events
+PLAYBACK_BINDING = "__victoriaPlayback"
+
+# The runtime can only be injected once Jitsi's APP exists
+PAGE_READY = "typeof APP !== 'undefined' && !!APP.conference"
+READY_TIMEOUT = 30.0
+
+_clip_ids = itertools.count(1)
+
+
+class PlaybackHandle:
+    """One clip's playback in the page: events in, stop/fade out."""
+
+    def __init__(self, player: 'PagePlayer', clip_id: int):
+        self.player = player
+        self.clip_id = clip_id
+        self.duration: Optional[float] = None
+        self.position = 0.0
+        self.reason: Optional[str] = None       # 'finished' | 'stopped' | 'reloaded'
+        self.started_at: Optional[float] = None  # page epoch seconds
+        self.ended_at: Optional[float] = None
+        self.started = asyncio.Event()
+        self.ended = asyncio.Event()
+
+    @property
+    def playing(self) -> bool:
+        return self.started.is_set() and not self.ended.is_set()
+
+    def _on_event(self, msg: dict):
+        event = msg["event"]
+        self.duration = msg.get("duration", self.duration)
+        self.position = msg.get("position", self.position)
+        if event == "start":
+            self.started_at = msg["t"] / 1000.0
+            self.started.set()
+        elif event == "end":
+            self.ended_at = msg["t"] / 1000.0
+            self.reason = msg.get("reason")
+            self.ended.set()
+
+    async def wait(self, timeout: float = None) -> str:
+        """Wait for the clip to end; returns the reason."""
+        await asyncio.wait_for(self.ended.wait(), timeout)
+        return self.reason
+
+    async def stop(self, fade_ms: int = 30) -> dict:
+        """Fade out and stop this clip. Returns {stopped, silentAt}."""
+        return await self.player.call("stopPlayback", self.clip_id, fade_ms)
+
+    async def fade(self, level: float, ms: int = 200) -> bool:
+        """Ramp this clip's gain to `level` (0..1) over `ms`."""
+        return await self.player.call("fadePlayback", self.clip_id, level, ms)
+
+
+class PagePlayer:
+    """Python handle on the `window.victoriaAgent` player in one page."""
+
+    def __init__(self, conn: CDPConnection, chunk_size: int = CHUNK_SIZE):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self._agent_id = None
+        self._install_lock = asyncio.Lock()
+        self._unsubscribe = None
+        self._reinstall = None
+        self.handles: Dict[int, PlaybackHandle] = {}
+        self._playback_listeners = []
+        self.interrupts = 0
+        self.reloads = 0
+
+    async def install(self, force: bool = False):
+        """Inject the agent runtime if the page doesn't have it yet."""
+        async with self._install_lock:
+            if self._agent_id and not force:
+                return
+            installed = await self.conn.evaluate(
+                "typeof window.victoriaAgent?.pushChunk === 'function'")
+            if force or not installed:
+                from agent_loop import get_inject_script
+                await self._wait_ready()
+                await self.conn.evaluate(get_inject_script())
+            self._agent_id = await self.conn.evaluate_handle("window.victoriaAgent")
+            await self._watch_playback()
+
+    async def _wait_ready(self, timeout: float = READY_TIMEOUT):
+        """Poll until the Jitsi app is up (right after a reload it isn't)."""
+        deadline = time.time() + timeout
+        while not await self.conn.evaluate(PAGE_READY):
+            if time.time() > deadline:
+                raise CDPError(f"Jitsi not ready after {timeout:.0f}s")
+            await asyncio.sleep(0.25)
+
+    async def _watch_playback(self):
+        # Bindings survive reloads; re-adding is harmless
+        await self.conn.send("Runtime.addBinding", {"name": PLAYBACK_BINDING})
+        if self._unsubscribe is None:
+            self._unsubscribe = self.conn.on("Runtime.bindingCalled", self._on_binding)
+            self.conn.on("Runtime.executionContextsCleared", self._on_reload)
+        await self.conn.call_function_on(
+            self._agent_id, "function(name) { return this.watchPlayback(name); }",
+            PLAYBACK_BINDING)
+
+    def _on_binding(self, method: str, params: dict):
+        if params.get("name") != PLAYBACK_BINDING:
+            return
+        msg = json.loads(params["payload"])
+        handle = self.handles.get(msg["id"])
+        if handle is None:
+            return
+        handle._on_event(msg)
+        if msg["event"] == "end":
+            del self.handles[msg["id"]]
+        if msg["event"] != "progress":
+            self._notify(handle, msg["event"])
+
+    def _on_reload(self, method: str, params: dict):
+        """
+        The page navigated or reloaded: the runtime and its clips are gone.
+
+        End the stale handles and re-inject in the background, so the
+        next call doesn't pay for it (or find a dead object id).
+        """
+        self.reloads += 1
+        self._agent_id = None
+        now = time.time() * 1000
+        for handle in list(self.handles.values()):
+            handle._on_event({"event": "end", "t": now, "reason": "reloaded"})
+            self._notify(handle, "end")
+        self.handles.clear()
+        if self._reinstall is None or self._reinstall.done():
+            self._reinstall = asyncio.ensure_future(self._reinstall_after_reload())
+
+    async def _reinstall_after_reload(self):
+        try:
+            await self.install()
+            print(f"🔁 Agent runtime re-injected after reload ({self.conn.ws_url})")
+        except CDPError as e:
+            # Gone for good (tab closed) or still loading: call() retries lazily
+            print(f"⚠️ Re-inject after reload failed: {e}")
+
+    def on_playback(self, callback: Callable[[PlaybackHandle, str], None]) -> Callable[[], None]:
+        """
+        Call `callback(handle, event)` when any clip starts or ends
+        ('start' / 'end'). Returns a function that removes it.
+        """
+        self._playback_listeners.append(callback)
+
+        def unsubscribe():
+            if callback in self._playback_listeners:
+                self._playback_listeners.remove(callback)
+        return unsubscribe
+
+    def _notify(self, handle: PlaybackHandle, event: str):
+        for callback in list(self._playback_listeners):
+            callback(handle, event)
+
+    def _handle(self, clip_id: int) -> PlaybackHandle:
+        handle = self.handles.get(clip_id)
+        if handle is None:
+            handle = self.handles[clip_id] = PlaybackHandle(self, clip_id)
+        return handle
+
+    def handle(self, clip_id: int) -> Optional[PlaybackHandle]:
+        """Handle of a clip that is playing or queued."""
+        return self.handles.get(clip_id)
+
+    @property
+    def active(self) -> List[PlaybackHandle]:
+        """Clips playing or queued to play."""
+        return [h for h in self.handles.values() if not h.ended.is_set()]
+
+    @property
+    def speaking(self) -> bool:
+        """Is the agent audible right now?"""
+        return any(h.playing for h in self.handles.values())
+
+    async def stop_all(self, fade_ms: int = 30) -> dict:
+        """
+        Barge-in: fade out what is playing and drop everything queued.
+
+        Returns {stopped, silentAt (page epoch seconds), rtt (seconds)}.
+        """
+        self.interrupts += 1
+        sent = time.time()
+        result = await self.call("stopPlayback", None, fade_ms)
+        result["silentAt"] /= 1000.0
+        result["rtt"] = time.time() - sent
+        return result
+
+    async def call(self, method: str, *args, timeout=None):
+        """Call `window.victoriaAgent[method](...args)` in the page."""
+        await self.install()
+        declaration = f"function(...args) {{ return this.{method}(...args); }}"
+        try:
+            return await self.conn.call_function_on(self._agent_id, declaration, *args,
+                                                    timeout=timeout)
+        except CDPError as e:
+            if str(e).startswith("Page exception"):
+                raise
+            # Page reloaded: the object id is stale, re-install and retry once
+            self._agent_id = None
+            await self.install(force=True)
+            return await self.conn.call_function_on(self._agent_id, declaration, *args,
+                                                    timeout=timeout)
+
+    async def upload(self, audio) -> int:
+        """
+        Transfer encoded audio (bytes or AudioBuffer) into the page,
+        returning its clip id. The base64 chunks are memoized on the
+        buffer, so a cached phrase is only ever encoded once.
+        """
+        audio = AudioBuffer.of(audio)
+        clip_id = next(_clip_ids)
+        await self.call("beginClip", clip_id, len(audio))
+
+        limit = asyncio.Semaphore(MAX_INFLIGHT_CHUNKS)
+
+        async def push(offset, b64):
+            async with limit:
+                await self.call("pushChunk", clip_id, offset, b64)
+
+        try:
+            await asyncio.gather(*(push(o, b64) for o, b64 in audio.base64_chunks(self.chunk_size)))
+        except Exception:
+            await self.call("dropClip", clip_id)
+            raise
+        return clip_id
+
+    async def play(self, clip_id: int, wait_for_end: bool = False):
+        """Start an uploaded clip. Returns its duration, or waits for it to end."""
+        self._handle(clip_id)
+        try:
+            return await self.call("playClip", clip_id, wait_for_end,
+                                   timeout=600 if wait_for_end else None)
+        except Exception:
+            self.handles.pop(clip_id, None)
+            raise
+
+    async def speak_bytes(self, audio, wait_for_end: bool = False):
+        """Upload and play encoded audio (mp3/wav/...)."""
+        tracer = get_tracer()
+        with tracer.span('cdp_transfer', bytes=len(audio)):
+            clip_id = await self.upload(audio)
+        with tracer.span('play', clip=clip_id):
+            return await self.play(clip_id, wait_for_end)
+
+    async def enqueue(self, clip_id: int) -> dict:
+        """
+        Append an uploaded clip to the gapless page queue.
+
+        Returns {startsIn, duration, queuedUntil} in seconds, relative to
+        the page's AudioContext clock at scheduling time, plus `clip` (the
+        id to look up its PlaybackHandle). `cancelled` is set if a stop
+        arrived while it was still decoding.
+        """
+        self._handle(clip_id)
+        try:
+            info = await self.call("enqueueClip", clip_id)
+        except Exception:
+            self.handles.pop(clip_id, None)
+            raise
+        info["clip"] = clip_id
+        return info
+
+    async def resources(self) -> dict:
+        """Page-side footprint: track swaps, local audio tracks, live clips."""
+        return await self.call("resources")
+
+    async def enqueue_bytes(self, audio) -> dict:
+        """Upload encoded audio and append it to the page queue."""
+        tracer = get_tracer()
+        with tracer.span('cdp_transfer', bytes=len(audio)):
+            clip_id = await self.upload(audio)
+        with tracer.span('enqueue', clip=clip_id):
+            info = await self.enqueue(clip_id)
+            # Measured in the page: decodeAudioData and the track attach/swap
+            tracer.record('decode_audio', info.get('decodeMs', 0) / 1000, clip=clip_id)
+            tracer.record('track_swap', info.get('attachMs', 0) / 1000, clip=clip_id)
+        return info
+
+
+_players: Dict[str, PagePlayer] = {}
+
+
+async def get_player(ws_url: str) -> PagePlayer:
+    """One installed player per page, bound to its shared CDP connection."""
+    conn = await get_connection(ws_url)
+    player = _players.get(ws_url)
+    if player is None or player.conn is not conn:
+        player = PagePlayer(conn)
+        _players[ws_url] = player
+    await player.install()
+    return player
+
+
+def peek_player(ws_url: str) -> Optional[PagePlayer]:
+    """The page's player if one was already set up (no connecting, no install)."""
+    return _players.get(ws_url)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Stage-Graph Turn Pipeline
+=========================
+
+Runs the agent loop as a chain of asyncio tasks joined by queues, so
+independent work overlaps: while turn N is being played back, turn N+1
+is already being captured / transcribed.
+
+- Each stage is one (or more) worker tasks reading from its in-queue
+- Bounded queues give backpressure between stages
+- Every turn records spans (queue wait + run time per stage)
+- `Turn.critical_path()` shows which stages bound the turn's latency,
+  including branches a stage ran concurrently (see `Turn.span`)
+
+Usage:
+    pipe = Pipeline()
+    pipe.stage('transcribe', transcribe).stage('think', think).stage('speak', speak)
+    async for turn in pipe.run(utterances):
+        print(turn.report())
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+from tracing import get_tracer, turn_context
+
+_turn_ids = itertools.count(1)
+
+
+@dataclass
+class Span:
+    stage: str
+    start: float
+    end: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class Turn:
+    """One trip through the pipeline; stages read and write `data`."""
+    input: Any
+    id: int = field(default_factory=lambda: next(_turn_ids))
+    data: dict = field(default_factory=dict)
+    spans: List[Span] = field(default_factory=list)
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    error: Optional[BaseException] = None
+    dropped: bool = False
+
+    @asynccontextmanager
+    async def span(self, stage: str):
+        """Time a block of work (a stage, or a branch inside one)."""
+        span = Span(stage, time.time())
+        try:
+            with turn_context(self.id), get_tracer().span(stage):
+                yield span
+        finally:
+            span.end = time.time()
+            self.spans.append(span)
+
+    @property
+    def latency(self) -> float:
+        return (self.finished or time.time()) - self.created
+
+    def critical_path(self) -> List[Span]:
+        """
+        Walk back from the last span to finish, each time taking the span
+        that finished most recently before the current one started (the
+        one that gated it). Gaps between them are queue waits.
+        """
+        if not self.spans:
+            return []
+        current = max(self.spans, key=lambda s: s.end)
+        path = [current]
+        while True:
+            before = [s for s in self.spans if s.end <= current.start + 1e-4 and s is not current]
+            if not before:
+                break
+            current = max(before, key=lambda s: s.end)
+            path.append(current)
+        return path[::-1]
+
+    def bottleneck(self) -> Optional[str]:
+        path = self.critical_path()
+        return max(path, key=lambda s: s.duration).stage if path else None
+
+    def report(self) -> str:
+        parts = []
+        cursor = self.created
+        for span in self.critical_path():
+            wait = span.start - cursor
+            parts.append(f"{span.stage} {span.duration:.2f}s" + (f" (+{wait:.2f}s wait)" if wait > 0.01 else ""))
+            cursor = span.end
+        status = " [dropped]" if self.dropped else f" [error: {self.error}]" if self.error else ""
+        return f"turn {self.id}: {self.latency:.2f}s = " + " → ".join(parts) + status
+
+
+StageFn = Callable[[Turn], Awaitable[Optional[bool]]]
+
+_DONE = object()
+
+
+@dataclass
+class _Stage:
+    name: str
+    fn: StageFn
+    workers: int = 1
+
+
+class Pipeline:
+    """
+    Linear chain of stages. A stage function gets the Turn, does its work
+    (writing results into `turn.data`) and may return False to drop the
+    turn (e.g. an empty transcript). Exceptions are recorded on the turn,
+    which skips the remaining stages.
+    """
+
+    def __init__(self, maxsize: int = 4):
+        self.maxsize = maxsize
+        self.stages: List[_Stage] = []
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def stage(self, name: str, fn: StageFn, workers: int = 1) -> 'Pipeline':
+        """Append a stage; workers > 1 may reorder turns through it."""
+        self.stages.append(_Stage(name, fn, workers))
+        return self
+
+    async def _worker(self, stage: _Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        while True:
+            turn = await inbox.get()
+            if turn is _DONE:
+                # Let sibling workers see it too
+                await inbox.put(_DONE)
+                return
+            if turn.error is None and not turn.dropped:
+                recorded = len(turn.spans)
+                span = Span(stage.name, time.time())
+                try:
+                    with turn_context(turn.id), get_tracer().span(stage.name):
+                        keep = await stage.fn(turn)
+                    if keep is False:
+                        turn.dropped = True
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    turn.error = e
+                span.end = time.time()
+                # A stage that timed its own branches is represented by them
+                if len(turn.spans) == recorded:
+                    turn.spans.append(span)
+            await outbox.put(turn)
+
+    async def _feed(self, source, inbox: asyncio.Queue):
+        try:
+            if hasattr(source, '__aiter__'):
+                async for item in source:
+                    await inbox.put(item if isinstance(item, Turn) else Turn(item))
+            else:
+                for item in source:
+                    await inbox.put(item if isinstance(item, Turn) else Turn(item))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Turns already in flight still finish; run() re-raises after them
+            await inbox.put(_DONE)
+            raise
+        await inbox.put(_DONE)
+
+    async def run(self, source) -> AsyncIterator[Turn]:
+        """
+        Push every item of `source` (sync or async iterable) through the
+        stages. If the source raises, the turns it already produced are
+        yielded and then its exception is raised.
+        """
+        queues = [asyncio.Queue(self.maxsize) for _ in range(len(self.stages) + 1)]
+        feeder = asyncio.create_task(self._feed(source, queues[0]))
+        tasks = [feeder]
+
+        async def drain(outbox, workers):
+            await asyncio.gather(*workers)
+            await outbox.put(_DONE)
+
+        for i, stage in enumerate(self.stages):
+            workers = [asyncio.create_task(self._worker(stage, queues[i], queues[i + 1]))
+                       for _ in range(stage.workers)]
+            tasks.append(asyncio.create_task(drain(queues[i + 1], workers)))
+            tasks.extend(workers)
+
+        out = queues[-1]
+        try:
+            while True:
+                turn = await out.get()
+                if turn is _DONE:
+                    await feeder    # the source's exception, if it raised
+                    break
+                turn.finished = time.time()
+                with turn_context(turn.id):
+                    get_tracer().record('turn', turn.latency, bottleneck=turn.bottleneck(),
+                                        dropped=turn.dropped)
+                if turn.error is not None:
+                    self.failed += 1
+                elif turn.dropped:
+                    self.dropped += 1
+                else:
+                    self.completed += 1
+                yield turn
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            'stages': [s.name for s in self.stages],
+            'completed': self.completed,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
@@ -7,156 +7,476 @@ Uses streaming for minimal latency:
 - Direct TTS injection (no CDN upload): ~0.3s
 - VAD-enabled Whisper transcription: ~2-3s for 3s audio
 - Total loop latency: ~3-4s
+- Chat messages skip capture and ASR entirely (converse_chat)
+- Own playback is dropped from capture before VAD/Whisper (barge-in still works)
+- Each speaker's language is pinned after detection (no detection pass per turn)
 
 Author: VictorIA 🌟
 """
 
 import asyncio
-import websockets
-import json
-import base64
-import tempfile
-import subprocess
-import io
+import os
 import time
-from gtts import gTTS
-from faster_whisper import WhisperModel
 
-# Global Whisper model (load once)
-_whisper_model = None
+import numpy as np
 
-def get_whisper_model():
-    global _whisper_model
-    if _whisper_model is None:
-        print("Loading Whisper model...")
-        _whisper_model = WhisperModel("base", device="cpu", compute_type="int8")
-    return _whisper_model
+from asr_pool import get_asr_service
+from audio_buffer import get_audio_stats
+from barge_in import BargeInController
+from capture import PCMCapture
+from chat import get_chat
+from intents import get_intents
+from echo_gate import EchoGate
+from language import LanguageTracker
+from page_player import get_player
+from pipeline import Pipeline, Turn
+from text_chunks import split_for_speech
+from tracing import get_tracer, process_uptime
+from tts_cache import get_tts_cache
+from tts_engines import CachedTTSEngine, get_tts_engine
+from streaming_asr import StreamingTranscriber
+from vad import SpeechStart, Utterance, VADEndpointer, endpoint
+
+# Speaker tab (plays our audio) and listener tab (second Chrome profile,
+# continuous capture); override to point at other pages or a fake endpoint
+SPEAKER_WS = os.environ.get(
+    "VICTORIA_SPEAKER_WS", "ws://127.0.0.1:18800/devtools/page/6A3868EBA3E382487BC8AFF07BCF4AB8")
+LISTENER_WS = os.environ.get(
+    "VICTORIA_LISTENER_WS", "ws://127.0.0.1:18801/devtools/page/5F295CA6D98897ACD0461FFE74C5B863")
+
+# Chunks synthesized in parallel while earlier ones play
+TTS_CONCURRENCY = 2
 
 
 class RealtimeVideoCallAgent:
-    def __init__(self, ws_url=None):
-        self.ws_url = ws_url or "ws://127.0.0.1:18800/devtools/page/6A3868EBA3E382487BC8AFF07BCF4AB8"
+    def __init__(self, ws_url=None, tts_engine=None, asr=None):
+        self.ws_url = ws_url or SPEAKER_WS
+        self.tts = tts_engine or get_tts_engine()
+        if not isinstance(self.tts, CachedTTSEngine):
+            self.tts = CachedTTSEngine(self.tts)
+        # Whisper runs in worker processes so inference never blocks the event loop
+        self.asr = asr or get_asr_service()
+        self.barge_in = None
+        # Drops captured frames that are our own playback coming back
+        self.echo_gate = None
+        # Language per speaker: detected, pinned, re-detected when confidence drops
+        self.languages = LanguageTracker()
+        # For languages the main engine can't speak (the Catalan container)
+        self.fallback_tts = None
+        # Called with every finished Turn (the supervisor counts them)
+        self.on_turn = None
+    
+    async def synthesize(self, text, lang='ca'):
+        """
+        Generate TTS to memory (through the shared cache) and return it as
+        an AudioBuffer: the cached phrase's base64 chunks and decoded PCM
+        are reused by every turn that speaks it.
+        
+        The voice is the engine's voice for `lang`.
+        """
+        tts = self.tts
+        if not tts.speaks(lang):
+            if self.fallback_tts is None:
+                self.fallback_tts = get_tts_engine('gtts')
+            tts = self.fallback_tts
+        audio = await tts.synthesize(text, lang, tts.voice_for(lang))
+        return audio.buffer
+    
+    async def warm_up(self, lang='ca'):
+        """Pre-render the canned responses so they never hit the network mid-call."""
+        # speak_chunked renders per chunk, so warm the chunks
+        phrases = [c for r in get_intents().fixed_responses(lang) for c in split_for_speech(r)]
+        return await self.tts.warm(phrases, lang)
+    
+    async def start(self, lang='ca'):
+        """
+        Get ready for the first turn, all at once: Whisper workers load
+        and run a warm-up inference, the page connection opens and the
+        agent runtime is injected, and the canned responses are rendered.
+        
+        Returns seconds per part, 'start' (this call) and 'ready' (since
+        the process was launched; None where that isn't known).
+        """
+        tracer = get_tracer()
+        started = time.time()
+        timings = {}
+        
+        async def timed(name, coro):
+            t = time.time()
+            result = await coro
+            timings[name] = time.time() - t
+            return result
+        
+        async def inject():
+            with tracer.span('inject'):
+                await get_player(self.ws_url)
+        
+        _, _, timings['rendered'] = await asyncio.gather(
+            timed('asr_warm', self.asr.start()),
+            timed('inject', inject()),
+            timed('tts_warm', self.warm_up(lang)))
+        timings['start'] = time.time() - started
+        timings['ready'] = process_uptime()
+        if timings['ready'] is not None:
+            tracer.record('ready', timings['ready'])
+        return timings
     
     async def speak_streaming(self, text, lang='ca'):
         """Stream TTS directly to Jitsi (no CDN upload)."""
         start = time.time()
         
         # Generate TTS to memory
-        tts = gTTS(text, lang=lang)
-        mp3_buffer = io.BytesIO()
-        tts.write_to_fp(mp3_buffer)
-        audio_b64 = base64.b64encode(mp3_buffer.getvalue()).decode('utf-8')
-        
-        # Send to browser
-        async with websockets.connect(self.ws_url) as ws:
-            await ws.send(json.dumps({"id": 1, "method": "Runtime.enable"}))
-            await ws.recv()
-            
-            await ws.send(json.dumps({"id": 2, "method": "Runtime.evaluate", "params": {
-                "expression": f"""
-                    (async () => {{
-                        const b64 = '{audio_b64}';
-                        const binary = atob(b64);
-                        const bytes = new Uint8Array(binary.length);
-                        for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
-                        
-                        const ctx = new AudioContext();
-                        const audioBuffer = await ctx.decodeAudioData(bytes.buffer);
-                        const source = ctx.createBufferSource();
-                        source.buffer = audioBuffer;
-                        const dest = ctx.createMediaStreamDestination();
-                        source.connect(dest);
-                        
-                        const [track] = dest.stream.getAudioTracks();
-                        const jt = await JitsiMeetJS.createLocalTracksFromMediaStreams([{{
-                            stream: dest.stream, mediaType: 'audio', track
-                        }}]);
-                        
-                        for (const t of (APP.conference._room?.getLocalTracks?.() || []))
-                            if (t.getType() === 'audio') await t.dispose();
-                        await APP.conference._room.addTrack(jt[0]);
-                        source.start();
-                        return 'ok';
-                    }})()
-                """,
-                "returnByValue": True,
-                "awaitPromise": True
-            }}))
-            
-            while True:
-                r = json.loads(await ws.recv())
-                if r.get("id") == 2:
-                    break
+        audio = await self.synthesize(text, lang)
+        
+        # Send to the pre-installed page player in bounded chunks
+        player = await get_player(self.ws_url)
+        await player.speak_bytes(audio)
         
         elapsed = time.time() - start
         return elapsed
     
-    def transcribe_fast(self, audio_path, lang='ca'):
-        """Fast transcription with VAD."""
+    async def speak_chunked(self, text, lang='ca'):
+        """
+        Sentence-chunked streaming speak.
+        
+        The first chunk is synthesized and queued right away; later chunks
+        are synthesized in the background and appended to the page's gapless
+        queue as they become ready.
+        
+        Returns (elapsed, time_to_first_audio) in seconds.
+        """
+        start = time.time()
+        chunks = split_for_speech(text)
+        player = await get_player(self.ws_url)
+        
+        limit = asyncio.Semaphore(TTS_CONCURRENCY)
+        
+        async def render(chunk):
+            async with limit:
+                return await self.synthesize(chunk, lang)
+        
+        tasks = [asyncio.create_task(render(c)) for c in chunks]
+        first_audio = None
+        interrupts = player.interrupts
+        try:
+            for task in tasks:
+                audio = await task
+                if player.interrupts != interrupts:
+                    break       # barged in on: don't queue the rest
+                info = await player.enqueue_bytes(audio)
+                if first_audio is None and info.get('startsIn') is not None:
+                    first_audio = time.time() - start + info['startsIn']
+                    get_tracer().record('first_audio', first_audio, chunks=len(chunks))
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        return time.time() - start, first_audio
+    
+    async def interrupt(self, onset):
+        """Barge-in: silence the agent if it is talking when speech starts."""
+        if self.barge_in is None:
+            self.barge_in = BargeInController(await get_player(self.ws_url))
+        cut = await self.barge_in.on_speech_start(onset)
+        if cut:
+            print(f"✋ Barge-in: silent {cut.latency_ms:.0f} ms after onset "
+                  f"(VAD {cut.detection_ms:.0f} ms, stop {cut.rtt * 1000:.0f} ms)")
+        return cut
+    
+    async def listen(self, listener_ws=None, barge_in=True, participant=None, **vad_options):
+        """
+        Continuous listening: yield each Utterance from the listener tab
+        as soon as the speaker stops (trailing-silence endpointing).
+        
+        With barge_in, speech onset while the agent is talking stops it.
+        `participant` (display name) listens to one person only. The
+        agent's own voice is dropped before VAD (echo_gate.py).
+        """
+        if self.echo_gate is None:
+            self.echo_gate = EchoGate(await get_player(self.ws_url))
+        capture = PCMCapture(listener_ws or LISTENER_WS, participant=participant)
+        await capture.start()
+        try:
+            async for event in endpoint(self.echo_gate.filter(capture), **vad_options):
+                if isinstance(event, SpeechStart) and barge_in:
+                    await self.interrupt(event)
+                elif isinstance(event, Utterance):
+                    # Last voiced sample -> utterance handed to us
+                    get_tracer().record('endpoint', event.detected_at - event.end,
+                                        reason=event.reason)
+                    yield event
+        finally:
+            await capture.stop()
+    
+    async def converse(self, listener_ws=None, lang=None, participant=None):
+        """
+        Listen → transcribe → think → speak, one turn per endpointed utterance.
+        
+        Stages run as a pipeline, so capture and transcription of the next
+        utterance carry on while this one's response is being spoken.
+        
+        With lang=None the speaker's language is detected, pinned and
+        answered in (see language.py); a language code fixes it instead.
+        The pin is per capture: per person with `participant`, shared by
+        everyone on the mixed capture without it.
+        """
+        async def utterances():
+            async for utterance in self.listen(listener_ws, participant=participant):
+                yield Turn(utterance, created=utterance.detected_at)
+        
+        async def transcribe(turn):
+            if lang:
+                turn.data['heard'], _ = await self.transcribe_fast(turn.input, lang)
+                turn.data['lang'] = lang
+            else:
+                turn.data['heard'], turn.data['lang'], _ = \
+                    await self.transcribe_tracked(turn.input, participant)
+            print(f"👂 Heard ({turn.input.duration:.1f}s, cut {turn.input.reason}, "
+                  f"{turn.data['lang']}): {turn.data['heard']}")
+            return bool(turn.data['heard'].strip())
+        
+        async def think(turn):
+            turn.data['response'] = self.think(turn.data['heard'], turn.data['lang'])
+        
+        async def speak(turn):
+            await self.speak_chunked(turn.data['response'], turn.data['lang'])
+        
+        pipe = Pipeline().stage('transcribe', transcribe).stage('think', think).stage('speak', speak)
+        async for turn in pipe.run(utterances()):
+            print(f"⏱️  {turn.report()}")
+            if self.on_turn:
+                self.on_turn(turn)
+    
+    async def converse_chat(self, lang=None, speak=False):
+        """
+        Text-mode turns from the meeting chat: think → reply.
+        
+        No capture, decode or Whisper: a typed message goes straight into
+        think() and the answer goes back through the chat send queue
+        (privately if it was a private message). With speak=True it is
+        also spoken.
+        """
+        chat = await get_chat(self.ws_url)
+        lang = lang or self.languages.default
+        
+        async def messages():
+            async for message in chat:
+                yield Turn(message, created=message.timestamp)
+        
+        async def think(turn):
+            turn.data['heard'] = turn.input.text
+            turn.data['response'] = self.think(turn.input.text, lang)
+            print(f"💬 {turn.input.name or turn.input.sender}: {turn.input.text}")
+            return bool(turn.data['response'])
+        
+        async def reply(turn):
+            chat.send(turn.data['response'], to=turn.input.sender if turn.input.private else None)
+            if speak:
+                await self.speak_chunked(turn.data['response'], lang)
+        
+        pipe = Pipeline().stage('think', think).stage('reply', reply)
+        try:
+            async for turn in pipe.run(messages()):
+                print(f"⏱️  {turn.report()}")
+                if self.on_turn:
+                    self.on_turn(turn)
+        finally:
+            await chat.stop()
+    
+    async def converse_streaming(self, listener_ws=None, lang='ca', **vad_options):
+        """
+        Like converse(), but transcribes while the person is still talking.
+        
+        Partial hypotheses are printed as they arrive; whenever the stable
+        (committed) prefix grows and hits a rule whose response doesn't
+        quote the transcript, that response is pre-rendered into the TTS
+        cache, so if the final transcript leads to it it plays without
+        waiting on TTS. Templated responses ({heard}) are never
+        pre-rendered: the partial text won't be what gets spoken.
+        
+        Responses are spoken in a background task so capture keeps
+        flowing; the next speech onset cancels it (barge-in).
+        """
+        if self.echo_gate is None:
+            self.echo_gate = EchoGate(await get_player(self.ws_url))
+        capture = PCMCapture(listener_ws or LISTENER_WS)
+        endpointer = VADEndpointer(**vad_options)
+        stream = None
+        prerender = None
+        prerendered = None
+        reply = None
+        
+        def on_hypothesis(hyp):
+            nonlocal prerender, prerendered
+            print(f"   … {hyp.committed} [{hyp.partial}] ({hyp.pass_seconds:.2f}s)")
+            if not hyp.stable or hyp.final:
+                return
+            response = get_intents().fixed_response(hyp.committed, lang)
+            if response is None or response == prerendered:
+                return
+            if prerender is not None:
+                prerender.cancel()
+            prerendered = response
+            prerender = asyncio.ensure_future(self.tts.warm(split_for_speech(response)[:1], lang))
+        
+        await capture.start()
+        try:
+            async for frame in self.echo_gate.filter(capture):
+                fed = False
+                for event in endpointer.process(frame):
+                    if isinstance(event, SpeechStart):
+                        if reply is not None and not reply.done():
+                            reply.cancel()
+                        await self.interrupt(event)
+                        # Onset frames (pre-roll included) are already buffered
+                        stream = StreamingTranscriber(self.asr, lang, on_hypothesis=on_hypothesis)
+                        for f in endpointer.frames:
+                            stream.feed(f.pcm, f.sample_rate)
+                        fed = True
+                    elif isinstance(event, Utterance) and stream is not None:
+                        final = await stream.finish()
+                        wait = time.time() - event.detected_at
+                        print(f"👂 Heard ({event.duration:.1f}s, {stream.passes} passes): {final.committed} [{wait:.2f}s after endpoint]")
+                        stream = None
+                        if endpointer.in_speech:
+                            # Cut at max length mid-speech: keep transcribing
+                            stream = StreamingTranscriber(self.asr, lang, on_hypothesis=on_hypothesis)
+                            fed = True
+                        response = self.think(final.committed, lang) if final.committed else None
+                        if response:
+                            if reply is not None and not reply.done():
+                                reply.cancel()
+                            reply = asyncio.create_task(self.speak_chunked(response, lang))
+                if stream is not None and not fed:
+                    if endpointer.in_speech:
+                        stream.feed(frame.pcm, frame.sample_rate)
+                    else:
+                        # Too short to count as an utterance
+                        stream.cancel()
+                        stream = None
+        finally:
+            if stream is not None:
+                stream.cancel()
+            for task in (prerender, reply):
+                if task is not None:
+                    task.cancel()
+            await capture.stop()
+    
+    async def transcribe_fast(self, audio, lang='ca'):
+        """
+        Fast transcription with VAD, on the ASR worker pool.
+        
+        `audio` can be a path, encoded bytes, a 16 kHz float32 array or an
+        Utterance; it is decoded in the worker (no ffmpeg, no temp WAV).
+        lang=None lets Whisper detect the language (an extra pass).
+        """
         start = time.time()
-        model = get_whisper_model()
-        
-        # Convert to WAV if needed
-        if not audio_path.endswith('.wav'):
-            wav_path = audio_path.rsplit('.', 1)[0] + '.wav'
-            subprocess.run(['ffmpeg', '-y', '-i', audio_path, '-ar', '16000', '-ac', '1', wav_path], capture_output=True)
-            audio_path = wav_path
-        
-        segments, _ = model.transcribe(
-            audio_path,
-            language=lang,
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=500)
-        )
-        
-        result = " ".join([s.text.strip() for s in segments])
+        result = await self.asr.transcribe(audio, language=lang)
         elapsed = time.time() - start
         
-        return result, elapsed
+        return result.text, elapsed
     
-    def think(self, heard):
-        """Generate response based on input."""
-        heard_lower = heard.lower()
+    async def transcribe_tracked(self, audio, speaker=None):
+        """
+        Transcribe in the speaker's pinned language, detecting it while
+        it isn't known yet or when the pinned transcript looks wrong.
         
-        if "hola" in heard_lower:
-            return "Hola! Com estàs?"
-        elif "com" in heard_lower and "estàs" in heard_lower:
-            return "Estic bé, gràcies! I tu?"
-        elif "adéu" in heard_lower:
-            return "Adéu! Fins aviat!"
-        else:
-            return f"He entès: {heard}"
+        Returns (text, language, elapsed).
+        """
+        start = time.time()
+        tracker = self.languages
+        language = tracker.language_for(speaker)
+        result = await self.asr.transcribe(audio, language=language)
+        if language is not None and not tracker.confirm(speaker, result):
+            # Confidence dropped: maybe they switched language, detect again
+            with get_tracer().span('language_redetect', pinned=language):
+                result = await self.asr.transcribe(audio, language=None)
+            language = None
+        if language is None:
+            tracker.detected(speaker, result)
+        return result.text, tracker.language(speaker), time.time() - start
     
-    async def loop_iteration(self, input_text):
-        """Run one loop iteration with timing."""
-        timings = {}
+    def think(self, heard, lang='ca'):
+        """Generate response based on input (rules in intents.json)."""
+        return get_intents().respond(heard, lang)
+    
+    async def loopback_audio(self, text, lang='ca'):
+        """
+        The audio the agent just spoke, as Whisper input.
         
-        # 1. Generate and speak
-        print(f"🎤 Speaking: {input_text}")
-        timings['speak'] = await self.speak_streaming(input_text)
+        Reassembled from the chunks speak_chunked rendered; they come back
+        from the TTS cache, so nothing is synthesized a second time, and a
+        phrase already decoded in an earlier turn isn't decoded again.
+        """
+        chunks = await asyncio.gather(*(self.synthesize(c, lang) for c in split_for_speech(text)))
+        if len(chunks) == 1:
+            return await asyncio.to_thread(chunks[0].float32)
+        return await asyncio.to_thread(lambda: np.concatenate([c.float32() for c in chunks]))
+    
+    def turn_pipeline(self, lang='ca'):
+        """
+        Demo (loopback) turn as a stage graph:
         
-        # 2. Transcribe (local loopback for demo)
-        tts = gTTS(input_text, lang='ca')
-        tmp = tempfile.mktemp(suffix='.mp3')
-        tts.save(tmp)
+            speak ──┬─ playback
+                    └─ loopback → transcribe → think → respond
         
-        print("👂 Transcribing...")
-        heard, timings['transcribe'] = self.transcribe_fast(tmp)
-        print(f"   Heard: {heard}")
+        Hearing ourselves runs alongside playback instead of after it.
+        """
+        async def speak_and_hear(turn):
+            async def play():
+                async with turn.span('speak'):
+                    turn.data['timings']['speak'], turn.data['first_audio']['speak'] = \
+                        await self.speak_chunked(turn.input, lang)
+            
+            async def hear():
+                async with turn.span('loopback'):
+                    audio = await self.loopback_audio(turn.input, lang)
+                async with turn.span('transcribe'):
+                    turn.data['heard'], turn.data['timings']['transcribe'] = \
+                        await self.transcribe_fast(audio, lang)
+            
+            print(f"🎤 Speaking: {turn.input}")
+            turn.data.update(timings={}, first_audio={})
+            await asyncio.gather(play(), hear())
+            print(f"   Heard: {turn.data['heard']}")
         
-        # 3. Think
-        response = self.think(heard)
-        print(f"🧠 Response: {response}")
+        async def think(turn):
+            turn.data['response'] = self.think(turn.data['heard'], lang)
+            print(f"🧠 Response: {turn.data['response']}")
         
-        # 4. Speak response
-        timings['respond'] = await self.speak_streaming(response)
+        async def respond(turn):
+            turn.data['timings']['respond'], turn.data['first_audio']['respond'] = \
+                await self.speak_chunked(turn.data['response'], lang)
         
-        return {
-            'input': input_text,
-            'heard': heard,
-            'response': response,
-            'timings': timings
-        }
+        return (Pipeline()
+                .stage('speak+hear', speak_and_hear)
+                .stage('think', think)
+                .stage('respond', respond))
+    
+    async def run_turns(self, inputs, lang='ca'):
+        """Run several loopback turns through one pipeline; yields result dicts."""
+        async for turn in self.turn_pipeline(lang).run(inputs):
+            if self.on_turn:
+                self.on_turn(turn)
+            if turn.error is not None:
+                raise turn.error
+            yield {
+                'input': turn.input,
+                'heard': turn.data['heard'],
+                'response': turn.data['response'],
+                'timings': turn.data['timings'],
+                'first_audio': turn.data['first_audio'],
+                'latency': turn.latency,
+                'critical_path': turn.report(),
+                'bottleneck': turn.bottleneck(),
+                # Conversions, bytes copied and peak live audio bytes
+                'audio': get_audio_stats().pop(turn.id),
+            }
+    
+    async def loop_iteration(self, input_text):
+        """Run one loop iteration with timing."""
+        results = [r async for r in self.run_turns([input_text])]
+        return results[0]
 
 
 async def demo():
@@ -164,6 +484,12 @@ async def demo():
     print("=" * 40)
     
     agent = RealtimeVideoCallAgent()
+    startup = await agent.start()
+    print(f"🔥 Ready in {startup['start']:.2f}s: Whisper x{agent.asr.workers} {startup['asr_warm']:.2f}s "
+          f"∥ inject {startup['inject']:.2f}s ∥ TTS warm {startup['tts_warm']:.2f}s "
+          f"({startup['rendered']} new phrases)")
+    if startup['ready'] is not None:
+        print(f"   Launch to ready: {startup['ready']:.2f}s")
     
     result = await agent.loop_iteration("Hola Victor! Com estàs avui?")
     
@@ -171,8 +497,33 @@ async def demo():
     print(f"   Speak:      {result['timings']['speak']:.2f}s")
     print(f"   Transcribe: {result['timings']['transcribe']:.2f}s")
     print(f"   Respond:    {result['timings']['respond']:.2f}s")
-    total = sum(result['timings'].values())
-    print(f"   TOTAL:      {total:.2f}s")
+    print(f"   First audio (response): {result['first_audio']['respond']:.2f}s")
+    print(f"   Critical path: {result['critical_path']}")
+    print(f"   Bounded by: {result['bottleneck']}")
+    
+    await agent.asr.close()
+    
+    # One outgoing track for the whole call: trackSwaps should stay at 1
+    player = await get_player(agent.ws_url)
+    print(f"🔈 Page output: {await player.resources()}")
+    if agent.barge_in:
+        print(f"✋ Barge-in: {agent.barge_in.stats()}")
+    for tier, t in agent.asr.stats().get('tiers', {}).items():
+        print(f"🧵 ASR {tier}: {t['routed']} routed, {t['escalated_to']} escalations, "
+              f"{t['avg_latency']:.2f}s avg, {t['over_budget']} over budget")
+    if agent.echo_gate:
+        print(f"🔇 Echo gate: {agent.echo_gate.stats()}")
+    if agent.languages.speakers:
+        print(f"🌐 Languages: {agent.languages.stats()}")
+    
+    print("\n🔬 Stage latency (p50 / p95 / p99):")
+    for stage, h in get_tracer().summary().items():
+        if h['count']:
+            print(f"   {stage:<14} {h['p50'] * 1000:7.0f} {h['p95'] * 1000:7.0f} {h['p99'] * 1000:7.0f} ms  (n={h['count']})")
+    
+    stats = get_tts_cache().stats()
+    print(f"\n💾 TTS cache: {stats['hit_rate']:.0%} hit rate, "
+          f"{stats['memory_bytes'] / 1024:.0f} KB in memory, {stats['disk_bytes'] / 1024:.0f} KB on disk")
 
 
 if __name__ == '__main__':
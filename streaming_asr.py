@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Incremental Streaming Transcription
+===================================
+
+Transcribes a turn while the person is still talking. The growing audio
+buffer is re-decoded every `step_ms` on the ASR pool:
+
+- partial: the latest hypothesis for audio not committed yet
+- stable:  words that two consecutive passes agree on are committed
+           (local agreement), and the audio behind them is trimmed off
+           the buffer, so each pass only re-decodes the uncommitted tail
+
+Compute per pass stays bounded on long turns, and think() can start on
+the committed prefix before the speaker finishes. With a TieredASR, every
+pass after the first is pinned to the first pass's model, so consecutive
+hypotheses stay comparable.
+
+Usage:
+    stream = StreamingTranscriber(asr, language='ca', on_hypothesis=print)
+    for frame in frames:
+        stream.feed(frame.pcm, frame.sample_rate)
+    final = await stream.finish()
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from audio_decode import WHISPER_SAMPLE_RATE, pcm16_to_float32, resample
+
+_NORMALIZE = re.compile(r"[^\w']+")
+
+
+@dataclass
+class Hypothesis:
+    committed: str          # everything committed so far this turn
+    stable: str             # text committed by this pass
+    partial: str            # uncommitted tail (may still change)
+    final: bool
+    buffer_seconds: float   # audio re-decoded by this pass
+    pass_seconds: float     # wall time of this pass
+
+    @property
+    def text(self) -> str:
+        return f"{self.committed} {self.partial}".strip()
+
+
+def _norm(word: str) -> str:
+    return _NORMALIZE.sub('', word.lower())
+
+
+class StreamingTranscriber:
+    """Sliding-window re-decoding with local-agreement commits."""
+
+    def __init__(self, asr, language: Optional[str] = 'ca', step_ms: int = 1000,
+                 min_audio_ms: int = 800, max_buffer_s: float = 12.0,
+                 on_hypothesis: Optional[Callable[[Hypothesis], None]] = None):
+        self.asr = asr
+        self.language = language
+        self.step = step_ms / 1000
+        self.min_audio = min_audio_ms / 1000
+        self.max_buffer = max_buffer_s
+        self.on_hypothesis = on_hypothesis
+
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0.0        # turn time of buffer[0], seconds
+        self.committed: List[dict] = []
+        self._previous: List[dict] = []  # last pass's uncommitted words
+        self._decoded_until = 0.0       # buffer length at the last pass
+        self._task = None
+        self.latest: Optional[Hypothesis] = None
+        self.passes = 0
+        self.tier: Optional[str] = None  # TieredASR model used for this utterance
+
+    @property
+    def committed_text(self) -> str:
+        return "".join(w['word'] for w in self.committed).strip()
+
+    def feed(self, pcm: bytes, sample_rate: int = WHISPER_SAMPLE_RATE):
+        """Append PCM16 audio; starts a background pass when enough is new."""
+        audio = resample(pcm16_to_float32(pcm), sample_rate)
+        self.buffer = np.concatenate([self.buffer, audio])
+        seconds = len(self.buffer) / WHISPER_SAMPLE_RATE
+        if seconds < self.min_audio or seconds - self._decoded_until < self.step:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._pass(final=False))
+
+    async def _decode(self):
+        prompt = self.committed_text[-200:] or None
+        options = {'tier': self.tier} if self.tier else {}
+        result = await self.asr.transcribe(
+            self.buffer, language=self.language, word_timestamps=True,
+            condition_on_previous_text=False, vad_filter=False,
+            initial_prompt=prompt, **options)
+        if getattr(self.asr, 'tiers', None):
+            self.tier = result.model
+        return [dict(w, start=w['start'] + self.buffer_offset, end=w['end'] + self.buffer_offset)
+                for seg in result.segments for w in seg.get('words', [])]
+
+    def _commit(self, words: List[dict]):
+        if not words:
+            return
+        self.committed.extend(words)
+        # Trim committed audio off the front of the buffer
+        cut = int((words[-1]['end'] - self.buffer_offset) * WHISPER_SAMPLE_RATE)
+        cut = max(0, min(cut, len(self.buffer)))
+        self.buffer = self.buffer[cut:]
+        self.buffer_offset += cut / WHISPER_SAMPLE_RATE
+        self._decoded_until = max(0.0, self._decoded_until - cut / WHISPER_SAMPLE_RATE)
+
+    async def _pass(self, final: bool) -> Hypothesis:
+        started = time.time()
+        buffer_seconds = len(self.buffer) / WHISPER_SAMPLE_RATE
+        self._decoded_until = buffer_seconds
+        words = await self._decode() if buffer_seconds > 0 else []
+        self.passes += 1
+
+        if final:
+            agreed = len(words)
+        else:
+            agreed = 0
+            for a, b in zip(self._previous, words):
+                if _norm(a['word']) != _norm(b['word']):
+                    break
+                agreed += 1
+            # Runaway buffer: force-commit words that are well behind the edge
+            if len(self.buffer) / WHISPER_SAMPLE_RATE > self.max_buffer:
+                edge = self.buffer_offset + len(self.buffer) / WHISPER_SAMPLE_RATE - 2.0
+                while agreed < len(words) and words[agreed]['end'] < edge:
+                    agreed += 1
+
+        stable = words[:agreed]
+        self._commit(stable)
+        self._previous = words[agreed:]
+
+        hypothesis = Hypothesis(
+            committed=self.committed_text,
+            stable="".join(w['word'] for w in stable).strip(),
+            partial="".join(w['word'] for w in self._previous).strip(),
+            final=final,
+            buffer_seconds=buffer_seconds,
+            pass_seconds=time.time() - started,
+        )
+        self.latest = hypothesis
+        if self.on_hypothesis:
+            self.on_hypothesis(hypothesis)
+        return hypothesis
+
+    async def finish(self) -> Hypothesis:
+        """Speaker stopped: decode what's left and commit everything."""
+        if self._task is not None and not self._task.done():
+            await asyncio.gather(self._task, return_exceptions=True)
+        return await self._pass(final=True)
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
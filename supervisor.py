@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Multi-Room Supervisor
+=====================
+
+Runs many agent sessions (one per Jitsi room) on a single asyncio loop.
+All sessions share the expensive parts:
+
+- one TTS engine + content-addressed cache (tts_engines / tts_cache)
+- one Whisper worker pool (asr_pool)
+- one CDP connection per page (cdp.get_manager)
+
+Fairness: TTS renders and ASR jobs go through a FairGate, which caps
+how many slots one session may hold and hands freed slots to waiting
+sessions round-robin, so one chatty room can't starve the others.
+
+Crashed sessions are restarted with backoff. Aggregate metrics: turns
+per second, concurrent active speakers, queue depths (also exported as
+Prometheus text through the tracer's /metrics endpoint).
+
+Usage:
+    python supervisor.py rooms.json
+    # rooms.json: [{"name": "room-a", "speaker_ws": "ws://...", "listener_ws": "ws://...",
+    #               "chat": true}]
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from asr_pool import get_asr_service
+from cdp import CDPError
+from page_player import get_player, peek_player
+from realtime_loop import RealtimeVideoCallAgent
+from tracing import get_tracer, process_uptime
+from tts_engines import CachedTTSEngine, TTSEngine, get_tts_engine
+
+# Window for the turns/sec rate
+RATE_WINDOW = 60.0
+
+
+class FairGate:
+    """
+    Shared capacity with a per-session cap and round-robin hand-off.
+
+    `capacity` slots in total; one session holds at most `per_session`.
+    When a slot frees up it goes to the next session in rotation that is
+    waiting and under its cap, not to whoever asked first.
+    """
+
+    def __init__(self, capacity: int, per_session: int = 1):
+        self.capacity = capacity
+        self.per_session = per_session
+        self.in_use = 0
+        self.held: Dict[str, int] = {}
+        self.waiting: Dict[str, deque] = {}
+        self._rotation = deque()
+        self.waits = 0
+
+    def _can_take(self, session: str) -> bool:
+        return self.in_use < self.capacity and self.held.get(session, 0) < self.per_session
+
+    def _take(self, session: str):
+        self.in_use += 1
+        self.held[session] = self.held.get(session, 0) + 1
+
+    def _wake_next(self):
+        for _ in range(len(self._rotation)):
+            session = self._rotation[0]
+            self._rotation.rotate(-1)
+            queue = self.waiting.get(session)
+            while queue and queue[0].done():
+                queue.popleft()     # cancelled waiter
+            if queue and self._can_take(session):
+                self._take(session)
+                queue.popleft().set_result(None)
+                if self.in_use >= self.capacity:
+                    return
+
+    async def acquire(self, session: str):
+        if self._can_take(session) and not self.waiting.get(session):
+            self._take(session)
+            return
+        self.waits += 1
+        waiter = asyncio.get_running_loop().create_future()
+        if session not in self.waiting:
+            self.waiting[session] = deque()
+            self._rotation.append(session)
+        self.waiting[session].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(session)   # granted just as we were cancelled
+            raise
+
+    def release(self, session: str):
+        self.in_use -= 1
+        self.held[session] -= 1
+        self._wake_next()
+
+    def slot(self, session: str) -> '_Slot':
+        return _Slot(self, session)
+
+    def queued(self) -> int:
+        return sum(len(q) for q in self.waiting.values())
+
+
+class _Slot:
+    def __init__(self, gate: FairGate, session: str):
+        self.gate = gate
+        self.session = session
+
+    async def __aenter__(self):
+        await self.gate.acquire(self.session)
+
+    async def __aexit__(self, *exc):
+        self.gate.release(self.session)
+
+
+class GatedTTSEngine(TTSEngine):
+    """A session's view of the shared engine: renders go through the gate."""
+
+    def __init__(self, engine: TTSEngine, gate: FairGate, session: str):
+        self.engine = engine
+        self.gate = gate
+        self.session = session
+        self.name = engine.name
+        self.format = engine.format
+        self.default_voice = engine.default_voice
+        self.voices = engine.voices
+        self.languages = engine.languages
+        self.sample_rate = getattr(engine, 'sample_rate', None)
+
+    def render(self, text, language, voice=None):
+        return self.engine.render(text, language, voice)
+
+    def describe(self, data, voice=None):
+        return self.engine.describe(data, voice)
+
+    async def synthesize(self, text, language, voice=None):
+        async with self.gate.slot(self.session):
+            return await self.engine.synthesize(text, language, voice)
+
+
+class GatedASR:
+    """A session's view of the shared ASR pool; never closes it."""
+
+    def __init__(self, asr, gate: FairGate, session: str):
+        self.asr = asr
+        self.gate = gate
+        self.session = session
+
+    def __getattr__(self, name):
+        return getattr(self.asr, name)
+
+    async def transcribe(self, audio, language='ca', wait=True, **options):
+        async with self.gate.slot(self.session):
+            return await self.asr.transcribe(audio, language=language, wait=wait, **options)
+
+    async def close(self):
+        pass    # shared: the supervisor owns the pool
+
+
+@dataclass
+class SessionConfig:
+    name: str
+    speaker_ws: str
+    listener_ws: Optional[str] = None
+    language: Optional[str] = None     # None: detect and pin per speaker
+    chat: bool = False          # also take text turns from the meeting chat
+
+
+@dataclass
+class Session:
+    config: SessionConfig
+    agent: RealtimeVideoCallAgent
+    task: Optional[asyncio.Task] = None
+    state: str = 'created'      # created | running | restarting | stopped
+    turns: int = 0
+    restarts: int = 0
+    last_error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+
+
+async def converse(agent: RealtimeVideoCallAgent, config: SessionConfig):
+    """Default session: voice turns, plus chat turns (no ASR slot) if enabled."""
+    if not config.chat:
+        return await agent.converse(config.listener_ws, config.language)
+    tasks = [asyncio.ensure_future(agent.converse(config.listener_ws, config.language)),
+             asyncio.ensure_future(agent.converse_chat(config.language))]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class Supervisor:
+    """Owns the shared services and one task per session."""
+
+    def __init__(self, tts_engine: Optional[TTSEngine] = None, asr=None,
+                 tts_slots: int = 8, asr_slots: Optional[int] = None, per_session: int = 2,
+                 max_sessions: int = 64, restart_delay: float = 2.0, max_restart_delay: float = 60.0,
+                 run: Optional[Callable[[RealtimeVideoCallAgent, SessionConfig], Awaitable]] = None):
+        engine = tts_engine or get_tts_engine(cached=False)
+        # The raw engine is shared; each session gets its own gate + cache front
+        self.engine = engine.engine if isinstance(engine, CachedTTSEngine) else engine
+        self.asr = asr or get_asr_service()
+        self.tts_gate = FairGate(tts_slots, per_session)
+        self.asr_gate = FairGate(asr_slots or (self.asr.workers + 2), per_session)
+        self.max_sessions = max_sessions
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.run_session = run or converse
+        self.sessions: Dict[str, Session] = {}
+        self._turn_times = deque()
+        self.turns_total = 0
+        self.started = False
+        self.startup = None
+        get_tracer().add_collector(self.prometheus)
+
+    def _agent(self, config: SessionConfig) -> RealtimeVideoCallAgent:
+        tts = CachedTTSEngine(GatedTTSEngine(self.engine, self.tts_gate, config.name))
+        asr = GatedASR(self.asr, self.asr_gate, config.name)
+        return RealtimeVideoCallAgent(ws_url=config.speaker_ws, tts_engine=tts, asr=asr)
+
+    def add(self, config: SessionConfig) -> Session:
+        if config.name in self.sessions:
+            raise ValueError(f"Session {config.name} already exists")
+        if len(self.sessions) >= self.max_sessions:
+            raise RuntimeError(f"At capacity ({self.max_sessions} sessions)")
+        session = Session(config, self._agent(config))
+        session.agent.on_turn = lambda turn, s=session: self._on_turn(s, turn)
+        self.sessions[config.name] = session
+        if self.started:
+            session.task = asyncio.create_task(self._supervise(session))
+        return session
+
+    async def remove(self, name: str):
+        session = self.sessions.pop(name)
+        if session.task:
+            session.task.cancel()
+            await asyncio.gather(session.task, return_exceptions=True)
+        session.state = 'stopped'
+
+    def _on_turn(self, session: Session, turn):
+        if turn.dropped or turn.error is not None:
+            return
+        session.turns += 1
+        self.turns_total += 1
+        self._turn_times.append(time.time())
+
+    async def _supervise(self, session: Session):
+        delay = self.restart_delay
+        while True:
+            session.state = 'running'
+            session.started_at = time.time()
+            try:
+                await self.run_session(session.agent, session.config)
+                session.state = 'stopped'
+                return
+            except asyncio.CancelledError:
+                session.state = 'stopped'
+                raise
+            except Exception as e:
+                session.last_error = f"{type(e).__name__}: {e}"
+                print(f"💥 {session.config.name}: {session.last_error} (restart in {delay:.0f}s)")
+            # Reset the backoff after a session that ran for a while
+            if time.time() - session.started_at > self.max_restart_delay:
+                delay = self.restart_delay
+            session.state = 'restarting'
+            session.restarts += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_restart_delay)
+
+    async def _inject(self, session: Session):
+        try:
+            await get_player(session.agent.ws_url)
+        except (OSError, CDPError) as e:
+            # The session's own run will retry (and restart) as needed
+            print(f"⚠️ {session.config.name}: inject failed: {e}")
+
+    async def start(self):
+        """
+        Warm the shared ASR pool while every room's page gets the agent
+        runtime injected, then start every session.
+        """
+        started = time.time()
+        await asyncio.gather(self.asr.start(),
+                             *(self._inject(s) for s in self.sessions.values()))
+        self.startup = time.time() - started
+        ready = process_uptime()
+        if ready is not None:
+            get_tracer().record('ready', ready, sessions=len(self.sessions))
+        self.started = True
+        for session in self.sessions.values():
+            if session.task is None:
+                session.task = asyncio.create_task(self._supervise(session))
+
+    async def wait(self):
+        await asyncio.gather(*(s.task for s in self.sessions.values() if s.task),
+                             return_exceptions=True)
+
+    async def stop(self):
+        for name in list(self.sessions):
+            await self.remove(name)
+        await self.asr.close()
+
+    def active_speakers(self) -> int:
+        """Sessions whose agent is audible right now."""
+        count = 0
+        for session in self.sessions.values():
+            player = peek_player(session.agent.ws_url)
+            if player is not None and player.speaking:
+                count += 1
+        return count
+
+    def turns_per_second(self) -> float:
+        cutoff = time.time() - RATE_WINDOW
+        while self._turn_times and self._turn_times[0] < cutoff:
+            self._turn_times.popleft()
+        return len(self._turn_times) / RATE_WINDOW
+
+    def metrics(self) -> dict:
+        states = {}
+        for session in self.sessions.values():
+            states[session.state] = states.get(session.state, 0) + 1
+        return {
+            'sessions': len(self.sessions),
+            'states': states,
+            'turns_total': self.turns_total,
+            'turns_per_second': self.turns_per_second(),
+            'active_speakers': self.active_speakers(),
+            'asr_queued': self.asr_gate.queued(),
+            'asr_in_use': self.asr_gate.in_use,
+            'tts_queued': self.tts_gate.queued(),
+            'tts_in_use': self.tts_gate.in_use,
+            'language_passes_saved': sum(s.agent.languages.saved for s in self.sessions.values()),
+            'capture_dropped_seconds': sum(s.agent.echo_gate.dropped_seconds
+                                           for s in self.sessions.values() if s.agent.echo_gate),
+            'capture_processed_seconds': sum(s.agent.echo_gate.processed_seconds
+                                             for s in self.sessions.values() if s.agent.echo_gate),
+        }
+
+    def prometheus(self) -> str:
+        m = self.metrics()
+        lines = []
+        for key in ('sessions', 'turns_per_second', 'active_speakers',
+                    'asr_queued', 'asr_in_use', 'tts_queued', 'tts_in_use'):
+            lines.append(f'# TYPE victoria_{key} gauge')
+            lines.append(f'victoria_{key} {m[key]}')
+        lines.append('# TYPE victoria_turns_total counter')
+        lines.append(f'victoria_turns_total {m["turns_total"]}')
+        lines.append('# TYPE victoria_language_passes_saved_total counter')
+        lines.append(f'victoria_language_passes_saved_total {m["language_passes_saved"]}')
+        # Captured audio: dropped as our own echo vs sent on to VAD/ASR
+        for key in ('capture_dropped_seconds', 'capture_processed_seconds'):
+            lines.append(f'# TYPE victoria_{key}_total counter')
+            lines.append(f'victoria_{key}_total {m[key]:.3f}')
+        lines.append('# TYPE victoria_session_turns_total counter')
+        for session in self.sessions.values():
+            lines.append(f'victoria_session_turns_total{{session="{session.config.name}"}} {session.turns}')
+        tiers = self.asr.stats().get('tiers', {})
+        if tiers:
+            lines.append('# TYPE victoria_asr_tier_routed_total counter')
+            for tier, t in tiers.items():
+                lines.append(f'victoria_asr_tier_routed_total{{tier="{tier}"}} {t["routed"]}')
+            lines.append('# TYPE victoria_asr_tier_escalated_total counter')
+            for tier, t in tiers.items():
+                lines.append(f'victoria_asr_tier_escalated_total{{tier="{tier}"}} {t["escalated_to"]}')
+            lines.append('# TYPE victoria_asr_tier_over_budget_total counter')
+            for tier, t in tiers.items():
+                lines.append(f'victoria_asr_tier_over_budget_total{{tier="{tier}"}} {t["over_budget"]}')
+        return '\n'.join(lines) + '\n'
+
+
+async def main(rooms_file: str, metrics_port: int = 9464):
+    with open(rooms_file) as f:
+        rooms = [SessionConfig(**room) for room in json.load(f)]
+
+    supervisor = Supervisor()
+    for room in rooms:
+        supervisor.add(room)
+    print(f"🏢 Supervising {len(rooms)} rooms")
+    server = await get_tracer().serve(metrics_port)
+    await supervisor.start()
+    print(f"🔥 Ready in {supervisor.startup:.2f}s (Whisper warm-up ∥ {len(rooms)} injects)")
+    print(f"📈 Metrics on http://127.0.0.1:{metrics_port}/metrics")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            m = supervisor.metrics()
+            print(f"   {m['states']} | {m['turns_per_second'] * 60:.1f} turns/min | "
+                  f"{m['active_speakers']} speaking | ASR queue {m['asr_queued']}")
+    finally:
+        server.close()
+        await supervisor.stop()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python supervisor.py rooms.json")
+        sys.exit(1)
+    asyncio.run(main(sys.argv[1]))
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Chrome Target Registry
+======================
+
+Keeps an in-memory index of the Jitsi pages in a Chrome instance,
+driven by DevTools events instead of polling `/json/list`:
+
+- One browser-level CDP connection with Target.setDiscoverTargets;
+  targetCreated / targetInfoChanged / targetDestroyed / targetCrashed
+  keep the index current
+- Looking up a page is a dict read: no HTTP round trip per loop
+  iteration, nothing blocking the event loop
+- Pages that appear (or come back after a crash) get the agent runtime
+  injected right away; destroyed or crashed pages drop their pooled
+  CDP connection so the next call reconnects cleanly
+- If Chrome itself goes away, the registry reconnects with backoff
+
+Usage:
+    registry = await get_registry(18800)
+    page_id = await registry.wait_for_page()
+    ws_url = registry.page_url(page_id)
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import json
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, List, Optional
+
+import websockets
+
+from cdp import CDPConnection, CDPError, get_manager
+from page_player import get_player, peek_player
+
+
+def is_jitsi_page(info: dict) -> bool:
+    """Default matcher: a page whose title or URL says Jitsi."""
+    if info.get("type") != "page":
+        return False
+    return "jitsi" in info.get("title", "").lower() or "jitsi" in info.get("url", "").lower()
+
+
+class TargetRegistry:
+    """Live index of one Chrome instance's page targets."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1",
+                 match: Callable[[dict], bool] = is_jitsi_page, auto_install: bool = True,
+                 retry_delay: float = 1.0, max_retry_delay: float = 30.0):
+        self.port = port
+        self.host = host
+        self.match = match
+        self.auto_install = auto_install
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.targets: Dict[str, dict] = {}      # targetId -> targetInfo (pages only)
+        self.crashed = set()
+        self.conn: Optional[CDPConnection] = None
+        self._changed = asyncio.Condition()
+        self._ready = asyncio.Event()
+        self._task = None
+        self._installs: Dict[str, asyncio.Task] = {}
+        self.reconnects = 0
+
+    # -- lookups ---------------------------------------------------------
+
+    def pages(self) -> List[dict]:
+        """Matching pages that are alive, oldest first."""
+        return [info for tid, info in self.targets.items()
+                if tid not in self.crashed and self.match(info)]
+
+    def page_id(self) -> Optional[str]:
+        pages = self.pages()
+        return pages[0]["targetId"] if pages else None
+
+    def page_url(self, target_id: str) -> str:
+        return f"ws://{self.host}:{self.port}/devtools/page/{target_id}"
+
+    async def wait_for_page(self, timeout: Optional[float] = None) -> str:
+        """Id of a matching page, waiting for one to show up if needed."""
+        async def first():
+            await self._ready.wait()
+            async with self._changed:
+                await self._changed.wait_for(self.page_id)
+                return self.page_id()
+        return await asyncio.wait_for(first(), timeout)
+
+    # -- lifecycle -------------------------------------------------------
+
+    async def start(self, timeout: Optional[float] = 10.0):
+        """Connect and wait for the initial target snapshot."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        if not self._ready.is_set():
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        return self
+
+    async def _browser_url(self) -> str:
+        # The only HTTP request: the browser endpoint carries a per-launch id
+        def fetch():
+            with urllib.request.urlopen(f"http://{self.host}:{self.port}/json/version",
+                                        timeout=5) as r:
+                return json.loads(r.read())["webSocketDebuggerUrl"]
+        return await asyncio.to_thread(fetch)
+
+    async def _run(self):
+        delay = self.retry_delay
+        while True:
+            try:
+                self.conn = CDPConnection(await self._browser_url(), domains=())
+                await self.conn.connect()
+                self.conn.on("Target.targetCreated", self._on_info)
+                self.conn.on("Target.targetInfoChanged", self._on_info)
+                self.conn.on("Target.targetDestroyed", self._on_destroyed)
+                self.conn.on("Target.targetCrashed", self._on_crashed)
+                # Chrome replays targetCreated for everything that already exists
+                await self.conn.send("Target.setDiscoverTargets", {"discover": True})
+                self._ready.set()
+                delay = self.retry_delay
+                await self.conn.wait_closed()
+                print(f"⚠️ Lost Chrome on port {self.port}, reconnecting...")
+            except (OSError, urllib.error.URLError, websockets.WebSocketException,
+                    CDPError, KeyError, ValueError) as e:
+                # Handshake errors (Chrome answering 500 while it starts) included
+                print(f"⚠️ Chrome on port {self.port} unavailable: {e}")
+            except Exception as e:
+                # Never let the reconnect loop die quietly: wait_for_page would hang
+                print(f"⚠️ Chrome on port {self.port}: unexpected {type(e).__name__}: {e}")
+            if self.conn is not None:
+                # Failed after connect() (e.g. setDiscoverTargets): don't leak the socket
+                await asyncio.gather(self.conn.close(), return_exceptions=True)
+                self.conn = None
+            self.reconnects += 1
+            self.targets.clear()
+            self.crashed.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.conn is not None:
+            await self.conn.close()
+        for task in self._installs.values():
+            task.cancel()
+
+    # -- events ----------------------------------------------------------
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _on_info(self, method: str, params: dict):
+        info = params["targetInfo"]
+        if info.get("type") != "page":
+            return
+        target_id = info["targetId"]
+        was_match = target_id in self.targets and target_id not in self.crashed \
+            and self.match(self.targets[target_id])
+        self.targets[target_id] = info
+        recovered = target_id in self.crashed
+        self.crashed.discard(target_id)
+        # Titles arrive late: a blank new tab becomes "Jitsi Meet" once loaded
+        if self.match(info) and (not was_match or recovered):
+            if self.auto_install:
+                self._install(target_id)
+            return self._notify()
+
+    def _on_destroyed(self, method: str, params: dict):
+        target_id = params["targetId"]
+        self.targets.pop(target_id, None)
+        self.crashed.discard(target_id)
+        return self._forget(target_id)
+
+    def _on_crashed(self, method: str, params: dict):
+        target_id = params["targetId"]
+        self.crashed.add(target_id)
+        print(f"💥 Page {target_id} crashed ({params.get('status')})")
+        return self._forget(target_id)
+
+    async def _forget(self, target_id: str):
+        task = self._installs.pop(target_id, None)
+        if task is not None:
+            task.cancel()
+        await get_manager().drop(self.page_url(target_id))
+        await self._notify()
+
+    def _install(self, target_id: str):
+        """Connect and inject the runtime now, off the caller's path."""
+        task = self._installs.get(target_id)
+        if task is not None and not task.done():
+            return
+        url = self.page_url(target_id)
+
+        async def install():
+            player = peek_player(url)
+            if player is not None and player.conn.is_open:
+                # Same socket, new renderer: the reload handler may not have fired
+                player._agent_id = None
+            try:
+                await get_player(url)
+            except (OSError, CDPError) as e:
+                print(f"⚠️ Could not install agent in {target_id}: {e}")
+        self._installs[target_id] = asyncio.ensure_future(install())
+
+
+_registries: Dict[tuple, TargetRegistry] = {}
+
+
+async def get_registry(port: int, host: str = "127.0.0.1", timeout: Optional[float] = 10.0,
+                       **options) -> TargetRegistry:
+    """
+    One started registry per Chrome instance.
+
+    Raises asyncio.TimeoutError if the first snapshot hasn't arrived
+    within `timeout`; the registry keeps trying in the background.
+    """
+    key = (host, port)
+    registry = _registries.get(key)
+    if registry is None:
+        registry = _registries[key] = TargetRegistry(port, host, **options)
+    await registry.start(timeout)
+    return registry
@@ -0,0 +1,64 @@
+import math
+from types import SimpleNamespace
+
+from capture import AudioFrame
+from echo_gate import EchoGate
+
+RATE = 16000
+FRAME = 0.02
+T0 = 1000.0
+
+
+class FakePlayer:
+    def __init__(self):
+        self.listeners = []
+
+    def on_playback(self, callback):
+        self.listeners.append(callback)
+        return lambda: self.listeners.remove(callback)
+
+    def emit(self, event, clip_id=1, at=T0):
+        handle = SimpleNamespace(clip_id=clip_id, started_at=at, ended_at=at)
+        for callback in self.listeners:
+            callback(handle, event)
+
+
+def tone(db, seq):
+    """A 20 ms 440 Hz frame at `db` dBFS RMS."""
+    amplitude = 32768 * 10 ** (db / 20) * math.sqrt(2)
+    n = int(RATE * FRAME)
+    samples = [int(amplitude * math.sin(2 * math.pi * 440 * i / RATE)) for i in range(n)]
+    pcm = b''.join(max(-32768, min(32767, s)).to_bytes(2, 'little', signed=True) for s in samples)
+    return AudioFrame(seq=seq, timestamp=T0 + seq * FRAME, sample_rate=RATE, pcm=pcm)
+
+
+def test_rising_echo_is_never_admitted():
+    player = FakePlayer()
+    gate = EchoGate(player)
+    player.emit('start')
+    # Steep onset (7 dB per frame), then the echo keeps growing over the
+    # clip with syllable-to-syllable swings
+    levels = [-48, -41, -34, -27] + [-27 + 0.2 * i + (2 if i % 3 else -2) for i in range(70)]
+    admitted = [gate.admit(tone(db, i)) for i, db in enumerate(levels)]
+    assert not any(admitted)
+    assert gate.stats()['overlap_seconds'] == 0.0
+
+
+def test_talking_over_settled_echo_is_admitted():
+    player = FakePlayer()
+    gate = EchoGate(player)
+    player.emit('start')
+    for i in range(20):
+        assert not gate.admit(tone(-30, i))
+    assert gate.admit(tone(-15, 20))
+    # Held open while they keep talking
+    assert gate.admit(tone(-30, 21))
+
+
+def test_loud_onset_only_calibrates():
+    player = FakePlayer()
+    gate = EchoGate(player)
+    player.emit('start')
+    # Quiet first frame, then the clip's real level: still settling, all echo
+    assert not gate.admit(tone(-45, 0))
+    assert not any(gate.admit(tone(-20, i)) for i in range(1, 20))
@@ -0,0 +1,24 @@
+from intents import IntentMatcher, get_intents
+
+
+def test_greeting_wins_over_later_rules():
+    # The pre-automaton think() chains checked "hola" first
+    assert get_intents().match("Hola Victor! Com estàs avui?").rule.name == 'greeting'
+    assert get_intents().respond("Hola Victor! Com estàs avui?") == "Hola! Com estàs?"
+
+
+def test_several_matches_pick_the_baseline_order():
+    intents = get_intents()
+    assert intents.match("Com et dius? Com estàs?").rule.name == 'name'
+    assert intents.match("Què pots fer? Adéu!").rule.name == 'capabilities'
+    assert intents.match("Com estàs? Adéu!").rule.name == 'how_are_you'
+    assert intents.match("Gràcies, adéu!").rule.name == 'goodbye'
+
+
+def test_tie_goes_to_the_earliest_match():
+    intents = IntentMatcher.from_dict({'rules': [
+        {'name': 'a', 'patterns': ['poma'], 'response': 'A'},
+        {'name': 'b', 'patterns': ['pera'], 'response': 'B'},
+    ]})
+    assert intents.respond("una pera i una poma") == 'B'
+    assert intents.respond("una poma i una pera") == 'A'
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from pipeline import Pipeline
+
+
+async def double(turn):
+    turn.data['out'] = turn.input * 2
+
+
+def test_turns_flow_through_stages():
+    async def main():
+        pipe = Pipeline().stage('double', double)
+        return [turn.data['out'] async for turn in pipe.run([1, 2, 3])]
+
+    assert asyncio.run(main()) == [2, 4, 6]
+
+
+def test_source_error_ends_run_after_in_flight_turns():
+    async def source():
+        yield 1
+        yield 2
+        raise ConnectionError("capture stopped")
+
+    async def main():
+        pipe = Pipeline().stage('double', double)
+        seen = []
+        with pytest.raises(ConnectionError):
+            async for turn in pipe.run(source()):
+                seen.append(turn.data['out'])
+        return seen
+
+    assert asyncio.run(asyncio.wait_for(main(), 3)) == [2, 4]
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Speech Text Chunking
+====================
+
+Split response text at sentence and clause boundaries so TTS can start
+on the first piece while the rest is still being synthesized.
+
+The first chunk is kept short (first clause) to minimise time-to-first-
+audio; later chunks are whole sentences, capped at MAX_CHUNK_CHARS.
+
+Author: VictorIA 🌟
+"""
+
+import re
+from typing import List
+
+# Sentence enders, including the Spanish/Catalan inverted marks' partners
+SENTENCE_END = re.compile(r'(?<=[.!?…])["»)\]]*\s+')
+CLAUSE_END = re.compile(r'(?<=[,;:—])\s+')
+
+# Don't emit clause fragments shorter than this (gTTS prosody suffers)
+MIN_CLAUSE_CHARS = 12
+MAX_CHUNK_CHARS = 180
+
+
+def _cap(chunk: str) -> List[str]:
+    """Break an over-long chunk at clause boundaries, then at spaces."""
+    if len(chunk) <= MAX_CHUNK_CHARS:
+        return [chunk]
+
+    pieces, current = [], ""
+    for clause in CLAUSE_END.split(chunk):
+        if current and len(current) + len(clause) + 1 > MAX_CHUNK_CHARS:
+            pieces.append(current)
+            current = clause
+        else:
+            current = f"{current} {clause}" if current else clause
+    if current:
+        pieces.append(current)
+
+    result = []
+    for piece in pieces:
+        while len(piece) > MAX_CHUNK_CHARS:
+            cut = piece.rfind(" ", 0, MAX_CHUNK_CHARS)
+            if cut <= 0:
+                cut = MAX_CHUNK_CHARS
+            result.append(piece[:cut].strip())
+            piece = piece[cut:].strip()
+        if piece:
+            result.append(piece)
+    return result
+
+
+def split_for_speech(text: str) -> List[str]:
+    """
+    Split text into speakable chunks.
+
+    >>> split_for_speech("Hola Victor, com estàs? Jo estic bé.")
+    ['Hola Victor,', 'com estàs?', 'Jo estic bé.']
+    """
+    text = " ".join(text.split())
+    if not text:
+        return []
+
+    chunks = []
+    for sentence in SENTENCE_END.split(text):
+        if sentence:
+            chunks.extend(_cap(sentence))
+
+    # Shorten the very first chunk to its first clause
+    clauses = CLAUSE_END.split(chunks[0], maxsplit=1)
+    if len(clauses) == 2 and len(clauses[0]) >= MIN_CLAUSE_CHARS:
+        chunks[0:1] = clauses
+
+    return chunks
+
+
+class SentenceSplitter:
+    """
+    Incremental splitter for text that arrives piece by piece
+    (e.g. tokens from an LLM).
+
+    feed() returns chunks that are complete; flush() returns the rest.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = 0
+
+    def feed(self, text: str) -> List[str]:
+        self.buffer += text
+        ready = []
+        while True:
+            match = SENTENCE_END.search(self.buffer)
+            if not match and self.emitted == 0:
+                # Nothing said yet: a long enough first clause will do
+                match = CLAUSE_END.search(self.buffer, MIN_CLAUSE_CHARS)
+            if not match:
+                break
+            chunk = self.buffer[:match.start()].strip()
+            self.buffer = self.buffer[match.end():]
+            if chunk:
+                ready.extend(_cap(" ".join(chunk.split())))
+                self.emitted += 1
+
+        # Runaway sentence without punctuation
+        if len(self.buffer) > MAX_CHUNK_CHARS:
+            cut = self.buffer.rfind(" ", 0, MAX_CHUNK_CHARS)
+            if cut > 0:
+                ready.append(" ".join(self.buffer[:cut].split()))
+                self.buffer = self.buffer[cut + 1:]
+                self.emitted += 1
+        return ready
+
+    def flush(self) -> List[str]:
+        rest = " ".join(self.buffer.split())
+        self.buffer = ""
+        if rest:
+            self.emitted += 1
+            return _cap(rest)
+        return []
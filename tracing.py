@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Per-Stage Latency Tracing
+=========================
+
+Nested spans with monotonic timestamps, correlated by turn id, so we
+can see where a turn's seconds actually go under load:
+
+- `tracer.span('asr')` times a block (sync or async `with`); spans
+  opened inside it become its children
+- The turn id and parent span travel in contextvars, so tasks created
+  inside a turn inherit them
+- Every stage feeds a rolling histogram (p50 / p95 / p99)
+- Export: one JSON line per span (VICTORIA_TRACE_FILE) and a
+  Prometheus text endpoint (`await tracer.serve(9464)`)
+
+Stages recorded across the agent: tts, tts_render, cdp_transfer,
+enqueue, decode_audio (page decodeAudioData), track_swap, first_audio,
+capture, endpoint, asr_queue, decode, asr, think, turn; at startup
+asr_warm, inject and ready (process launch to ready).
+
+Usage:
+    tracer = get_tracer()
+    with tracer.turn(turn_id):
+        async with tracer.span('tts', engine='gtts'):
+            ...
+    print(tracer.summary())
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_turn_id = contextvars.ContextVar('victoria_turn', default=None)
+_parent_span = contextvars.ContextVar('victoria_span', default=None)
+_span_ids = itertools.count(1)
+
+
+def current_turn():
+    """Turn id of the running context (None outside a turn)."""
+    return _turn_id.get()
+
+
+@contextmanager
+def turn_context(turn_id):
+    """Tag spans with `turn_id` without opening a 'turn' span (pipeline stages)."""
+    token = _turn_id.set(turn_id)
+    try:
+        yield
+    finally:
+        _turn_id.reset(token)
+
+
+def process_uptime() -> Optional[float]:
+    """Seconds since this process was launched (Linux /proc), else None."""
+    try:
+        with open('/proc/self/stat') as f:
+            # Field 22 is the start time in clock ticks; comm (field 2) may contain spaces
+            started = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - started / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RollingHistogram:
+    """Last `window` observations of one stage, plus lifetime count/sum."""
+
+    def __init__(self, window: int = 1024):
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.values.append(seconds)
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.values:
+            return 0.0
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        if not self.values:
+            return {'count': 0}
+        return {'count': self.count, 'p50': self.quantile(0.5), 'p95': self.quantile(0.95),
+                'p99': self.quantile(0.99), 'max': max(self.values)}
+
+
+class Span:
+    """A timed block; use with `with` or `async with`."""
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = next(_span_ids)
+        self.turn = None
+        self.parent = None
+        self.start = None
+        self.end = None
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def set(self, **attrs):
+        """Attach attributes discovered while the span runs."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.turn = _turn_id.get()
+        self.parent = _parent_span.get()
+        self._token = _parent_span.set(self.id)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        _parent_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._finish(self)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class _TurnScope:
+    """Sets the turn id for everything inside, wrapped in a 'turn' span."""
+
+    def __init__(self, tracer: 'Tracer', turn_id, attrs: dict):
+        self.turn_id = turn_id
+        self.span = Span(tracer, 'turn', attrs)
+        self._token = None
+
+    def __enter__(self):
+        self._token = _turn_id.set(self.turn_id)
+        return self.span.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return self.span.__exit__(exc_type, exc, tb)
+        finally:
+            _turn_id.reset(self._token)
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class Tracer:
+    """Collects spans into per-stage histograms and an optional JSONL file."""
+
+    def __init__(self, path: Optional[str] = None, window: int = 1024):
+        self.path = path
+        self.window = window
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self._file = open(path, 'a', buffering=1) if path else None
+        self._turn_ids = itertools.count(1)
+        self.collectors = []
+
+    def span(self, name: str, **attrs) -> Span:
+        return Span(self, name, attrs)
+
+    def turn(self, turn_id=None, **attrs) -> _TurnScope:
+        """Scope a turn: spans inside are tagged with its id."""
+        if turn_id is None:
+            turn_id = next(self._turn_ids)
+        return _TurnScope(self, turn_id, attrs)
+
+    def add_collector(self, collect):
+        """Extra exposition text for /metrics: `collect()` returns Prometheus lines."""
+        self.collectors.append(collect)
+
+    def observe(self, name: str, seconds: float):
+        """Histogram only (for high-rate samples like per-frame capture lag)."""
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = RollingHistogram(self.window)
+        hist.observe(seconds)
+
+    def record(self, name: str, seconds: float, ago: float = 0.0, **attrs):
+        """A duration measured elsewhere (e.g. in the page) that ended `ago` seconds ago."""
+        span = Span(self, name, attrs)
+        span.turn = _turn_id.get()
+        span.parent = _parent_span.get()
+        span.end = time.perf_counter() - ago
+        span.start = span.end - seconds
+        self._finish(span)
+
+    def _finish(self, span: Span):
+        self.observe(span.name, span.end - span.start)
+        if self._file is not None:
+            self._file.write(json.dumps({
+                'turn': span.turn,
+                'span': span.id,
+                'parent': span.parent,
+                'name': span.name,
+                'start': round(span.start, 6),
+                'duration': round(span.end - span.start, 6),
+                'wall': time.time(),
+                **span.attrs,
+            }, default=str) + '\n')
+
+    def summary(self) -> Dict[str, dict]:
+        return {name: hist.snapshot() for name, hist in sorted(self.histograms.items())}
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition: one summary per stage."""
+        lines = [
+            '# HELP victoria_stage_seconds Agent pipeline stage latency.',
+            '# TYPE victoria_stage_seconds summary',
+        ]
+        for name, hist in sorted(self.histograms.items()):
+            for q in QUANTILES:
+                lines.append(f'victoria_stage_seconds{{stage="{name}",quantile="{q}"}} {hist.quantile(q):.6f}')
+            lines.append(f'victoria_stage_seconds_sum{{stage="{name}"}} {hist.sum:.6f}')
+            lines.append(f'victoria_stage_seconds_count{{stage="{name}"}} {hist.count}')
+        text = '\n'.join(lines) + '\n'
+        return text + ''.join(collect() for collect in self.collectors)
+
+    async def serve(self, port: int = 9464, host: str = '127.0.0.1'):
+        """Serve /metrics on the running event loop. Returns the asyncio server."""
+        async def handle(reader, writer):
+            try:
+                await reader.readuntil(b'\r\n\r\n')
+                body = self.prometheus().encode()
+                writer.write(b'HTTP/1.1 200 OK\r\n'
+                             b'Content-Type: text/plain; version=0.0.4\r\n'
+                             b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+                             b'Connection: close\r\n\r\n' + body)
+                await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_tracer = None
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer; JSONL export when VICTORIA_TRACE_FILE is set."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(os.environ.get('VICTORIA_TRACE_FILE'))
+    return _tracer
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed TTS Audio Cache
+=================================
+
+The agent says the same phrases over and over. Rendered audio is keyed
+by (text, language, engine, voice) and kept in two tiers:
+
+- Memory: size-bounded LRU of AudioBuffers (hot phrases, no I/O; their
+          decoded/base64 forms are memoized and count against the size)
+- Disk:   one file per key, named after the audio's format
+          (<key>.mp3, <key>.wav), survives restarts
+
+Engines use it through tts_engines.CachedTTSEngine, whose warm()
+pre-renders a phrase list at startup so the first "Hola!" of a call
+doesn't pay the ~2s gTTS round trip.
+
+Usage:
+    cache = get_tts_cache()
+    audio = cache.get("Hola!", "ca") or cache.put("Hola!", "ca", rendered)
+    print(cache.stats())
+
+Author: VictorIA 🌟
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from audio_buffer import AudioBuffer
+
+DEFAULT_CACHE_DIR = Path(os.environ.get(
+    'VICTORIA_TTS_CACHE', Path.home() / '.cache' / 'agentvideocall' / 'tts'))
+
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+
+
+def cache_key(text: str, language: str, engine: str = 'gtts', voice: Optional[str] = None) -> str:
+    """Stable content address for one rendering of a phrase."""
+    ident = json.dumps([" ".join(text.split()), language, engine, voice or ""],
+                       ensure_ascii=False)
+    return hashlib.sha256(ident.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + disk) cache of rendered TTS audio."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR,
+                 max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 max_disk_bytes: Optional[int] = DEFAULT_DISK_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        # Memory tier holds AudioBuffers: their memoized conversions (decoded
+        # PCM, base64 chunks) are shared by every turn that speaks the phrase
+        self._memory = OrderedDict()
+        self._sizes = {}
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self._files())
+
+    def _path(self, key: str, format: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.{format}"
+
+    def _find(self, key: str) -> Optional[Path]:
+        """The stored file for `key`, whatever format it was written in."""
+        return next((self.cache_dir / key[:2]).glob(f"{key}.*"), None)
+
+    def _files(self):
+        return (p for p in self.cache_dir.glob('*/*.*') if p.suffix != '.tmp')
+
+    # -- memory tier --------------------------------------------------
+
+    def _remember(self, key: str, audio: AudioBuffer):
+        if len(audio) > self.max_memory_bytes:
+            return
+        if self._memory.pop(key, None) is not None:
+            self._memory_bytes -= self._sizes.pop(key)
+        self._memory[key] = audio
+        self._sizes[key] = audio.nbytes
+        self._memory_bytes += self._sizes[key]
+        self._trim_memory()
+
+    def _remeasure(self, key: str):
+        """Conversions memoized since the entry was stored count against the budget."""
+        size = self._memory[key].nbytes
+        self._memory_bytes += size - self._sizes[key]
+        self._sizes[key] = size
+        self._trim_memory()
+
+    def _trim_memory(self):
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            evicted, _ = self._memory.popitem(last=False)
+            self._memory_bytes -= self._sizes.pop(evicted)
+
+    # -- disk tier ----------------------------------------------------
+
+    def _write_disk(self, key: str, audio: AudioBuffer):
+        path = self._path(key, audio.format)
+        if path.exists():
+            return
+        path.parent.mkdir(exist_ok=True)
+        # Atomic write so a crash never leaves a truncated clip behind
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio.view)
+        os.replace(tmp, path)
+        self._disk_bytes += len(audio)
+        self._trim_disk()
+
+    def _trim_disk(self):
+        if self.max_disk_bytes is None or self._disk_bytes <= self.max_disk_bytes:
+            return
+        files = sorted(self._files(), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            self._disk_bytes -= size
+
+    def _read_disk(self, key: str) -> Optional[AudioBuffer]:
+        path = self._find(key)
+        if path is None:
+            return None
+        try:
+            audio = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # mtime doubles as last-used for disk eviction
+        return AudioBuffer(audio, path.suffix[1:])
+
+    # -- public API ---------------------------------------------------
+
+    def get(self, text: str, language: str, engine: str = 'gtts',
+            voice: Optional[str] = None) -> Optional[AudioBuffer]:
+        key = cache_key(text, language, engine, voice)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._remeasure(key)
+                self.memory_hits += 1
+                return audio
+            if self.cache_dir:
+                audio = self._read_disk(key)
+                if audio is not None:
+                    self._remember(key, audio)
+                    self.disk_hits += 1
+                    return audio
+            self.misses += 1
+            return None
+
+    def put(self, text: str, language: str, audio, engine: str = 'gtts',
+            voice: Optional[str] = None) -> AudioBuffer:
+        """Store encoded bytes or an AudioBuffer; returns the buffer kept."""
+        key = cache_key(text, language, engine, voice)
+        audio = AudioBuffer.of(audio)
+        with self._lock:
+            self._remember(key, audio)
+            if self.cache_dir:
+                self._write_disk(key, audio)
+        return audio
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            'hits': hits,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self._memory_bytes,
+            'disk_bytes': self._disk_bytes,
+        }
+
+
+_cache = None
+
+
+def get_tts_cache() -> TTSCache:
+    """Process-wide TTS cache shared by all agents."""
+    global _cache
+    if _cache is None:
+        _cache = TTSCache()
+    return _cache
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Pluggable TTS Engines
+=====================
+
+One interface for every TTS backend. Each engine returns in-memory
+audio plus format metadata (TTSAudio), never a file path.
+
+Engines:
+- gtts:    Google Translate TTS over the network (~2s per phrase)
+- catalan: local Catalan TTS container (BREAKTHROUGH.md, port 7860),
+           over a keep-alive connection pool with bounded concurrency
+
+Any engine can be wrapped in CachedTTSEngine to go through the shared
+TTS cache (tts_cache.py). Its disk tier is read and written off the
+event loop, and concurrent requests for one phrase share one render.
+
+Usage:
+    engine = get_tts_engine()            # VICTORIA_TTS_ENGINE, default gtts
+    audio = await engine.synthesize("Hola!", "ca")
+    audio.data, audio.format, audio.sample_rate
+    audio.buffer.float32()               # memoized conversions (audio_buffer.py)
+
+    # Point the HTTP engine at a stub server for testing:
+    engine = LocalHTTPTTSEngine(base_url="http://127.0.0.1:8765")
+
+Author: VictorIA 🌟
+"""
+
+import asyncio
+import io
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from audio_buffer import AudioBuffer
+from tracing import get_tracer
+from tts_cache import TTSCache, cache_key, get_tts_cache
+
+
+@dataclass
+class TTSAudio:
+    """Encoded audio produced by a TTS engine."""
+    data: bytes
+    format: str                 # 'mp3' | 'wav'
+    sample_rate: Optional[int]
+    channels: int
+    engine: str
+    voice: Optional[str] = None
+    # The same audio with memoized conversions; shared with the TTS cache
+    buffer: Optional[AudioBuffer] = None
+
+    def __post_init__(self):
+        if self.buffer is None:
+            self.buffer = AudioBuffer(self.data, self.format, self.sample_rate, self.channels)
+
+    @property
+    def mime_type(self) -> str:
+        return {'mp3': 'audio/mpeg', 'wav': 'audio/wav'}.get(self.format, 'application/octet-stream')
+
+
+class TTSEngine:
+    """
+    Base class for TTS backends.
+
+    Subclasses implement render() (blocking, returns encoded bytes);
+    synthesize() runs it off the event loop.
+    """
+
+    name = 'base'
+    format = 'mp3'
+    default_voice: Optional[str] = None
+    # Voice per language (the speaker's detected language picks one)
+    voices: Dict[str, str] = {}
+    # Languages the engine can speak (None: any)
+    languages: Optional[Iterable[str]] = None
+
+    def render(self, text: str, language: str, voice: Optional[str] = None) -> bytes:
+        raise NotImplementedError
+
+    def speaks(self, language: str) -> bool:
+        return not self.languages or language in self.languages
+
+    def voice_for(self, language: str) -> Optional[str]:
+        return self.voices.get(language, self.default_voice)
+
+    def describe(self, data, voice: Optional[str] = None) -> TTSAudio:
+        """Wrap rendered bytes (or a cached AudioBuffer) with format metadata."""
+        buffer = AudioBuffer.of(data, self.format)
+        sample_rate = buffer.sample_rate or getattr(self, 'sample_rate', None)
+        return TTSAudio(buffer.data, buffer.format, sample_rate, buffer.channels, self.name,
+                        voice or self.default_voice, buffer)
+
+    def synthesize_sync(self, text: str, language: str, voice: Optional[str] = None) -> TTSAudio:
+        return self.describe(self.render(text, language, voice), voice)
+
+    async def synthesize(self, text: str, language: str, voice: Optional[str] = None) -> TTSAudio:
+        with get_tracer().span('tts_render', engine=self.name, chars=len(text)):
+            return await asyncio.to_thread(self.synthesize_sync, text, language, voice)
+
+    async def close(self):
+        pass
+
+
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS (network-bound)."""
+
+    name = 'gtts'
+    format = 'mp3'
+    sample_rate = 24000
+    # Voice = Google domain, which picks the accent (Spain rather than Mexico)
+    voices = {'es': 'es', 'en': 'co.uk'}
+
+    def render(self, text, language, voice=None):
+        from gtts import gTTS
+        buf = io.BytesIO()
+        gTTS(text, lang=language, tld=voice or 'com').write_to_fp(buf)
+        return buf.getvalue()
+
+
+class LocalHTTPTTSEngine(TTSEngine):
+    """
+    Local HTTP TTS server (the catalan-tts container by default).
+
+    Requests share a keep-alive connection pool; at most `max_concurrency`
+    are in flight so a burst of sentence chunks can't overload the model.
+    """
+
+    name = 'catalan'
+    format = 'wav'
+    default_voice = 'olga'
+
+    def __init__(self, base_url: str = None, path: str = '/api/tts',
+                 accent: str = 'balear', languages: Iterable[str] = ('ca',),
+                 max_concurrency: int = 2, timeout: float = 30.0):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = (base_url or os.environ.get('VICTORIA_LOCAL_TTS_URL', 'http://localhost:7860')).rstrip('/')
+        self.path = path
+        self.accent = accent
+        self.languages = set(languages)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._limit = None
+
+    def render(self, text, language, voice=None):
+        if self.languages and language not in self.languages:
+            raise ValueError(f"{self.name} TTS does not speak '{language}'")
+        resp = self.session.post(
+            f"{self.base_url}{self.path}",
+            json={"text": text, "voice": voice or self.default_voice, "accent": self.accent},
+            timeout=self.timeout
+        )
+        resp.raise_for_status()
+        return resp.content
+
+    async def synthesize(self, text, language, voice=None):
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.max_concurrency)
+        async with self._limit:
+            return await super().synthesize(text, language, voice)
+
+    async def close(self):
+        self.session.close()
+
+
+class CachedTTSEngine(TTSEngine):
+    """Any engine, fronted by the content-addressed TTS cache."""
+
+    def __init__(self, engine: TTSEngine, cache: Optional[TTSCache] = None):
+        self.engine = engine
+        self.cache = cache or get_tts_cache()
+        self.name = engine.name
+        self.format = engine.format
+        self.default_voice = engine.default_voice
+        self.voices = engine.voices
+        self.languages = engine.languages
+        # Cache key -> render in progress, shared by everyone asking for it
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def describe(self, data, voice=None):
+        return self.engine.describe(data, voice)
+
+    def _lookup(self, text, language, voice):
+        return self.cache.get(text, language, self.name, voice or self.default_voice)
+
+    def _store(self, text, language, voice, data):
+        self.cache.put(text, language, data, self.name, voice or self.default_voice)
+
+    def synthesize_sync(self, text, language, voice=None):
+        data = self._lookup(text, language, voice)
+        if data is None:
+            audio = self.engine.synthesize_sync(text, language, voice)
+            self._store(text, language, voice, audio.buffer)
+            return audio
+        return self.describe(data, voice)
+
+    async def synthesize(self, text, language, voice=None):
+        audio, _ = await self._synthesize(text, language, voice)
+        return audio
+
+    async def _synthesize(self, text, language, voice) -> Tuple[TTSAudio, bool]:
+        """The audio, and whether this call started a render for it."""
+        with get_tracer().span('tts', engine=self.engine.name) as span:
+            key = cache_key(text, language, self.name, voice or self.default_voice)
+            pending = self._pending.get(key)
+            if pending is None:
+                # The cache takes a thread lock and may read a file
+                data = await asyncio.to_thread(self._lookup, text, language, voice)
+                span.set(cached=data is not None)
+                if data is not None:
+                    return self.describe(data, voice), False
+                pending = self._pending.get(key)
+            started = pending is None
+            if started:
+                pending = self._pending[key] = asyncio.ensure_future(
+                    self._render(text, language, voice))
+                pending.add_done_callback(lambda f: self._render_done(key, f))
+            # A waiter giving up (barge-in) doesn't cancel the render for the others
+            return await asyncio.shield(pending), started
+
+    async def _render(self, text, language, voice):
+        audio = await self.engine.synthesize(text, language, voice)
+        await asyncio.to_thread(self._store, text, language, voice, audio.buffer)
+        return audio
+
+    def _render_done(self, key, future):
+        self._pending.pop(key, None)
+        if not future.cancelled():
+            future.exception()      # retrieved: every waiter may have left
+
+    async def warm(self, phrases: Iterable[str], language: str, voice: Optional[str] = None,
+                   concurrency: int = 4) -> int:
+        """Pre-render uncached phrases; returns how many were rendered."""
+        limit = asyncio.Semaphore(concurrency)
+        rendered = 0
+
+        async def one(phrase):
+            nonlocal rendered
+            async with limit:
+                _, started = await self._synthesize(phrase, language, voice)
+            rendered += started
+
+        await asyncio.gather(*(one(p) for p in phrases))
+        return rendered
+
+    async def close(self):
+        await self.engine.close()
+
+
+ENGINES = {
+    'gtts': GTTSEngine,
+    'catalan': LocalHTTPTTSEngine,
+}
+
+_engines: Dict[str, TTSEngine] = {}
+
+
+def get_tts_engine(name: str = None, cached: bool = True) -> TTSEngine:
+    """Shared engine instance by name (default from VICTORIA_TTS_ENGINE)."""
+    name = name or os.environ.get('VICTORIA_TTS_ENGINE', 'gtts')
+    key = f"{name}:{'cached' if cached else 'raw'}"
+    if key not in _engines:
+        engine = ENGINES[name]()
+        _engines[key] = CachedTTSEngine(engine) if cached else engine
+    return _engines[key]
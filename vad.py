@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Streaming Voice-Activity Endpointing
+====================================
+
+Frame-by-frame VAD on the continuous capture stream (capture.py).
+An utterance is cut as soon as trailing silence passes a threshold,
+so ASR starts a few hundred ms after the speaker stops instead of
+waiting out a fixed capture window.
+
+- webrtcvad when installed, otherwise an adaptive energy detector
+- Pre-roll padding so word onsets aren't clipped
+- Max-utterance cap for people who never pause
+
+Events:
+- SpeechStart: speech onset (used for barge-in)
+- Utterance:   a finished utterance, PCM16 mono
+
+Usage:
+    async for event in endpoint(PCMCapture(ws_url)):
+        if isinstance(event, Utterance):
+            ...
+
+Author: VictorIA 🌟
+"""
+
+import array
+import io
+import math
+import time
+import wave
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional
+
+try:
+    import webrtcvad
+    WEBRTCVAD_AVAILABLE = True
+except ImportError:
+    WEBRTCVAD_AVAILABLE = False
+
+
+@dataclass
+class SpeechStart:
+    """Speech onset detected (timestamp of the first voiced frame)."""
+    timestamp: float
+    detected_at: float = field(default_factory=time.time)
+
+
+@dataclass
+class Utterance:
+    """One endpointed utterance."""
+    pcm: bytes                  # int16 little-endian mono, pre-roll included
+    sample_rate: int
+    start: float                # page timestamp of the first sample
+    end: float                  # page timestamp of the last voiced frame
+    speech_ms: int              # voiced audio inside the utterance
+    reason: str                 # 'silence' | 'max_length' | 'flush'
+    detected_at: float = field(default_factory=time.time)
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / 2 / self.sample_rate
+
+    def wav_bytes(self) -> bytes:
+        buf = io.BytesIO()
+        with wave.open(buf, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(self.pcm)
+        return buf.getvalue()
+
+
+def frame_dbfs(pcm: bytes) -> float:
+    """RMS level of a PCM16 frame in dBFS."""
+    samples = array.array('h', pcm)
+    if not samples:
+        return -120.0
+    rms = math.sqrt(sum(s * s for s in samples) / len(samples))
+    return 20 * math.log10(max(rms, 1.0) / 32768.0)
+
+
+class EnergyVAD:
+    """
+    Adaptive energy detector: speech is anything `margin_db` above a
+    slowly tracked noise floor (and above `min_db` in absolute terms).
+    """
+
+    def __init__(self, margin_db: float = 12.0, min_db: float = -50.0,
+                 floor_db: float = -60.0, adapt: float = 0.05):
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.noise_floor = floor_db
+        self.adapt = adapt
+
+    def is_speech(self, pcm: bytes, sample_rate: int) -> bool:
+        level = frame_dbfs(pcm)
+        speech = level > max(self.noise_floor + self.margin_db, self.min_db)
+        if not speech:
+            self.noise_floor += self.adapt * (level - self.noise_floor)
+        return speech
+
+
+class WebRTCVAD:
+    """webrtcvad wrapper (10/20/30 ms frames at 8/16/32/48 kHz)."""
+
+    def __init__(self, aggressiveness: int = 2):
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, pcm: bytes, sample_rate: int) -> bool:
+        return self.vad.is_speech(pcm, sample_rate)
+
+
+def default_detector():
+    return WebRTCVAD() if WEBRTCVAD_AVAILABLE else EnergyVAD()
+
+
+class VADEndpointer:
+    """
+    Turns a stream of AudioFrames into SpeechStart / Utterance events.
+
+    An utterance starts after `onset_ms` of voiced frames and ends once
+    `silence_ms` of trailing silence has been seen (or `max_utterance_ms`
+    is reached). `preroll_ms` of audio before the onset is kept.
+    """
+
+    def __init__(self, silence_ms: int = 500, preroll_ms: int = 300,
+                 onset_ms: int = 60, min_speech_ms: int = 200,
+                 max_utterance_ms: int = 15000, tail_ms: int = 150,
+                 detector=None):
+        self.silence_ms = silence_ms
+        self.preroll_ms = preroll_ms
+        self.onset_ms = onset_ms
+        self.min_speech_ms = min_speech_ms
+        self.max_utterance_ms = max_utterance_ms
+        self.tail_ms = tail_ms
+        self.detector = detector or default_detector()
+
+        self._preroll = deque()
+        self._preroll_ms = 0.0
+        self._frames: List = []
+        self._voiced_run = 0.0
+        self._silence_run = 0.0
+        self._speech_ms = 0.0
+        self._utterance_ms = 0.0
+        self._last_voiced_end = None
+        self.in_speech = False
+
+        self.utterances = 0
+        self.discarded = 0
+
+    @property
+    def frames(self) -> list:
+        """Frames of the utterance in progress (pre-roll included)."""
+        return list(self._frames)
+
+    def _reset(self):
+        self._frames = []
+        self._silence_run = 0.0
+        self._speech_ms = 0.0
+        self._utterance_ms = 0.0
+        self._last_voiced_end = None
+        self.in_speech = False
+
+    def _push_preroll(self, frame, ms):
+        self._preroll.append((frame, ms))
+        self._preroll_ms += ms
+        while self._preroll and self._preroll_ms - self._preroll[0][1] >= self.preroll_ms:
+            self._preroll_ms -= self._preroll.popleft()[1]
+
+    def _finish(self, reason: str) -> Optional[Utterance]:
+        frames = self._frames
+        # Drop trailing silence beyond a short tail
+        keep_ms = self._silence_run - self.tail_ms
+        while keep_ms > 0 and frames:
+            keep_ms -= frames[-1].duration * 1000
+            if keep_ms >= 0:
+                frames = frames[:-1]
+
+        speech_ms = self._speech_ms
+        end = self._last_voiced_end
+        self._reset()
+
+        if not frames or speech_ms < self.min_speech_ms:
+            self.discarded += 1
+            return None
+        self.utterances += 1
+        return Utterance(
+            pcm=b"".join(f.pcm for f in frames),
+            sample_rate=frames[0].sample_rate,
+            start=frames[0].timestamp,
+            end=end or frames[-1].end,
+            speech_ms=int(speech_ms),
+            reason=reason
+        )
+
+    def process(self, frame) -> list:
+        """Feed one AudioFrame; returns the events it completes (maybe none)."""
+        events = []
+        ms = frame.duration * 1000
+        voiced = self.detector.is_speech(frame.pcm, frame.sample_rate)
+
+        if not self.in_speech:
+            self._push_preroll(frame, ms)
+            self._voiced_run = self._voiced_run + ms if voiced else 0.0
+            if self._voiced_run >= self.onset_ms:
+                self.in_speech = True
+                self._frames = [f for f, _ in self._preroll]
+                self._utterance_ms = self._preroll_ms
+                self._speech_ms = self._voiced_run
+                self._last_voiced_end = frame.end
+                onset = self._frames[-1].timestamp - (self._voiced_run - ms) / 1000
+                self._preroll.clear()
+                self._preroll_ms = 0.0
+                self._voiced_run = 0.0
+                events.append(SpeechStart(timestamp=onset))
+            return events
+
+        self._frames.append(frame)
+        self._utterance_ms += ms
+        if voiced:
+            self._speech_ms += ms
+            self._silence_run = 0.0
+            self._last_voiced_end = frame.end
+        else:
+            self._silence_run += ms
+
+        if self._silence_run >= self.silence_ms:
+            utterance = self._finish('silence')
+            if utterance:
+                events.append(utterance)
+        elif self._utterance_ms >= self.max_utterance_ms:
+            utterance = self._finish('max_length')
+            if utterance:
+                events.append(utterance)
+            if voiced:
+                # Still talking: carry straight on into the next utterance
+                self.in_speech = True
+                self._speech_ms = 0.0
+        return events
+
+    def flush(self) -> list:
+        """End any utterance in progress (e.g. capture stopped)."""
+        if not self.in_speech:
+            return []
+        utterance = self._finish('flush')
+        return [utterance] if utterance else []
+
+
+async def endpoint(frames: AsyncIterator, **kwargs) -> AsyncIterator:
+    """Async generator of SpeechStart / Utterance events from a frame stream."""
+    endpointer = VADEndpointer(**kwargs)
+    async for frame in frames:
+        for event in endpointer.process(frame):
+            yield event
+    for event in endpointer.flush():
+        yield event
@@ -12,171 +12,163 @@ Author: VictorIA 🌟
 """
 
 import asyncio
-import websockets
-import json
+import importlib.util
 import base64
-import requests
-import tempfile
-import subprocess
-import os
-from gtts import gTTS
+import threading
+import io
+import time
 
-# Use Whisper for better transcription
-try:
-    from faster_whisper import WhisperModel
-    WHISPER_AVAILABLE = True
-except ImportError:
-    WHISPER_AVAILABLE = False
-    import speech_recognition as sr
+from audio_decode import float32_to_wav_bytes, to_whisper_input
+from cdp import get_connection
+from chat import get_chat
+from intents import get_intents
+from page_player import get_player
+from pipeline import Turn
+from targets import get_registry
+from tracing import get_tracer, process_uptime
+from tts_engines import get_tts_engine
+
+# Use Whisper for better transcription (imported when the model loads)
+WHISPER_AVAILABLE = importlib.util.find_spec("faster_whisper") is not None
 
 # Chrome WebSocket URLs
 SPEAKER_WS = None  # Set dynamically
 LISTENER_WS = None
 
 class VideoCallLoop:
-    def __init__(self, speaker_port=18800, listener_port=18801):
+    def __init__(self, speaker_port=18800, listener_port=18801, tts_engine=None):
         self.speaker_port = speaker_port
         self.listener_port = listener_port
+        self.tts = tts_engine or get_tts_engine()
+        self._whisper_model = None
+        self._whisper_lock = threading.Lock()
         
     async def get_page_ids(self):
-        """Get page IDs from Chrome instances."""
-        import urllib.request
+        """
+        Page IDs of the Jitsi tabs, from the live target registries.
         
+        Only the first call talks to Chrome; after that the registries
+        follow targets through DevTools events (reloads, crashes, new
+        tabs), so this is an in-memory lookup.
+        """
+        speaker = await get_registry(self.speaker_port)
+        self.speaker_id = await speaker.wait_for_page(timeout=30)
         try:
-            with urllib.request.urlopen(f'http://127.0.0.1:{self.speaker_port}/json/list') as r:
-                pages = json.loads(r.read())
-                for p in pages:
-                    if p['type'] == 'page' and 'Jitsi' in p.get('title', ''):
-                        self.speaker_id = p['id']
-                        break
-        except:
-            pass
-            
-        try:
-            with urllib.request.urlopen(f'http://127.0.0.1:{self.listener_port}/json/list') as r:
-                pages = json.loads(r.read())
-                for p in pages:
-                    if p['type'] == 'page' and 'Jitsi' in p.get('title', ''):
-                        self.listener_id = p['id']
-                        break
-        except:
-            pass
+            # Not needed for the loopback loop: don't wait for it
+            listener = await get_registry(self.listener_port, timeout=0)
+            self.listener_id = listener.page_id()
+        except asyncio.TimeoutError:
+            self.listener_id = None
+    
+    def _speaker_url(self):
+        return f"ws://127.0.0.1:{self.speaker_port}/devtools/page/{self.speaker_id}"
+    
+    async def _speaker_connection(self):
+        """Shared CDP connection to the speaker tab."""
+        return await get_connection(self._speaker_url())
     
     def generate_tts(self, text, lang='ca'):
-        """Generate TTS audio file."""
-        path = tempfile.mktemp(suffix='.mp3')
-        tts = gTTS(text, lang=lang)
-        tts.save(path)
-        return path
+        """Generate TTS audio in memory (an AudioBuffer from the shared TTS cache)."""
+        return self.tts.synthesize_sync(text, lang).buffer
     
-    def upload_audio(self, path):
-        """Upload to catbox CDN."""
-        with open(path, 'rb') as f:
-            resp = requests.post(
-                'https://catbox.moe/user/api.php',
-                files={'fileToUpload': f},
-                data={'reqtype': 'fileupload'}
-            )
+    def upload_audio(self, audio):
+        """Upload to catbox CDN (straight from memory, no temp file)."""
+        import requests
+        resp = requests.post(
+            'https://catbox.moe/user/api.php',
+            files={'fileToUpload': (f'tts.{audio.format}', audio.data, audio.mime_type)},
+            data={'reqtype': 'fileupload'}
+        )
         return resp.text.strip()
     
-    def transcribe_local(self, audio_path, lang='ca'):
+    def load_whisper(self):
+        """Load the Whisper model once and run a throwaway inference on it."""
+        with self._whisper_lock:
+            if self._whisper_model is None:
+                self._whisper_model = self._load_whisper()
+        return self._whisper_model
+    
+    def _load_whisper(self):
+        from faster_whisper import WhisperModel
+        import numpy as np
+        
+        print("Loading Whisper model...")
+        model = WhisperModel("base", device="cpu", compute_type="int8")
+        noise = np.random.default_rng(0).normal(0, 1e-3, 16000).astype(np.float32)
+        segments, _ = model.transcribe(noise, language='ca', beam_size=1)
+        list(segments)
+        return model
+    
+    async def start(self):
+        """
+        Cold start, in parallel: load and warm Whisper (in a thread) while
+        the Chrome targets are discovered and the agent runtime injected.
+        
+        Returns seconds per part, 'start' and 'ready' (since launch).
+        """
+        tracer = get_tracer()
+        started = time.time()
+        timings = {}
+        
+        async def warm_asr():
+            t = time.time()
+            if WHISPER_AVAILABLE:
+                with tracer.span('asr_warm', model='base', workers=1):
+                    await asyncio.to_thread(self.load_whisper)
+            timings['asr_warm'] = time.time() - t
+        
+        async def inject():
+            t = time.time()
+            await self.get_page_ids()
+            with tracer.span('inject'):
+                await get_player(self._speaker_url())
+            timings['inject'] = time.time() - t
+        
+        await asyncio.gather(warm_asr(), inject())
+        timings['start'] = time.time() - started
+        timings['ready'] = process_uptime()
+        if timings['ready'] is not None:
+            tracer.record('ready', timings['ready'])
+        return timings
+    
+    def transcribe_local(self, audio, lang='ca'):
         """Transcribe audio locally using Whisper (loopback - hearing myself)."""
-        # Convert to WAV if needed
-        if not audio_path.endswith('.wav'):
-            wav_path = audio_path.rsplit('.', 1)[0] + '.wav'
-            subprocess.run([
-                'ffmpeg', '-y', '-i', audio_path,
-                '-ar', '16000', '-ac', '1', wav_path
-            ], capture_output=True)
-            audio_path = wav_path
+        # Decode in-process straight to a 16 kHz float32 array (memoized on an AudioBuffer)
+        samples = to_whisper_input(audio)
         
         if WHISPER_AVAILABLE:
             try:
-                # Use Whisper for better accuracy
-                if not hasattr(self, '_whisper_model'):
-                    print("Loading Whisper model (first time)...")
-                    self._whisper_model = WhisperModel("base", device="cpu", compute_type="int8")
-                
-                segments, _ = self._whisper_model.transcribe(audio_path, language=lang)
+                # Use Whisper for better accuracy (normally already loaded by start())
+                model = self.load_whisper()
+                segments, _ = model.transcribe(samples, language=lang)
                 return " ".join([s.text.strip() for s in segments])
             except Exception as e:
                 return f"[Whisper error: {e}]"
         else:
             # Fallback to Google STT
             try:
+                import speech_recognition as sr
                 recognizer = sr.Recognizer()
-                with sr.AudioFile(audio_path) as source:
+                with sr.AudioFile(io.BytesIO(float32_to_wav_bytes(samples))) as source:
                     audio = recognizer.record(source)
                 return recognizer.recognize_google(audio, language=f"{lang}-ES")
             except Exception as e:
                 return f"[STT error: {e}]"
     
     def think(self, heard_text):
-        """Generate response based on what was heard."""
-        heard_lower = heard_text.lower()
-        
-        if "hola" in heard_lower:
-            return "Hola! Com estàs? Sóc VictorIA!"
-        elif "com et dius" in heard_lower:
-            return "Em dic VictorIA, la teva assistent amb veu!"
-        elif "què pots fer" in heard_lower:
-            return "Puc parlar, escoltar i respondre en videotrucades!"
-        elif "adéu" in heard_lower or "bye" in heard_lower:
-            return "Adéu! Ha estat un plaer!"
-        else:
-            return f"He entès: {heard_text}. Què necessites?"
+        """Generate response based on what was heard (rules in intents.json)."""
+        return get_intents().respond(heard_text)
     
     async def speak_on_jitsi(self, audio_url):
-        """Play audio on Jitsi meeting."""
-        ws_url = f"ws://127.0.0.1:{self.speaker_port}/devtools/page/{self.speaker_id}"
-        
-        async with websockets.connect(ws_url) as ws:
-            await ws.send(json.dumps({"id": 1, "method": "Runtime.enable"}))
-            await ws.recv()
-            
-            await ws.send(json.dumps({"id": 2, "method": "Runtime.evaluate", "params": {
-                "expression": f"""
-                    (async () => {{
-                        const ctx = new AudioContext();
-                        const resp = await fetch('{audio_url}');
-                        const buf = await resp.arrayBuffer();
-                        const audioBuf = await ctx.decodeAudioData(buf);
-                        const src = ctx.createBufferSource();
-                        src.buffer = audioBuf;
-                        const dest = ctx.createMediaStreamDestination();
-                        src.connect(dest);
-                        const [track] = dest.stream.getAudioTracks();
-                        const jt = await JitsiMeetJS.createLocalTracksFromMediaStreams([{{
-                            stream: dest.stream, mediaType: 'audio', track
-                        }}]);
-                        for (const t of (APP.conference._room?.getLocalTracks?.() || []))
-                            if (t.getType() === 'audio') await t.dispose();
-                        await APP.conference._room.addTrack(jt[0]);
-                        src.start();
-                        return 'OK';
-                    }})()
-                """,
-                "returnByValue": True,
-                "awaitPromise": True
-            }}))
-            
-            while True:
-                r = json.loads(await ws.recv())
-                if r.get("id") == 2:
-                    return r.get('result', {}).get('result', {}).get('value')
+        """Play audio on Jitsi meeting (persistent outgoing track, no track swap)."""
+        player = await get_player(self._speaker_url())
+        await player.call("speak", audio_url, False)
+        return 'OK'
     
     async def send_chat(self, message):
-        """Send chat message to Jitsi."""
-        ws_url = f"ws://127.0.0.1:{self.speaker_port}/devtools/page/{self.speaker_id}"
-        
-        async with websockets.connect(ws_url) as ws:
-            await ws.send(json.dumps({"id": 1, "method": "Runtime.enable"}))
-            await ws.recv()
-            
-            await ws.send(json.dumps({"id": 2, "method": "Runtime.evaluate", "params": {
-                "expression": f"APP.conference._room.sendTextMessage(`{message}`)",
-                "returnByValue": True
-            }}))
+        """Queue a chat message (coalesced and rate-limited over the shared connection)."""
+        chat = await get_chat(self._speaker_url())
+        chat.send(message)
     
     async def full_loop_iteration(self, input_text=None):
         """
@@ -186,40 +178,54 @@ class VideoCallLoop:
         Otherwise, attempt to capture from Jitsi.
         """
         await self.get_page_ids()
+        turn = Turn(input_text)
         
-        # Step 1: Generate initial speech
+        # Step 1: Generate initial speech (once: both branches below reuse it)
         initial_text = input_text or "Hola! Estic escoltant. Què vols dir-me?"
         print(f"💬 Generating: {initial_text}")
         
-        audio_path = self.generate_tts(initial_text)
+        async with turn.span('tts'):
+            audio = await asyncio.to_thread(self.generate_tts, initial_text)
         
-        # Step 2: Transcribe locally (loopback - I hear myself)
-        heard = self.transcribe_local(audio_path)
-        print(f"👂 I heard (loopback): {heard}")
+        # Step 2 and 3 run together: transcribe locally (loopback - I hear
+        # myself) while the same buffer is uploaded and played on Jitsi
+        async def hear():
+            async with turn.span('transcribe'):
+                return await asyncio.to_thread(self.transcribe_local, audio)
         
-        # Step 3: Upload and play on Jitsi
-        audio_url = self.upload_audio(audio_path)
-        await self.speak_on_jitsi(audio_url)
+        async def play():
+            async with turn.span('upload'):
+                url = await asyncio.to_thread(self.upload_audio, audio)
+            async with turn.span('play'):
+                await self.speak_on_jitsi(url)
+            return url
+        
+        heard, audio_url = await asyncio.gather(hear(), play())
+        print(f"👂 I heard (loopback): {heard}")
         print(f"🎤 Played on Jitsi: {audio_url}")
         
         # Step 4: Generate response
-        response = self.think(heard)
+        async with turn.span('think'):
+            response = self.think(heard)
         print(f"🧠 Response: {response}")
         
         # Step 5: Speak response
-        response_path = self.generate_tts(response)
-        response_url = self.upload_audio(response_path)
-        await self.speak_on_jitsi(response_url)
+        async with turn.span('tts'):
+            response_audio = await asyncio.to_thread(self.generate_tts, response)
+        async with turn.span('upload'):
+            response_url = await asyncio.to_thread(self.upload_audio, response_audio)
+        async with turn.span('play'):
+            await self.speak_on_jitsi(response_url)
         print(f"🎤 Responded on Jitsi: {response_url}")
         
-        # Cleanup
-        os.remove(audio_path)
-        os.remove(response_path)
+        turn.finished = time.time()
+        print(f"⏱️  {turn.report()}")
         
         return {
             "initial": initial_text,
             "heard": heard,
-            "response": response
+            "response": response,
+            "critical_path": turn.report(),
         }
 
 
@@ -229,6 +235,9 @@ async def demo():
     print("=" * 40)
     
     loop = VideoCallLoop()
+    startup = await loop.start()
+    print(f"🔥 Ready in {startup['start']:.2f}s (Whisper {startup['asr_warm']:.2f}s ∥ "
+          f"targets + inject {startup['inject']:.2f}s)")
     result = await loop.full_loop_iteration("Hola Victor! Puc parlar i escoltar!")
     
     print("\n" + "=" * 40)